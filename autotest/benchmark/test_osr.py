@@ -0,0 +1,66 @@
+#!/usr/bin/env pytest
+# -*- coding: utf-8 -*-
+###############################################################################
+# $Id$
+#
+# Project:  GDAL/OGR Test Suite
+# Purpose:  Benchmarking of coordinate transformations
+#
+###############################################################################
+# Copyright (c) 2024, GDAL contributors
+#
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+###############################################################################
+
+import pytest
+
+from osgeo import gdal, osr
+
+np = pytest.importorskip("numpy")
+
+# Must be set to run the test_XXX functions under the benchmark fixture
+pytestmark = pytest.mark.usefixtures("decorate_with_benchmark")
+
+
+@pytest.fixture(scope="module")
+def points():
+    if "debug" in gdal.VersionInfo(""):
+        count = 100000
+    else:
+        count = 10000000
+    lon = np.random.uniform(0, 6, count)
+    lat = np.random.uniform(0, 80, count)
+    return lon, lat
+
+
+@pytest.fixture(scope="module")
+def ct():
+    src_srs = osr.SpatialReference()
+    src_srs.ImportFromEPSG(4326)
+    src_srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    dst_srs = osr.SpatialReference()
+    dst_srs.ImportFromEPSG(32631)
+    return osr.CoordinateTransformation(src_srs, dst_srs)
+
+
+@pytest.mark.parametrize("num_threads", [1, 2, 4, "ALL_CPUS"])
+def test_osr_transform_points_arrays(points, ct, num_threads):
+    x = points[0].copy()
+    y = points[1].copy()
+    ct.TransformPointsWithErrorCodes(x, y, num_threads=num_threads)
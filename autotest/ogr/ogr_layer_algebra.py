@@ -609,3 +609,62 @@ def test_algebra_erase_5(A, empty, C):
     assert C.GetFeatureCount() == A.GetFeatureCount(), (
         "Layer.Erase returned " + str(C.GetFeatureCount()) + " features"
     )
+
+
+###############################################################################
+# Test that NUM_THREADS gives the same result as a single thread
+
+
+@pytest.mark.parametrize("operation", ["Intersection", "Identity", "Clip", "Erase"])
+@pytest.mark.parametrize("method_filter", [False, True])
+def test_algebra_num_threads(mem_ds, operation, method_filter):
+
+    input_lyr = mem_ds.CreateLayer("input")
+    input_lyr.CreateField(ogr.FieldDefn("input_id", ogr.OFTInteger))
+    for i in range(400):
+        x = (i % 20) * 1.5
+        y = (i // 20) * 1.5
+        feat = ogr.Feature(input_lyr.GetLayerDefn())
+        feat["input_id"] = i
+        feat.SetGeometryDirectly(
+            ogr.CreateGeometryFromWkt(
+                f"POLYGON(({x} {y},{x} {y + 2},{x + 2} {y + 2},{x + 2} {y},{x} {y}))"
+            )
+        )
+        input_lyr.CreateFeature(feat)
+
+    method_lyr = mem_ds.CreateLayer("method")
+    method_lyr.CreateField(ogr.FieldDefn("method_id", ogr.OFTInteger))
+    for i in range(50):
+        feat = ogr.Feature(method_lyr.GetLayerDefn())
+        feat["method_id"] = i
+        feat.SetGeometryDirectly(
+            ogr.CreateGeometryFromWkt(
+                f"POINT({(i * 7.3) % 30} {(i * 3.7) % 30})"
+            ).Buffer(2)
+        )
+        method_lyr.CreateFeature(feat)
+    if method_filter:
+        method_lyr.SetSpatialFilterRect(5, 5, 20, 20)
+
+    expected_lyr = mem_ds.CreateLayer("expected")
+    assert getattr(input_lyr, operation)(method_lyr, expected_lyr) == 0
+    assert expected_lyr.GetFeatureCount() > 0
+
+    got_lyr = mem_ds.CreateLayer("got")
+    assert (
+        getattr(input_lyr, operation)(method_lyr, got_lyr, options=["NUM_THREADS=4"])
+        == 0
+    )
+
+    assert got_lyr.GetFeatureCount() == expected_lyr.GetFeatureCount()
+    for expected_feat, got_feat in zip(expected_lyr, got_lyr):
+        assert got_feat.GetFID() == expected_feat.GetFID()
+        for i in range(expected_feat.GetFieldCount()):
+            assert got_feat.GetField(i) == expected_feat.GetField(i)
+        ogrtest.check_feature_geometry(
+            got_feat, expected_feat.GetGeometryRef(), max_error=1e-8
+        )
+
+    if method_filter:
+        assert method_lyr.GetFeatureCount() < 50
@@ -552,6 +552,55 @@ def test_ogr_pmtiles_write_from_mbtiles_deduplication():
 ###############################################################################
 
 
+@pytest.mark.require_driver("MBTiles")
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("SQLite")
+def test_ogr_pmtiles_write_from_raster_mbtiles(tmp_vsimem):
+
+    mbtiles_filename = str(tmp_vsimem / "test.mbtiles")
+    gdal.Translate(mbtiles_filename, "../gcore/data/byte.tif", format="MBTiles")
+
+    src_ds = gdal.OpenEx(mbtiles_filename, gdal.OF_RASTER)
+    pmtiles_filename = str(tmp_vsimem / "test.pmtiles")
+    out_ds = gdal.VectorTranslate(pmtiles_filename, src_ds, format="PMTiles")
+    assert out_ds
+    assert out_ds.GetLayerCount() == 0
+    out_ds = None
+    src_ds = None
+
+    # Raster PMTiles are not opened by the driver
+    with pytest.raises(Exception, match="Tile type PNG not handled by the driver"):
+        gdal.OpenEx(pmtiles_filename, gdal.OF_VECTOR)
+
+    f = gdal.VSIFOpenL(f"/vsipmtiles/{pmtiles_filename}/pmtiles_header.json", "rb")
+    assert f
+    try:
+        data = gdal.VSIFReadL(1, 10000, f)
+    finally:
+        gdal.VSIFCloseL(f)
+    got = json.loads(data)
+    assert got["tile_type_str"] == "PNG"
+    assert got["tile_compression_str"] == "none"
+
+    src_ds_sqlite3 = gdal.OpenEx(mbtiles_filename, allowed_drivers=["SQLite"])
+    with src_ds_sqlite3.ExecuteSQL(
+        "SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles"
+    ) as lyr:
+        assert lyr.GetFeatureCount() > 0
+        for f in lyr:
+            z = f["zoom_level"]
+            x = f["tile_column"]
+            # MBTiles y=0 origin is bottom-most tile, whereas PMTiles is top-most
+            y = (1 << z) - 1 - f["tile_row"]
+            tile_data = f.GetFieldAsBinary("tile_data")
+            assert gdal.VSIStatL(
+                f"/vsipmtiles/{pmtiles_filename}/{z}/{x}/{y}.png"
+            ).size == len(tile_data)
+
+
+###############################################################################
+
+
 @pytest.mark.require_driver("MBTiles")
 # MBTiles vector writing mode requires SQLite and GEOS
 @pytest.mark.require_driver("SQLite")
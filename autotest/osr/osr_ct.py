@@ -32,6 +32,8 @@
 ###############################################################################
 
 import math
+import threading
+import time
 
 import gdaltest
 import pytest
@@ -547,6 +549,140 @@ def test_osr_ct_transformpointwitherrorcode():
     assert error_code == osr.PROJ_ERR_COORD_TRANSFM_OUTSIDE_PROJECTION_DOMAIN
 
 
+###############################################################################
+# Test ct.TransformPoints() and ct.TransformPointsWithErrorCodes() on arrays
+
+
+@pytest.mark.require_proj(8)
+def test_osr_ct_transformpoints_arrays():
+
+    np = pytest.importorskip("numpy")
+
+    s = osr.SpatialReference()
+    s.SetFromUserInput("+proj=longlat +ellps=GRS80")
+    t = osr.SpatialReference()
+    t.SetFromUserInput("+proj=tmerc +ellps=GRS80")
+    ct = osr.CoordinateTransformation(s, t)
+
+    x = np.array([1.0, 1.0, 90.0])
+    y = np.array([2.0, 2.0, 0.0])
+    z = np.array([3.0, 3.0, 0.0])
+    ret = ct.TransformPoints(x[:2], y[:2], z[:2])
+    assert ret is None
+    assert x[0] == pytest.approx(111257.80439304397, rel=1e-10)
+    assert y[0] == pytest.approx(221183.3401672801, rel=1e-10)
+    assert z[0] == 3
+    assert x[1] == x[0]
+
+    x = np.array([1.0, 90.0])
+    y = np.array([2.0, 0.0])
+    with osr.ExceptionMgr(useExceptions=False):
+        error_codes = ct.TransformPointsWithErrorCodes(x, y)
+    assert list(error_codes) == [
+        0,
+        osr.PROJ_ERR_COORD_TRANSFM_OUTSIDE_PROJECTION_DOMAIN,
+    ]
+    assert x[0] == pytest.approx(111257.80439304397, rel=1e-10)
+    assert math.isinf(x[1])
+
+    # Sequences of points are still returned as lists of tuples
+    assert ct.TransformPoints(np.array([[1.0, 2.0]]))[0][0] == pytest.approx(
+        111257.80439304397, rel=1e-10
+    )
+
+    with pytest.raises(Exception, match="same length"):
+        ct.TransformPoints(np.zeros(2), np.zeros(3))
+
+    with pytest.raises(TypeError):
+        ct.TransformPoints(np.zeros(2, dtype=np.float32), np.zeros(2))
+
+    with pytest.raises(TypeError):
+        ct.TransformPoints(np.zeros(4)[::2], np.zeros(2))
+
+
+###############################################################################
+# Test ct.TransformPointsWithErrorCodes() on arrays with several threads
+
+
+@pytest.mark.require_proj(8)
+@pytest.mark.parametrize("num_threads", [3, "ALL_CPUS"])
+def test_osr_ct_transformpoints_arrays_num_threads(num_threads):
+
+    np = pytest.importorskip("numpy")
+
+    s = osr.SpatialReference()
+    s.SetFromUserInput("+proj=longlat +ellps=GRS80")
+    t = osr.SpatialReference()
+    t.SetFromUserInput("+proj=tmerc +ellps=GRS80")
+    ct = osr.CoordinateTransformation(s, t)
+
+    count = 100000
+    x = np.linspace(-10, 10, count)
+    y = np.linspace(-40, 40, count)
+    x[count // 2] = 90
+    y[count // 2] = 0
+    expected_x = x.copy()
+    expected_y = y.copy()
+    with osr.ExceptionMgr(useExceptions=False):
+        expected_error_codes = ct.TransformPointsWithErrorCodes(expected_x, expected_y)
+        error_codes = ct.TransformPointsWithErrorCodes(x, y, num_threads=num_threads)
+
+    assert np.array_equal(x, expected_x)
+    assert np.array_equal(y, expected_y)
+    assert np.array_equal(error_codes, expected_error_codes)
+    assert np.count_nonzero(error_codes) == 1
+
+    with pytest.raises(ValueError):
+        ct.TransformPoints(x, y, num_threads=0)
+
+
+###############################################################################
+# Test that ct.TransformPoints() on arrays releases the GIL
+
+
+@pytest.mark.require_proj(8)
+@pytest.mark.parametrize("num_threads", [1, 3])
+def test_osr_ct_transformpoints_arrays_release_gil(num_threads):
+
+    np = pytest.importorskip("numpy")
+
+    s = osr.SpatialReference()
+    s.SetFromUserInput("+proj=longlat +ellps=GRS80")
+    t = osr.SpatialReference()
+    t.SetFromUserInput("+proj=tmerc +ellps=GRS80")
+    ct = osr.CoordinateTransformation(s, t)
+
+    count = 2000000
+    x = np.linspace(-10, 10, count)
+    y = np.linspace(-40, 40, count)
+
+    # A thread that needs the GIL every millisecond
+    ticks = [0]
+    stop = threading.Event()
+
+    def tick():
+        while not stop.is_set():
+            time.sleep(0.001)
+            ticks[0] += 1
+
+    thread = threading.Thread(target=tick)
+    thread.start()
+    try:
+        time.sleep(0.01)
+        start_ticks = ticks[0]
+        start_time = time.time()
+        ct.TransformPoints(x, y, num_threads=num_threads)
+        elapsed = time.time() - start_time
+        end_ticks = ticks[0]
+    finally:
+        stop.set()
+        thread.join()
+
+    if elapsed < 0.1:
+        pytest.skip("transformation too fast to be checked")
+    assert end_ticks - start_ticks > 5
+
+
 ###############################################################################
 # Test CoordinateTransformationOptions.SetDesiredAccuracy
 
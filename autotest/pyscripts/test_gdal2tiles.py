@@ -214,6 +214,279 @@ def test_gdal2tiles_py_resampling_option(script_path, tmp_path, resample):
     ds = None
 
 
+@pytest.mark.require_driver("PNG")
+@pytest.mark.parametrize(
+    "options",
+    [
+        "--overview-cache=1",
+        "--xyz --overview-cache=1",
+        "--processes=2",
+        "--processes=2 --overview-cache=1",
+        "--xyz -z 0-4 --processes=2 --overview-cache=1",
+        "--threads=2",
+        "--xyz -z 0-4 --threads=3 --overview-cache=1 --metatile=2",
+    ],
+)
+def test_gdal2tiles_py_depth_first(script_path, tmp_path, options):
+
+    input_tif = test_py_scripts.get_data_path("gdrivers") + "small_world.tif"
+    ref_dir = str(tmp_path / "ref")
+    out_dir = str(tmp_path / "out")
+    ref_options = "-z 0-4 " if "-z 0-4" in options else "-z 0-2 "
+    if "--xyz" in options:
+        ref_options += "--xyz "
+    if "-z" not in options:
+        options = ref_options + options
+
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal2tiles",
+        f"-q {ref_options} {input_tif} {ref_dir}",
+    )
+    # --overview-cache=1 is too small to hold all tiles, which tests the
+    # fallback to disk reads
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        f"-q {options} {input_tif} {out_dir}",
+    )
+
+    ref_tiles = sorted(
+        os.path.relpath(f, ref_dir)
+        for f in glob.glob(os.path.join(ref_dir, "*", "*", "*.png"))
+    )
+    out_tiles = sorted(
+        os.path.relpath(f, out_dir)
+        for f in glob.glob(os.path.join(out_dir, "*", "*", "*.png"))
+    )
+    assert ref_tiles
+    assert out_tiles == ref_tiles
+
+    for tile in ref_tiles:
+        ref_ds = gdal.Open(os.path.join(ref_dir, tile))
+        out_ds = gdal.Open(os.path.join(out_dir, tile))
+        assert [
+            out_ds.GetRasterBand(i + 1).Checksum() for i in range(out_ds.RasterCount)
+        ] == [
+            ref_ds.GetRasterBand(i + 1).Checksum() for i in range(ref_ds.RasterCount)
+        ], tile
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.parametrize("options", ["--metatile=2", "--xyz --metatile=3"])
+def test_gdal2tiles_py_metatile(script_path, tmp_path, options):
+
+    input_tif = test_py_scripts.get_data_path("gdrivers") + "small_world.tif"
+    ref_dir = str(tmp_path / "ref")
+    out_dir = str(tmp_path / "out")
+    ref_options = "--xyz" if "--xyz" in options else ""
+
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal2tiles",
+        f"-q -z 2-3 {ref_options} {input_tif} {ref_dir}",
+    )
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal2tiles",
+        f"-q -z 2-3 {options} {input_tif} {out_dir}",
+    )
+
+    ref_tiles = sorted(
+        os.path.relpath(f, ref_dir)
+        for f in glob.glob(os.path.join(ref_dir, "*", "*", "*.png"))
+    )
+    assert ref_tiles
+    for tile in ref_tiles:
+        ref_ds = gdal.Open(os.path.join(ref_dir, tile))
+        out_ds = gdal.Open(os.path.join(out_dir, tile))
+        assert out_ds, tile
+        assert [
+            out_ds.GetRasterBand(i + 1).Checksum() for i in range(out_ds.RasterCount)
+        ] == [
+            ref_ds.GetRasterBand(i + 1).Checksum() for i in range(ref_ds.RasterCount)
+        ], tile
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("MBTiles")
+@pytest.mark.parametrize("processes", [1, 2])
+def test_gdal2tiles_py_container_mbtiles(script_path, tmp_path, processes):
+
+    import sqlite3
+
+    input_tif = test_py_scripts.get_data_path("gdrivers") + "small_world.tif"
+    ref_dir = str(tmp_path / "ref")
+    out_filename = str(tmp_path / "out.mbtiles")
+
+    test_py_scripts.run_py_script(
+        script_path, "gdal2tiles", f"-q -z 0-2 {input_tif} {ref_dir}"
+    )
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        f"-q -z 0-2 --processes={processes} --container=MBTiles {input_tif} {out_filename}",
+    )
+
+    ref_tiles = glob.glob(os.path.join(ref_dir, "*", "*", "*.png"))
+    assert ref_tiles
+
+    conn = sqlite3.connect(out_filename)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] == len(
+            ref_tiles
+        )
+        for tile in ref_tiles:
+            # Both use the TMS numbering
+            z, x, y = os.path.splitext(os.path.relpath(tile, ref_dir))[0].split(os.sep)
+            tile_data = conn.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND "
+                "tile_column = ? AND tile_row = ?",
+                (int(z), int(x), int(y)),
+            ).fetchone()[0]
+            gdal.FileFromMemBuffer("/vsimem/tile.png", bytes(tile_data))
+            try:
+                out_ds = gdal.Open("/vsimem/tile.png")
+                ref_ds = gdal.Open(tile)
+                assert [
+                    out_ds.GetRasterBand(i + 1).Checksum()
+                    for i in range(out_ds.RasterCount)
+                ] == [
+                    ref_ds.GetRasterBand(i + 1).Checksum()
+                    for i in range(ref_ds.RasterCount)
+                ], tile
+                out_ds = None
+            finally:
+                gdal.Unlink("/vsimem/tile.png")
+    finally:
+        conn.close()
+
+    ds = gdal.Open(out_filename)
+    assert ds.GetDriver().ShortName == "MBTiles"
+    assert ds.GetMetadataItem("maxzoom") == "2"
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("GPKG")
+def test_gdal2tiles_py_container_gpkg(script_path, tmp_path):
+
+    input_tif = test_py_scripts.get_data_path("gdrivers") + "small_world.tif"
+    ref_dir = str(tmp_path / "ref")
+    out_filename = str(tmp_path / "out.gpkg")
+
+    test_py_scripts.run_py_script(
+        script_path, "gdal2tiles", f"-q --xyz -z 0-2 {input_tif} {ref_dir}"
+    )
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal2tiles",
+        f"-q -z 0-2 --container=GPKG {input_tif} {out_filename}",
+    )
+
+    ds = gdal.Open(out_filename)
+    assert ds.GetDriver().ShortName == "GPKG"
+    assert ds.RasterXSize == 256 * 4
+    assert ds.GetRasterBand(1).GetOverviewCount() == 2
+
+    ref_ds = gdal.Open(f"{ref_dir}/2/1/1.png")
+    assert ds.ReadRaster(256, 256, 256, 256) == ref_ds.ReadRaster()
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("MBTiles")
+@pytest.mark.require_driver("PMTiles")
+def test_gdal2tiles_py_container_pmtiles(script_path, tmp_path):
+
+    input_tif = test_py_scripts.get_data_path("gdrivers") + "small_world.tif"
+    ref_dir = str(tmp_path / "ref")
+    out_filename = str(tmp_path / "out.pmtiles")
+
+    test_py_scripts.run_py_script(
+        script_path, "gdal2tiles", f"-q --xyz -z 0-1 {input_tif} {ref_dir}"
+    )
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal2tiles",
+        f"-q -z 0-1 --container=PMTiles {input_tif} {out_filename}",
+    )
+
+    assert not os.path.exists(out_filename + ".tmp.mbtiles")
+    for tile in ("0/0/0.png", "1/0/0.png", "1/1/1.png"):
+        assert gdal.VSIStatL(f"/vsipmtiles/{out_filename}/{tile}").size == (
+            os.stat(f"{ref_dir}/{tile}").st_size
+        ), tile
+
+
+def _create_uniform_world_mercator(filename):
+
+    ds = gdal.GetDriverByName("GTiff").Create(filename, 1024, 1024, 1)
+    ds.SetGeoTransform(
+        [-20037508.342789244, 39135.758482, 0, 20037508.342789244, 0, -39135.758482]
+    )
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(3857)
+    ds.SetSpatialRef(srs)
+    ds.GetRasterBand(1).Fill(128)
+    ds = None
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.parametrize("processes", [1, 2])
+def test_gdal2tiles_py_dedup(script_path, tmp_path, processes):
+
+    input_tif = str(tmp_path / "uniform.tif")
+    _create_uniform_world_mercator(input_tif)
+    out_dir = str(tmp_path / "out")
+
+    test_py_scripts.run_py_script_as_external_script(
+        script_path,
+        "gdal2tiles",
+        f"-q -z 0-2 -r near --dedup --processes={processes} {input_tif} {out_dir}",
+    )
+
+    tiles = glob.glob(os.path.join(out_dir, "*", "*", "*.png"))
+    assert len(tiles) == 1 + 4 + 16
+    for tile in tiles:
+        ds = gdal.Open(tile)
+        assert [ds.GetRasterBand(i + 1).ComputeRasterMinMax() for i in range(2)] == [
+            (128, 128),
+            (255, 255),
+        ], tile
+
+    # Tiles are links to one encoded tile per process (the main process
+    # generates the lowest zoom levels when using several processes)
+    assert len(set(os.stat(tile).st_ino for tile in tiles)) <= (
+        1 if processes == 1 else processes + 1
+    )
+
+
+@pytest.mark.require_driver("PNG")
+@pytest.mark.require_driver("MBTiles")
+def test_gdal2tiles_py_dedup_mbtiles(script_path, tmp_path):
+
+    import sqlite3
+
+    input_tif = str(tmp_path / "uniform.tif")
+    _create_uniform_world_mercator(input_tif)
+    out_filename = str(tmp_path / "out.mbtiles")
+
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal2tiles",
+        f"-q -z 0-2 -r near --dedup --container=MBTiles {input_tif} {out_filename}",
+    )
+
+    conn = sqlite3.connect(out_filename)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM images").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] == 1 + 4 + 16
+    finally:
+        conn.close()
+
+    ds = gdal.Open(out_filename)
+    assert ds.GetRasterBand(1).ComputeRasterMinMax() == (128, 128)
+
+
 @pytest.mark.require_driver("PNG")
 def test_gdal2tiles_py_xyz(script_path, tmp_path):
 
@@ -191,3 +191,110 @@ def test_gdal2xyz_py_srcnodata_dstnodata(script_path, tmp_path):
         l = f.readline()
 
     assert l.startswith(b"-44.838604 -22.9343 1 2 3")
+
+
+###############################################################################
+# Test -srcwin and skip against the raster values, over several blocks
+
+
+@pytest.mark.parametrize("skip", [1, 3, (2, 5)])
+def test_gdal2xyz_py_blocks(tmp_path, monkeypatch, skip):
+
+    monkeypatch.setattr(gdal2xyz, "BLOCK_PIXELS", 100)
+
+    out_xyz = str(tmp_path / "out.xyz")
+    src_ds = gdal.Open(test_py_scripts.get_data_path("gcore") + "byte.tif")
+    srcwin = (2, 3, 15, 16)
+
+    gdal2xyz.gdal2xyz(src_ds, out_xyz, srcwin=srcwin, skip=skip, progress_callback=None)
+
+    x_skip, y_skip = skip if isinstance(skip, tuple) else (skip, skip)
+    x_off, y_off, x_size, y_size = srcwin
+    gt = src_ds.GetGeoTransform()
+    data = src_ds.GetRasterBand(1).ReadAsArray()
+    expected = []
+    for y in range(y_off, y_off + y_size, y_skip):
+        for x in range(x_off, x_off + x_size, x_skip):
+            expected.append(
+                "%.3f %.3f %g"
+                % (gt[0] + (x + 0.5) * gt[1], gt[3] + (y + 0.5) * gt[5], data[y, x])
+            )
+
+    with open(out_xyz) as f:
+        assert f.read().splitlines() == expected
+
+
+###############################################################################
+# Test Parquet and Arrow output
+
+
+@pytest.mark.parametrize("ext", ["parquet", "arrow"])
+def test_gdal2xyz_py_arrow(script_path, tmp_path, ext):
+
+    pa_ipc = pytest.importorskip("pyarrow.ipc")
+    pa_parquet = pytest.importorskip("pyarrow.parquet")
+
+    out_filename = str(tmp_path / f"out.{ext}")
+
+    arguments = "-allbands -srcnodata 0 0 0 -skipnodata"
+    arguments += " " + test_py_scripts.get_data_path("gcore") + "rgbsmall.tif "
+    arguments += out_filename
+
+    test_py_scripts.run_py_script(script_path, "gdal2xyz", arguments)
+
+    if ext == "parquet":
+        table = pa_parquet.read_table(out_filename)
+    else:
+        table = pa_ipc.open_file(out_filename).read_all()
+
+    assert table.column_names == ["x", "y", "band_1", "band_2", "band_3"]
+
+    geo_x, geo_y, data, _ = gdal2xyz.gdal2xyz(
+        test_py_scripts.get_data_path("gcore") + "rgbsmall.tif",
+        band_nums=None,
+        src_nodata=0,
+        skip_nodata=True,
+        return_np_arrays=True,
+        progress_callback=None,
+    )
+    assert table.num_rows == len(geo_x)
+    assert np.array_equal(table.column("x").to_numpy(), geo_x)
+    assert np.array_equal(table.column("y").to_numpy(), geo_y)
+    for i in range(3):
+        assert np.array_equal(table.column(f"band_{i + 1}").to_numpy(), data[i])
+
+
+###############################################################################
+# Test streaming the points one block at a time
+
+
+@pytest.mark.parametrize("skip_nodata", [True, False])
+def test_gdal2xyz_py_blocks_generator(monkeypatch, skip_nodata):
+
+    monkeypatch.setattr(gdal2xyz, "BLOCK_PIXELS", 100)
+
+    src_filename = test_py_scripts.get_data_path("gcore") + "rgbsmall.tif"
+    kwargs = dict(
+        band_nums=None,
+        skip=(1, 2),
+        src_nodata=0,
+        dst_nodata=255,
+        skip_nodata=skip_nodata,
+    )
+
+    blocks = list(gdal2xyz.gdal2xyz_blocks(src_filename, **kwargs))
+    assert len(blocks) > 1
+
+    for pre_allocate_np_arrays in (True, False):
+        geo_x, geo_y, data, nodata = gdal2xyz.gdal2xyz(
+            src_filename,
+            return_np_arrays=True,
+            pre_allocate_np_arrays=pre_allocate_np_arrays,
+            progress_callback=None,
+            **kwargs,
+        )
+        assert np.array_equal(np.concatenate([b[0] for b in blocks]), geo_x)
+        assert np.array_equal(np.concatenate([b[1] for b in blocks]), geo_y)
+        assert np.array_equal(np.concatenate([b[2] for b in blocks], axis=1), data)
+        for block in blocks:
+            assert np.array_equal(block[3], nodata)
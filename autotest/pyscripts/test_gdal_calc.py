@@ -615,3 +615,290 @@ def test_gdal_calc_py_multiple_inputs_same_alpha(script_path, tmp_path):
     ds = None
 
     assert cs == cs_ref
+
+
+@pytest.mark.parametrize(
+    "calc,out_type",
+    [
+        ("A+B", None),
+        ("(A.astype(numpy.float32)+B)/2", "Float32"),
+        ("A*(A>100)-B//3+sqrt(C)", "Float64"),
+        ("logical_and(A>100,A<150)*B", None),
+        ("numpy.where(A>B,A,B)", None),
+    ],
+)
+def test_gdal_calc_py_evaluator_numpy(tmp_path, stefan_full_rgba, calc, out_type):
+    """test the numpy evaluator against eval()"""
+
+    def calc_checksum(evaluator):
+        ds = gdal_calc.Calc(
+            calc=calc,
+            A=stefan_full_rgba,
+            B=stefan_full_rgba,
+            B_band=2,
+            C=stefan_full_rgba,
+            C_band=3,
+            type=out_type,
+            outfile=str(tmp_path / f"{evaluator}.tif"),
+            evaluator=evaluator,
+            quiet=True,
+        )
+        return ds.GetRasterBand(1).Checksum()
+
+    assert calc_checksum("numpy") == calc_checksum("eval")
+
+
+def test_gdal_calc_py_evaluator_numpy_single_evaluation(tmp_path):
+    """test that the numpy evaluator evaluates scalar sub-expressions once"""
+
+    calls = {"eval": 0, "numpy": 0}
+
+    def calc_checksum(evaluator):
+        def scale():
+            calls[evaluator] += 1
+            return 2
+
+        ds = gdal_calc.Calc(
+            calc="A*(scale()+1)",
+            A="../gcore/data/byte.tif",
+            type="UInt16",
+            outfile=str(tmp_path / f"{evaluator}.tif"),
+            evaluator=evaluator,
+            user_namespace={"scale": scale},
+            quiet=True,
+        )
+        return ds.GetRasterBand(1).Checksum()
+
+    assert calc_checksum("numpy") == calc_checksum("eval")
+    assert calls["numpy"] == calls["eval"]
+
+
+def test_gdal_calc_py_evaluator_numexpr(script_path, tmp_path, stefan_full_rgba):
+    """test --evaluator=numexpr"""
+
+    pytest.importorskip("numexpr")
+
+    infile = stefan_full_rgba
+    out = make_temp_filename_list(tmp_path, "evaluator_numexpr", 2)
+
+    # numexpr upcasts Byte operands, so use a Float32 output type to
+    # compare with the numpy evaluator
+    for i, evaluator in enumerate(("numexpr", "numpy")):
+        test_py_scripts.run_py_script(
+            script_path,
+            "gdal_calc",
+            f"-A {infile} --A_band=1 -B {infile} --B_band=2 "
+            f'--calc="(A*2.0+B)/3" --type=Float32 --evaluator={evaluator} '
+            f"--overwrite --outfile {out[i]}",
+        )
+
+    ds = gdal.Open(out[1])
+    check_file(out[0], ds.GetRasterBand(1).Checksum())
+
+
+@pytest.mark.parametrize("evaluator", ["eval", "numpy"])
+def test_gdal_calc_py_threads(script_path, tmp_path, stefan_full_rgba, evaluator):
+    """test --threads"""
+
+    infile = str(tmp_path / "tiled.tif")
+    # small blocks, so that there are many of them to dispatch
+    gdal.Translate(infile, stefan_full_rgba, creationOptions=["BLOCKYSIZE=4"])
+    out = make_temp_filename_list(tmp_path, "threads", 2)
+
+    for i, threads in enumerate((1, 3)):
+        test_py_scripts.run_py_script(
+            script_path,
+            "gdal_calc",
+            f"-A {infile} -B {infile} --B_band=2 --allBands=A "
+            f'--calc="A*(A>100)+B//2" --NoDataValue=0 --evaluator={evaluator} '
+            f"--threads={threads} --overwrite --outfile {out[i]}",
+        )
+
+    ds_ref = gdal.Open(out[0])
+    ds = gdal.Open(out[1])
+    assert ds.RasterCount == 4
+    for i in range(4):
+        assert (
+            ds.GetRasterBand(i + 1).Checksum() == ds_ref.GetRasterBand(i + 1).Checksum()
+        )
+
+
+def test_gdal_calc_py_threads_progress(tmp_path, stefan_full_rgba):
+    """test that --threads does not change the reported progress"""
+
+    infile = str(tmp_path / "tiled.tif")
+    gdal.Translate(infile, stefan_full_rgba, creationOptions=["BLOCKYSIZE=4"])
+
+    def get_progress(threads):
+        values = []
+
+        def progress(pct, msg, user_data):
+            values.append(pct)
+            return 1
+
+        gdal_calc.Calc(
+            calc="A+1",
+            A=infile,
+            outfile=str(tmp_path / f"out_{threads}.tif"),
+            threads=threads,
+            progress_callback=progress,
+        )
+        return values
+
+    values = get_progress(1)
+    assert len(values) > 2
+    assert values == sorted(values)
+    assert values[-1] == 1.0
+    assert get_progress(3) == values
+
+
+def test_gdal_calc_py_threads_dataset_input(stefan_full_rgba):
+    """test threads with an input Dataset that cannot be reopened"""
+
+    src_ds = gdal.Translate("", stefan_full_rgba, format="MEM")
+
+    def calc(threads):
+        return gdal_calc.Calc(
+            calc="A+B",
+            A=src_ds,
+            B=stefan_full_rgba,
+            B_band=2,
+            format="MEM",
+            threads=threads,
+            quiet=True,
+        )
+
+    assert calc(4).GetRasterBand(1).Checksum() == calc(1).GetRasterBand(1).Checksum()
+
+
+def test_gdal_calc_py_get_window_size():
+
+    MB = 1024 * 1024
+
+    # striped input and tiled output: whole rows of output tiles
+    assert gdal_calc.get_window_size(
+        (10000, 10000), [(10000, 1), (256, 256)], 3, 64 * MB
+    ) == (10000, 2048)
+
+    # limited by memory
+    assert gdal_calc.get_window_size(
+        (10000, 10000), [(256, 256), (256, 256)], 3, 1 * MB
+    ) == (256 * 5, 256)
+
+    # enough windows for 4 threads
+    assert gdal_calc.get_window_size(
+        (10000, 10000), [(256, 256), (512, 512)], 3, 64 * MB, min_window_count=16
+    ) == (10000, 512)
+
+    # blocks that do not match: aligned on the output blocks
+    assert gdal_calc.get_window_size(
+        (100000, 100000), [(512, 512), (100000, 1)], 8, 64 * MB
+    ) == (100000, 83)
+
+
+def test_gdal_calc_py_max_window_memory(script_path, tmp_path, stefan_full_rgba):
+    """test --max-window-memory"""
+
+    infile = str(tmp_path / "tiled.tif")
+    gdal.Translate(
+        infile,
+        stefan_full_rgba,
+        outputType=gdal.GDT_Float64,
+        creationOptions=["TILED=YES", "BLOCKXSIZE=16", "BLOCKYSIZE=16"],
+    )
+    out = make_temp_filename_list(tmp_path, "max_window_memory", 2)
+
+    for i, max_window_memory in enumerate((1, 64)):
+        test_py_scripts.run_py_script(
+            script_path,
+            "gdal_calc",
+            f"-A {infile} --calc=A*2 --max-window-memory={max_window_memory} "
+            f"--co TILED=YES --co BLOCKXSIZE=32 --co BLOCKYSIZE=32 "
+            f"--overwrite --outfile {out[i]}",
+        )
+
+    ds = gdal.Open(out[1])
+    check_file(out[0], ds.GetRasterBand(1).Checksum())
+
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_gdal_calc_py_extent_union(tmp_path, threads):
+    """test --extent=union with in-memory aligned VRTs"""
+
+    src_ds = gdal.Open(test_py_scripts.get_data_path("gcore") + "byte.tif")
+    gt = src_ds.GetGeoTransform()
+    shifted = str(tmp_path / "shifted.tif")
+    shifted_ds = gdal.GetDriverByName("GTiff").CreateCopy(shifted, src_ds)
+    shifted_ds.SetGeoTransform([gt[0] + 10 * gt[1]] + list(gt[1:]))
+    shifted_ds = None
+
+    vsimem_files_before = gdal.ReadDir("/vsimem/") or []
+
+    ds = gdal_calc.Calc(
+        calc="A+B",
+        A=test_py_scripts.get_data_path("gcore") + "byte.tif",
+        B=shifted,
+        C=shifted,
+        type="UInt16",
+        extent="union",
+        format="MEM",
+        threads=threads,
+        quiet=True,
+    )
+    assert ds.RasterXSize == src_ds.RasterXSize + 10
+    assert ds.GetGeoTransform() == gt
+
+    # in the overlapping part, both inputs are summed
+    expected = src_ds.ReadAsArray(10, 0, 10, 20).astype(np.uint16) + src_ds.ReadAsArray(
+        0, 0, 10, 20
+    )
+    assert (ds.ReadAsArray(10, 0, 10, 20) == expected).all()
+
+    # no temporary file left
+    assert (gdal.ReadDir("/vsimem/") or []) == vsimem_files_before
+
+
+@pytest.mark.parametrize("evaluator", ["eval", "numpy"])
+def test_gdal_calc_py_nodata_mask(tmp_path, evaluator):
+    """test nodata propagation and the nodata_mask name"""
+
+    infile = str(tmp_path / "in.tif")
+    ds = gdal.GetDriverByName("GTiff").Create(infile, 4, 2, 1, gdal.GDT_Int16)
+    ds.GetRasterBand(1).SetNoDataValue(-1)
+    ds.GetRasterBand(1).WriteArray(np.array([[-1, 1, 2, 3], [4, 5, -1, 300]]))
+    ds = None
+
+    # nodata propagation
+    ds = gdal_calc.Calc(
+        calc="A*2",
+        A=infile,
+        type="Byte",
+        NoDataValue=0,
+        format="MEM",
+        evaluator=evaluator,
+        quiet=True,
+    )
+    assert ds.ReadAsArray().tolist() == [[0, 2, 4, 6], [8, 10, 0, 255]]
+
+    # output nodata value out of the range of the output data type
+    ds = gdal_calc.Calc(
+        calc="A>2",
+        A=infile,
+        type="Byte",
+        NoDataValue=-1,
+        format="MEM",
+        evaluator=evaluator,
+        quiet=True,
+    )
+    assert ds.ReadAsArray().tolist() == [[0, 0, 0, 1], [1, 1, 0, 1]]
+
+    # nodata_mask in the expression
+    ds = gdal_calc.Calc(
+        calc="where(nodata_mask, 7, A)",
+        A=infile,
+        NoDataValue="none",
+        format="MEM",
+        evaluator=evaluator,
+        quiet=True,
+    )
+    assert ds.ReadAsArray().tolist() == [[7, 1, 2, 3], [4, 5, 7, 300]]
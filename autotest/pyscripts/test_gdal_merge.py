@@ -276,3 +276,153 @@ def test_gdal_merge_5(script_path, tmp_path):
         assert ds.GetRasterBand(2).Checksum() == cs, "Wrong checksum"
         assert ds.GetRasterBand(3).Checksum() == 0, "Wrong checksum"
         assert ds.GetRasterBand(4).Checksum() == cs, "Wrong checksum"
+
+
+###############################################################################
+# Test -max_memory option: copying in small chunks must not change the result
+
+
+@pytest.mark.parametrize(
+    "options", ["", "-n 0", "-ps 0.07 0.07", "-n 63 -ps 0.13 0.13"]
+)
+def test_gdal_merge_max_memory(script_path, tmp_path, sample_tifs, options):
+    if options:
+        pytest.importorskip("numpy")
+
+    ref_tif = str(tmp_path / "ref.tif")
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal_merge",
+        f"-q {options} -o {ref_tif} {' '.join(sample_tifs)}",
+    )
+
+    output_tif = str(tmp_path / "test_gdal_merge_max_memory.tif")
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal_merge",
+        f"-q {options} -max_memory 0.0001 -co TILED=YES -co BLOCKXSIZE=16 -co BLOCKYSIZE=16 -o {output_tif} {' '.join(sample_tifs)}",
+    )
+
+    with gdal.Open(ref_tif) as ref_ds, gdal.Open(output_tif) as ds:
+        assert ds.RasterXSize == ref_ds.RasterXSize
+        assert ds.RasterYSize == ref_ds.RasterYSize
+        assert (
+            ds.GetRasterBand(1).Checksum() == ref_ds.GetRasterBand(1).Checksum()
+        ), "Wrong checksum"
+
+
+###############################################################################
+# Test -threads and -single_pass options: filling tiles in parallel or
+# compositing all sources at once must not change the result
+
+
+@pytest.mark.parametrize(
+    "options",
+    ["", "-n 0", "-separate", "-ps 0.07 0.07", "-n 63 -ps 0.13 0.13 -init 10"],
+)
+@pytest.mark.parametrize(
+    "mode", ["-threads 3", "-single_pass", "-single_pass -threads 3"]
+)
+def test_gdal_merge_threads(script_path, tmp_path, sample_tifs, options, mode):
+    if "-n" in options or "-single_pass" in mode:
+        pytest.importorskip("numpy")
+
+    # Reverse the order of the inputs so that overlapping files matter
+    inputs = " ".join(reversed(sample_tifs))
+
+    ref_tif = str(tmp_path / "ref.tif")
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal_merge",
+        f"-q {options} -o {ref_tif} {inputs}",
+    )
+
+    output_tif = str(tmp_path / "test_gdal_merge_threads.tif")
+    test_py_scripts.run_py_script(
+        script_path,
+        "gdal_merge",
+        f"-q {options} {mode} -max_memory 0.001 -co TILED=YES -co BLOCKXSIZE=16 -co BLOCKYSIZE=16 -o {output_tif} {inputs}",
+    )
+
+    with gdal.Open(ref_tif) as ref_ds, gdal.Open(output_tif) as ds:
+        assert ds.RasterXSize == ref_ds.RasterXSize
+        assert ds.RasterYSize == ref_ds.RasterYSize
+        assert ds.RasterCount == ref_ds.RasterCount
+        for i in range(ds.RasterCount):
+            assert (
+                ds.GetRasterBand(i + 1).Checksum()
+                == ref_ds.GetRasterBand(i + 1).Checksum()
+            ), "Wrong checksum"
+
+
+###############################################################################
+# Test -threads with more input files than each thread keeps open
+
+
+@pytest.mark.parametrize("mode", ["-threads 3", "-single_pass -threads 3"])
+def test_gdal_merge_threads_source_cache(tmp_path, sample_tifs, monkeypatch, mode):
+    gdal_merge = pytest.importorskip("osgeo_utils.gdal_merge")
+    if "-single_pass" in mode:
+        pytest.importorskip("numpy")
+
+    inputs = list(reversed(sample_tifs))
+
+    ref_tif = str(tmp_path / "ref.tif")
+    gdal_merge.gdal_merge(["", "-q", "-o", ref_tif] + inputs)
+
+    monkeypatch.setattr(gdal_merge, "SOURCE_CACHE_SIZE", 1)
+    output_tif = str(tmp_path / "test_gdal_merge_threads_source_cache.tif")
+    gdal_merge.gdal_merge(
+        ["", "-q"]
+        + mode.split(" ")
+        + ["-max_memory", "0.001", "-co", "TILED=YES"]
+        + ["-co", "BLOCKXSIZE=16", "-co", "BLOCKYSIZE=16", "-o", output_tif]
+        + inputs
+    )
+
+    with gdal.Open(ref_tif) as ref_ds, gdal.Open(output_tif) as ds:
+        assert (
+            ds.GetRasterBand(1).Checksum() == ref_ds.GetRasterBand(1).Checksum()
+        ), "Wrong checksum"
+
+
+###############################################################################
+# Test that -n takes precedence over the nodata value of the sources, with and
+# without -single_pass
+
+
+def test_gdal_merge_single_pass_nodata_precedence(script_path, tmp_path):
+    np = pytest.importorskip("numpy")
+
+    drv = gdal.GetDriverByName("GTiff")
+    inputs = []
+    for i, (data, src_nodata) in enumerate(
+        [
+            # left half 0, right half 5
+            (np.repeat([[0] * 5 + [5] * 5], 10, axis=0), 5),
+            # top half 7, bottom half 0
+            (np.repeat([[7] * 10, [0] * 10], 5, axis=0), 7),
+        ]
+    ):
+        filename = str(tmp_path / f"in{i}.tif")
+        with drv.Create(filename, 10, 10, 1) as ds:
+            ds.SetGeoTransform([2, 0.1, 0, 49, 0, -0.1])
+            ds.GetRasterBand(1).SetNoDataValue(src_nodata)
+            ds.GetRasterBand(1).WriteArray(data)
+        inputs.append(filename)
+
+    results = []
+    for mode in ("", "-single_pass", "-single_pass -threads 2"):
+        output_tif = str(tmp_path / f"out{len(results)}.tif")
+        test_py_scripts.run_py_script(
+            script_path,
+            "gdal_merge",
+            f"-q -n 0 {mode} -o {output_tif} {' '.join(inputs)}",
+        )
+        with gdal.Open(output_tif) as ds:
+            results.append(ds.GetRasterBand(1).ReadAsArray())
+
+    # Only pixels at 0 are skipped: the top half is 7, the bottom right 5
+    assert results[0].sum() == 50 * 7 + 25 * 5
+    np.testing.assert_array_equal(results[1], results[0])
+    np.testing.assert_array_equal(results[2], results[0])
@@ -29,6 +29,7 @@
 ###############################################################################
 
 import os
+import sys
 
 import pytest
 import test_py_scripts
@@ -438,3 +439,149 @@ def test_gdal_retile_png(script_path, tmp_path):
         assert ds.GetRasterBand(1).Checksum() == 4672
 
     assert os.path.exists(out_dir / "byte_1_1.png.aux.xml")
+
+
+###############################################################################
+# Test the least recently used cache of source tiles
+
+
+def test_gdal_retile_dataset_cache(tmp_path):
+
+    from osgeo_utils import gdal_retile
+
+    names = []
+    for i in range(3):
+        name = str(tmp_path / f"in{i}.tif")
+        gdal.GetDriverByName("GTiff").Create(name, 1, 1)
+        names.append(name)
+
+    cache = gdal_retile.DataSetCache(cacheSize=2)
+    ds0 = cache.get(names[0])
+    cache.get(names[1])
+    # Refreshes names[0], so that names[1] is evicted instead
+    assert cache.get(names[0]) is ds0
+    cache.get(names[2])
+    assert list(cache.dict.keys()) == [names[0], names[2]]
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 3, 1)
+
+    cache = gdal_retile.DataSetCache(cacheSize=8, maxOpenFiles=2)
+    for name in names:
+        cache.get(name)
+    assert list(cache.dict.keys()) == names[1:]
+    assert cache.openFiles == 2
+
+
+###############################################################################
+# Test -maxOpenDatasets and -maxOpenFiles
+
+
+def test_gdal_retile_max_open_datasets(script_path, tmp_path):
+
+    out_dir = tmp_path / "outretile_cache"
+    out_dir.mkdir()
+
+    ret = test_py_scripts.run_py_script(
+        script_path,
+        "gdal_retile",
+        f"-v -levels 2 -ps 8 8 -maxOpenDatasets 1 -maxOpenFiles 1 -targetDir {out_dir} "
+        + test_py_scripts.get_data_path("gcore")
+        + "byte.tif",
+    )
+    assert "Dataset cache:" in ret
+
+    with gdal.Open(f"{out_dir}/byte_1_1.tif") as ds:
+        assert ds.RasterXSize == 8
+    with gdal.Open(f"{out_dir}/2/byte_1_1.tif") as ds:
+        assert ds.RasterXSize == 5
+
+
+###############################################################################
+# Return the checksums of the tiles generated in a directory
+
+
+def _get_tile_checksums(out_dir):
+    checksums = {}
+    for root, _, filenames in os.walk(out_dir):
+        for filename in filenames:
+            if filename.endswith(".tif"):
+                path = os.path.join(root, filename)
+                with gdal.Open(path) as ds:
+                    checksums[os.path.relpath(path, out_dir)] = [
+                        ds.GetRasterBand(i + 1).Checksum()
+                        for i in range(ds.RasterCount)
+                    ]
+    return checksums
+
+
+###############################################################################
+# Test -threads and -processes
+
+
+@pytest.mark.parametrize("option", ["-threads 3", "-processes 2"])
+def test_gdal_retile_concurrent(script_path, tmp_path, option):
+
+    if option.startswith("-processes") and sys.platform == "win32":
+        pytest.skip("-processes is not supported on Windows")
+
+    results = []
+    for name, extra_option in (("serial", ""), ("concurrent", option)):
+        out_dir = tmp_path / name
+        out_dir.mkdir()
+
+        test_py_scripts.run_py_script(
+            script_path,
+            "gdal_retile",
+            f"-q -levels 2 -ps 7 6 -tileIndex index.shp -csv index.csv {extra_option} -targetDir {out_dir} "
+            + test_py_scripts.get_data_path("gcore")
+            + "byte.tif",
+        )
+
+        with open(out_dir / "index.csv") as f:
+            results.append((_get_tile_checksums(out_dir), f.read()))
+
+    assert len(results[0][0]) == 3 * 4 + 2 * 2 + 1
+    assert results[0] == results[1]
+
+
+###############################################################################
+# Test -useVRT with input having gaps and overlaps
+
+
+@pytest.mark.parametrize("option", ["-useVRT", "-useVRT -threads 2"])
+def test_gdal_retile_use_vrt(script_path, tmp_path, option):
+
+    drv = gdal.GetDriverByName("GTiff")
+    srs = osr.SpatialReference()
+    srs.SetWellKnownGeogCS("WGS84")
+    wkt = srs.ExportToWkt()
+
+    inputs = []
+    for i, (ulx, uly, value) in enumerate(
+        [(0, 15, 1), (15, 30, 21), (15, 15, 42), (10, 20, 63)]
+    ):
+        in_tif = str(tmp_path / f"in{i}.tif")
+        with drv.Create(in_tif, 50, 50, 1) as ds:
+            ds.SetProjection(wkt)
+            ds.SetGeoTransform([ulx, 0.3, 0, uly, 0, -0.3])
+            ds.GetRasterBand(1).SetNoDataValue(0)
+            ds.GetRasterBand(1).Fill(value)
+            ds.GetRasterBand(1).WriteRaster(0, 0, 5, 5, b"\x07" * 25)
+        inputs.append(in_tif)
+
+    results = []
+    for name, extra_option in (("ref", ""), ("vrt", option)):
+        out_dir = tmp_path / name
+        out_dir.mkdir()
+
+        test_py_scripts.run_py_script(
+            script_path,
+            "gdal_retile",
+            f"-q -levels 2 -r bilinear -ps 16 16 -csv index.csv {extra_option} -targetDir {out_dir} {' '.join(inputs)}",
+        )
+
+        with open(out_dir / "index.csv") as f:
+            results.append((_get_tile_checksums(out_dir), f.read()))
+
+    # Tiles in the gaps of the input are not generated
+    assert len(results[0][0]) < 7 * 7 + 4 * 4 + 2 * 2
+    assert results[0] == results[1]
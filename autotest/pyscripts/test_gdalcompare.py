@@ -148,6 +148,48 @@ def test_gdalcompare_different_pixel_content(
 ###############################################################################
 
 
+@pytest.mark.parametrize("block_pixels", [None, 50])
+def test_gdalcompare_image_pixels_histogram(
+    tmp_vsimem, captured_print, source_filename, monkeypatch, block_pixels
+):
+
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("osgeo.gdal_array")
+
+    if block_pixels:
+        monkeypatch.setattr(gdalcompare, "BLOCK_PIXELS", block_pixels)
+
+    golden_ds = gdal.Open(source_filename)
+    golden_data = golden_ds.GetRasterBand(1).ReadAsArray().astype(np.float64)
+    new_data = golden_data.copy()
+    new_data[::3, ::2] += 5
+    new_data[5, 7] -= 300
+
+    new_ds = gdal.GetDriverByName("MEM").Create(
+        "", golden_ds.RasterXSize, golden_ds.RasterYSize, 1, gdal.GDT_Float32
+    )
+    new_ds.GetRasterBand(1).WriteArray(new_data)
+
+    prefix = str(tmp_vsimem / "")
+    diff_count, max_diff, histogram = gdalcompare.compare_image_pixels(
+        golden_ds.GetRasterBand(1),
+        new_ds.GetRasterBand(1),
+        "1",
+        ["DIFF_HISTOGRAM", "DUMP_DIFFS", "DUMP_DIFFS_PREFIX=" + prefix],
+    )
+
+    diff = golden_data - new_data
+    assert diff_count == np.count_nonzero(diff)
+    assert max_diff == 300
+    assert histogram == {3: np.count_nonzero(diff) - 1, 9: 1}
+
+    ds = gdal.Open(prefix + "1.tif")
+    assert np.array_equal(ds.GetRasterBand(1).ReadAsArray(), diff)
+
+
+###############################################################################
+
+
 def test_gdalcompare_different_band_count(tmp_vsimem, captured_print, source_filename):
 
     golden_filename = source_filename
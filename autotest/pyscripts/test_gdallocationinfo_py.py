@@ -218,3 +218,44 @@ def test_gdallocationinfo_py_7(tmp_path):
                 outputs = list(zip(x, y, pixels, lines, *results))
                 print(f"ovr: {ovr_idx}, srs: {srs}, x/y/pixel/line/result: {outputs}")
             assert_allclose(expected, actual, rtol=1e-4, atol=1e-3)
+
+
+@pytest.mark.parametrize(
+    "resample_alg",
+    [gdal.GRIORA_NearestNeighbour, gdal.GRIORA_Bilinear, gdal.GRIORA_Cubic],
+)
+def test_gdallocationinfo_py_sample_points_by_block(tmp_vsimem, resample_alg):
+    """Test that block-grouped sampling matches per point RasterIO() sampling"""
+
+    filename = str(tmp_vsimem / "tiled.tif")
+    src_ds = gdal.GetDriverByName("MEM").Create("", 50, 40, 2, gdal.GDT_Float32)
+    np.random.seed(0)
+    for i in range(2):
+        src_ds.GetRasterBand(i + 1).WriteArray(
+            (np.random.random_sample((40, 50)) * 100).astype(np.float32)
+        )
+    ds = gdal.GetDriverByName("GTiff").CreateCopy(
+        filename, src_ds, options=["TILED=YES", "BLOCKXSIZE=16", "BLOCKYSIZE=16"]
+    )
+    bands = [ds.GetRasterBand(1), ds.GetRasterBand(2)]
+
+    # interpolated values near the raster edges depend on the edge handling
+    margin = 0 if resample_alg == gdal.GRIORA_NearestNeighbour else 2
+    pixels = np.random.uniform(margin, 50 - margin, 500)
+    lines = np.random.uniform(margin, 40 - margin, 500)
+
+    expected = np.zeros((2, 500), dtype=np.float32)
+    gdallocationinfo.sample_points(bands, pixels, lines, expected, resample_alg)
+
+    for dataset in (ds, None):
+        actual = np.zeros((2, 500), dtype=np.float32)
+        gdallocationinfo.sample_points_by_block(
+            bands,
+            pixels,
+            lines,
+            actual,
+            resample_alg,
+            ds=dataset,
+            band_nums=[1, 2],
+        )
+        assert_allclose(expected, actual, rtol=1e-4, atol=1e-3)
@@ -463,3 +463,53 @@ def test_ogr_layer_algebra_erase(script_path, tmp_path):
     featureCount = layer.GetFeatureCount()
 
     assert featureCount == 2
+
+
+###############################################################################
+
+# Test -j
+
+
+@pytest.mark.parametrize("num_threads", ["2", "ALL_CPUS"])
+def test_ogr_layer_algebra_num_threads(script_path, tmp_path, num_threads):
+
+    input_path = str(tmp_path / "input_layer.shp")
+    method_path = str(tmp_path / "method_layer.shp")
+    output_path = str(tmp_path / "output_layer.shp")
+
+    input_ds = ogr.GetDriverByName("ESRI Shapefile").CreateDataSource(input_path)
+    method_ds = ogr.GetDriverByName("ESRI Shapefile").CreateDataSource(method_path)
+
+    A = input_ds.CreateLayer("poly")
+    A.CreateField(ogr.FieldDefn("id", ogr.OFTInteger))
+    B = method_ds.CreateLayer("poly")
+
+    for i in range(100):
+        feat = ogr.Feature(A.GetLayerDefn())
+        feat["id"] = i
+        feat.SetGeometryDirectly(
+            ogr.Geometry(wkt=f"POLYGON(({i} 0,{i} 1,{i + 1} 1,{i + 1} 0,{i} 0))")
+        )
+        A.CreateFeature(feat)
+
+    feat = ogr.Feature(B.GetLayerDefn())
+    feat.SetGeometryDirectly(
+        ogr.Geometry(wkt="POLYGON((-1 -1,-1 2,49.5 2,49.5 -1,-1 -1))")
+    )
+    B.CreateFeature(feat)
+
+    input_ds = None
+    method_ds = None
+
+    _, err = test_py_scripts.run_py_script(
+        script_path,
+        "ogr_layer_algebra",
+        f"Clip -input_ds {input_path} -output_ds {output_path} -method_ds {method_path} -j {num_threads}",
+        return_stderr=True,
+    )
+    assert "Warning" not in err
+
+    ds = ogr.Open(output_path)
+    lyr = ds.GetLayer()
+    assert lyr.GetFeatureCount() == 50
+    assert [f["id"] for f in lyr] == list(range(50))
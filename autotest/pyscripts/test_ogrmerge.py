@@ -458,6 +458,194 @@ def test_ogrmerge_12(script_path, tmp_path):
     ds = None
 
 
+###############################################################################
+# Test -j
+
+
+@pytest.mark.require_driver("GPKG")
+@pytest.mark.parametrize("single", [True, False])
+def test_ogrmerge_num_threads(script_path, tmp_path, single):
+
+    out_gpkg = str(tmp_path / "out.gpkg")
+
+    _, err = test_py_scripts.run_py_script(
+        script_path,
+        "ogrmerge",
+        ("-single -j 2 " if single else "-j ALL_CPUS -nln {LAYER_INDEX}_{DS_INDEX} ")
+        + f"-o {out_gpkg} "
+        + test_py_scripts.get_data_path("ogr")
+        + "poly.shp "
+        + test_py_scripts.get_data_path("ogr")
+        + "poly.shp",
+        return_stderr=True,
+    )
+    assert "ERROR" not in err
+
+    ds = ogr.Open(out_gpkg)
+    if single:
+        assert ds.GetLayerCount() == 1
+        lyr = ds.GetLayer(0)
+        assert lyr.GetName() == "merged"
+        assert lyr.GetFeatureCount() == 20
+    else:
+        assert ds.GetLayerCount() == 2
+        assert ds.GetLayerByName("0_0").GetFeatureCount() == 10
+        assert ds.GetLayerByName("0_1").GetFeatureCount() == 10
+        lyr = ds.GetLayerByName("0_1")
+    assert lyr.GetGeomType() == ogr.wkbPolygon
+    assert lyr.GetSpatialRef() is not None
+    assert lyr.GetLayerDefn().GetFieldIndex("EAS_ID") >= 0
+    assert lyr.GetLayerDefn().GetFieldIndex("PRFEDEA") >= 0
+    f = lyr.GetNextFeature()
+    assert f.GetGeometryRef() is not None
+    assert f["EAS_ID"] is not None
+    ds = None
+
+    # Invalid value
+    _, err = test_py_scripts.run_py_script(
+        script_path,
+        "ogrmerge",
+        f"-j 0 -overwrite_ds -o {out_gpkg} "
+        + test_py_scripts.get_data_path("ogr")
+        + "poly.shp",
+        return_stderr=True,
+    )
+    assert "Invalid value for -j" in err
+
+
+###############################################################################
+# Test num_threads passed as a string or invalid value to ogrmerge()
+
+
+@pytest.mark.require_driver("GPKG")
+def test_ogrmerge_num_threads_api(tmp_path, capsys):
+
+    ogrmerge = pytest.importorskip("osgeo_utils.ogrmerge")
+
+    out_gpkg = str(tmp_path / "out.gpkg")
+    src = test_py_scripts.get_data_path("ogr") + "poly.shp"
+
+    assert (
+        ogrmerge.ogrmerge([src, src], out_gpkg, single_layer=True, num_threads="2") == 0
+    )
+    ds = ogr.Open(out_gpkg)
+    assert ds.GetLayer(0).GetFeatureCount() == 20
+    ds = None
+
+    for num_threads in (0, -1, "invalid"):
+        assert (
+            ogrmerge.ogrmerge(
+                [src], out_gpkg, overwrite_ds=True, num_threads=num_threads
+            )
+            == 1
+        )
+        assert "Invalid value for -j" in capsys.readouterr().err
+
+
+###############################################################################
+# Test -j with sources of different schemas
+
+
+@pytest.mark.require_driver("GeoJSON")
+@pytest.mark.parametrize(
+    "field_strategy,expected_fields",
+    [
+        ("FirstLayer", {"a": "Integer", "long_field_name": "String"}),
+        ("Union", {"a": "Real", "long_field_name": "String", "c": "String"}),
+        ("Intersection", {"a": "Real"}),
+    ],
+)
+def test_ogrmerge_num_threads_heterogeneous_schemas(
+    script_path, tmp_path, field_strategy, expected_fields
+):
+
+    src_filenames = []
+    for i, fields in enumerate(
+        [
+            [("a", ogr.OFTInteger, 1), ("long_field_name", ogr.OFTString, "foo")],
+            [("a", ogr.OFTReal, 2.5), ("c", ogr.OFTString, "bar")],
+        ]
+    ):
+        filename = str(tmp_path / f"in{i}.geojson")
+        with ogr.GetDriverByName("GeoJSON").CreateDataSource(filename) as ds:
+            lyr = ds.CreateLayer("in", geom_type=ogr.wkbPoint)
+            for name, fld_type, _ in fields:
+                lyr.CreateField(ogr.FieldDefn(name, fld_type))
+            f = ogr.Feature(lyr.GetLayerDefn())
+            for name, _, value in fields:
+                f[name] = value
+            f.SetGeometry(ogr.CreateGeometryFromWkt("POINT (%d 0)" % i))
+            lyr.CreateFeature(f)
+        src_filenames.append(filename)
+
+    # The shapefile driver renames long_field_name as long_field
+    out_shp = str(tmp_path / "out.shp")
+    _, err = test_py_scripts.run_py_script(
+        script_path,
+        "ogrmerge",
+        f"-single -j 2 -field_strategy {field_strategy} -o {out_shp} "
+        + " ".join(src_filenames),
+        return_stderr=True,
+    )
+    assert "ERROR" not in err
+
+    with ogr.Open(out_shp) as ds:
+        lyr = ds.GetLayer(0)
+        layer_defn = lyr.GetLayerDefn()
+        got_fields = {}
+        for i in range(layer_defn.GetFieldCount()):
+            fld_defn = layer_defn.GetFieldDefn(i)
+            got_fields[fld_defn.GetName()] = fld_defn.GetTypeName()
+        expected_fields = {
+            name[0:10]: fld_type for name, fld_type in expected_fields.items()
+        }
+        assert got_fields == expected_fields
+
+        features = sorted(lyr, key=lambda f: f.GetGeometryRef().GetX())
+        assert len(features) == 2
+        if field_strategy == "FirstLayer":
+            # Real values cannot be written into an Integer field
+            assert "field a of layer in cannot be written" in err
+            assert features[0]["a"] == 1
+            assert features[1].IsFieldNull("a")
+        else:
+            assert features[0]["a"] == 1
+            assert features[1]["a"] == 2.5
+        if "long_field" in got_fields:
+            assert features[0]["long_field"] == "foo"
+        if "c" in got_fields:
+            assert features[1]["c"] == "bar"
+
+
+@pytest.mark.require_driver("GPKG")
+def test_ogrmerge_num_threads_append_different_schema(script_path, tmp_path):
+
+    out_gpkg = str(tmp_path / "out.gpkg")
+    test_py_scripts.run_py_script(
+        script_path,
+        "ogrmerge",
+        f"-single -o {out_gpkg} " + test_py_scripts.get_data_path("ogr") + "poly.shp",
+    )
+
+    # Fields of the source missing from the output layer are not written
+    _, err = test_py_scripts.run_py_script(
+        script_path,
+        "ogrmerge",
+        f"-append -single -j 2 -o {out_gpkg} "
+        + test_py_scripts.get_data_path("ogr")
+        + "poly.shp "
+        + test_py_scripts.get_data_path("ogr")
+        + "shp/testpoly.shp",
+        return_stderr=True,
+    )
+    assert "ERROR" not in err
+
+    with ogr.Open(out_gpkg) as ds:
+        lyr = ds.GetLayer(0)
+        assert lyr.GetLayerDefn().GetFieldCount() == 3
+        assert lyr.GetFeatureCount() == 10 + 10 + 14
+
+
 ###############################################################################
 # Validate a geopackage
 
@@ -169,3 +169,22 @@ def test_transform():
         osr_util.transform_points(ct, x, y)
         d = array_util.array_dist(x, utm_x), array_util.array_dist(y, utm_y)
         assert max(d) < 0.01
+
+
+def test_transform_numpy():
+    np = pytest.importorskip("numpy")
+
+    pj_utm = osr_util.get_srs(32636)
+    pj4326 = osr_util.get_srs(4326, axis_order=osr.OAMS_TRADITIONAL_GIS_ORDER)
+    ct = osr_util.get_transform(pj4326, pj_utm)
+    utm_x = [690950.4640, 688927.6381]
+    utm_y = [3431318.8435, 3542183.4911]
+
+    # contiguous float64 arrays are transformed in place, others through a copy
+    lon = np.array([35, 35], dtype=np.float64)
+    lat = np.array([[31, 0], [32, 0]], dtype=np.float32)[:, 0]
+    z = np.zeros(2)
+    osr_util.transform_points(ct, lon, lat, z)
+    assert lat.dtype == np.float32
+    assert np.abs(lon - utm_x).max() < 0.01
+    assert np.abs(lat - utm_y).max() < 1
@@ -36,10 +36,16 @@
 #include "ogr_wkb.h"
 #include "ogrlayer_private.h"
 
+#include "cpl_quad_tree.h"
 #include "cpl_time.h"
+#include "cpl_worker_thread_pool.h"
+
+#include <algorithm>
 #include <cassert>
+#include <functional>
 #include <limits>
 #include <set>
+#include <vector>
 
 /************************************************************************/
 /*                              OGRLayer()                              */
@@ -2561,6 +2567,303 @@ static OGRGeometry *promote_to_multi(OGRGeometry *poGeom)
         return poGeom;
 }
 
+/************************************************************************/
+/*      helper functions for multi-threaded layer overlay methods       */
+/************************************************************************/
+
+static int get_num_threads(CSLConstList papszOptions)
+{
+    const char *pszNumThreads =
+        CSLFetchNameValueDef(papszOptions, "NUM_THREADS", "1");
+    const int nThreads = EQUAL(pszNumThreads, "ALL_CPUS")
+                             ? CPLGetNumCPUs()
+                             : atoi(pszNumThreads);
+    return std::max(1, nThreads);
+}
+
+namespace
+{
+
+// Features of the method layer, loaded once and indexed by the envelope of
+// their geometry, so that they can be queried concurrently by the worker
+// threads instead of setting a spatial filter on the method layer for each
+// input feature.
+class OGRLayerOverlayMethodIndex
+{
+    std::vector<OGRFeatureUniquePtr> m_apoFeatures{};
+    CPLQuadTree *m_hQuadTree = nullptr;
+
+    CPL_DISALLOW_COPY_ASSIGN(OGRLayerOverlayMethodIndex)
+
+  public:
+    OGRLayerOverlayMethodIndex() = default;
+
+    ~OGRLayerOverlayMethodIndex()
+    {
+        if (m_hQuadTree)
+            CPLQuadTreeDestroy(m_hQuadTree);
+    }
+
+    void Load(OGRLayer *pLayerMethod);
+    std::vector<OGRFeature *> Query(const OGREnvelope &sEnvelope) const;
+};
+
+void OGRLayerOverlayMethodIndex::Load(OGRLayer *pLayerMethod)
+{
+    std::vector<OGREnvelope> asEnvelopes;
+    OGREnvelope sGlobalEnvelope;
+    for (auto &&y : pLayerMethod)
+    {
+        const OGRGeometry *y_geom = y->GetGeometryRef();
+        if (!y_geom || y_geom->IsEmpty())
+            continue;
+        OGREnvelope sEnvelope;
+        y_geom->getEnvelope(&sEnvelope);
+        sGlobalEnvelope.Merge(sEnvelope);
+        asEnvelopes.push_back(sEnvelope);
+        m_apoFeatures.emplace_back(y.release());
+    }
+    if (m_apoFeatures.empty())
+        return;
+
+    CPLRectObj sGlobalBounds;
+    sGlobalBounds.minx = sGlobalEnvelope.MinX;
+    sGlobalBounds.miny = sGlobalEnvelope.MinY;
+    sGlobalBounds.maxx = sGlobalEnvelope.MaxX;
+    sGlobalBounds.maxy = sGlobalEnvelope.MaxY;
+    m_hQuadTree = CPLQuadTreeCreate(&sGlobalBounds, nullptr);
+    CPLQuadTreeSetMaxDepth(
+        m_hQuadTree,
+        CPLQuadTreeGetAdvisedMaxDepth(static_cast<int>(
+            std::min<size_t>(INT_MAX, m_apoFeatures.size()))));
+    for (size_t i = 0; i < m_apoFeatures.size(); ++i)
+    {
+        CPLRectObj sBounds;
+        sBounds.minx = asEnvelopes[i].MinX;
+        sBounds.miny = asEnvelopes[i].MinY;
+        sBounds.maxx = asEnvelopes[i].MaxX;
+        sBounds.maxy = asEnvelopes[i].MaxY;
+        CPLQuadTreeInsertWithBounds(m_hQuadTree, &m_apoFeatures[i], &sBounds);
+    }
+}
+
+std::vector<OGRFeature *>
+OGRLayerOverlayMethodIndex::Query(const OGREnvelope &sEnvelope) const
+{
+    std::vector<OGRFeature *> apoFeatures;
+    if (!m_hQuadTree)
+        return apoFeatures;
+
+    CPLRectObj sAoi;
+    sAoi.minx = sEnvelope.MinX;
+    sAoi.miny = sEnvelope.MinY;
+    sAoi.maxx = sEnvelope.MaxX;
+    sAoi.maxy = sEnvelope.MaxY;
+    int nCount = 0;
+    void **pahFeatures = CPLQuadTreeSearch(m_hQuadTree, &sAoi, &nCount);
+
+    // Return the features in the order of the method layer, as iterating
+    // over it with a spatial filter does.
+    std::sort(pahFeatures, pahFeatures + nCount,
+              [](const void *a, const void *b)
+              {
+                  return static_cast<const OGRFeatureUniquePtr *>(a) <
+                         static_cast<const OGRFeatureUniquePtr *>(b);
+              });
+    apoFeatures.reserve(nCount);
+    for (int i = 0; i < nCount; ++i)
+        apoFeatures.push_back(
+            static_cast<OGRFeatureUniquePtr *>(pahFeatures[i])->get());
+    CPLFree(pahFeatures);
+    return apoFeatures;
+}
+
+// Computes the result features of one input feature from the method features
+// whose envelope intersects its own one. Called concurrently from the worker
+// threads, so it must not modify any shared state.
+typedef std::function<OGRErr(OGRFeature *x, OGRGeometry *x_geom,
+                             const std::vector<OGRFeature *> &ay,
+                             std::vector<OGRFeatureUniquePtr> &az)>
+    OGRLayerOverlayFunc;
+
+struct OGRLayerOverlayJob
+{
+    const OGRLayerOverlayMethodIndex *poIndex = nullptr;
+    const OGRGeometry *pGeometryMethodFilter = nullptr;
+    const OGRLayerOverlayFunc *pfnOverlay = nullptr;
+    bool bSkipFailures = false;
+    OGRFeatureUniquePtr *papoInput = nullptr;
+    size_t nInputCount = 0;
+    std::vector<OGRFeatureUniquePtr> apoResult{};
+    OGRErr eErr = OGRERR_NONE;
+
+    static void Run(void *pData);
+};
+
+void OGRLayerOverlayJob::Run(void *pData)
+{
+    OGRLayerOverlayJob *psJob = static_cast<OGRLayerOverlayJob *>(pData);
+    for (size_t i = 0; i < psJob->nInputCount; ++i)
+    {
+        OGRFeature *x = psJob->papoInput[i].get();
+        OGRGeometry *x_geom = x->GetGeometryRef();
+        if (!x_geom)
+            continue;
+        OGREnvelope sEnvelope;
+        x_geom->getEnvelope(&sEnvelope);
+
+        // restrict the input feature to the spatial filter of the method
+        // layer, as set_filter_from() does
+        if (psJob->pGeometryMethodFilter)
+        {
+            CPLErrorReset();
+            const bool bIntersects =
+                CPL_TO_BOOL(x_geom->Intersects(psJob->pGeometryMethodFilter));
+            if (CPLGetLastErrorType() != CE_None)
+            {
+                if (!psJob->bSkipFailures)
+                {
+                    psJob->eErr = OGRERR_FAILURE;
+                    return;
+                }
+                CPLErrorReset();
+            }
+            if (!bIntersects)
+                continue;
+            OGREnvelope sFilterEnvelope;
+            psJob->pGeometryMethodFilter->getEnvelope(&sFilterEnvelope);
+            sEnvelope.Intersect(sFilterEnvelope);
+        }
+
+        const OGRErr eErr = (*psJob->pfnOverlay)(
+            x, x_geom, psJob->poIndex->Query(sEnvelope), psJob->apoResult);
+        if (eErr != OGRERR_NONE)
+        {
+            psJob->eErr = eErr;
+            return;
+        }
+    }
+}
+
+}  // namespace
+
+// Runs an overlay method with nThreads worker threads. Batches of input
+// features are read by the calling thread and split in jobs processed by the
+// workers, and the result features are then written by the calling thread in
+// the order of the input layer.
+static OGRErr overlay_multi_threaded(OGRLayer *pLayerInput,
+                                     OGRLayer *pLayerMethod,
+                                     OGRLayer *pLayerResult,
+                                     const OGRGeometry *pGeometryMethodFilter,
+                                     int nThreads, bool bSkipFailures,
+                                     const OGRLayerOverlayFunc &pfnOverlay,
+                                     GDALProgressFunc pfnProgress,
+                                     void *pProgressArg)
+{
+    constexpr size_t FEATURES_PER_JOB = 16;
+    constexpr size_t JOBS_PER_THREAD = 16;
+
+    CPLWorkerThreadPool oThreadPool;
+    if (!oThreadPool.Setup(nThreads, nullptr, nullptr))
+        return OGRERR_FAILURE;
+
+    OGRLayerOverlayMethodIndex oIndex;
+    oIndex.Load(pLayerMethod);
+
+    const double progress_max =
+        static_cast<double>(pLayerInput->GetFeatureCount(FALSE));
+    double progress_counter = 0;
+    const size_t nBatchSize =
+        static_cast<size_t>(nThreads) * JOBS_PER_THREAD * FEATURES_PER_JOB;
+    std::vector<OGRFeatureUniquePtr> apoInput;
+    std::vector<OGRLayerOverlayJob> asJobs;
+    std::vector<void *> apJobs;
+    OGRErr ret = OGRERR_NONE;
+    bool bEOF = false;
+
+    pLayerInput->ResetReading();
+    while (ret == OGRERR_NONE && !bEOF)
+    {
+        apoInput.clear();
+        while (apoInput.size() < nBatchSize)
+        {
+            OGRFeatureUniquePtr x(pLayerInput->GetNextFeature());
+            if (!x)
+            {
+                bEOF = true;
+                break;
+            }
+            apoInput.push_back(std::move(x));
+        }
+        if (apoInput.empty())
+            break;
+
+        asJobs.clear();
+        asJobs.resize((apoInput.size() + FEATURES_PER_JOB - 1) /
+                      FEATURES_PER_JOB);
+        apJobs.clear();
+        for (size_t i = 0; i < asJobs.size(); ++i)
+        {
+            OGRLayerOverlayJob &sJob = asJobs[i];
+            sJob.poIndex = &oIndex;
+            sJob.pGeometryMethodFilter = pGeometryMethodFilter;
+            sJob.pfnOverlay = &pfnOverlay;
+            sJob.bSkipFailures = bSkipFailures;
+            sJob.papoInput = apoInput.data() + i * FEATURES_PER_JOB;
+            sJob.nInputCount = std::min(FEATURES_PER_JOB,
+                                        apoInput.size() - i * FEATURES_PER_JOB);
+            apJobs.push_back(&sJob);
+        }
+        oThreadPool.SubmitJobs(OGRLayerOverlayJob::Run, apJobs);
+        oThreadPool.WaitCompletion();
+
+        for (auto &sJob : asJobs)
+        {
+            if (sJob.eErr != OGRERR_NONE)
+            {
+                ret = sJob.eErr;
+                break;
+            }
+            for (auto &z : sJob.apoResult)
+            {
+                ret = pLayerResult->CreateFeature(z.get());
+                if (ret != OGRERR_NONE)
+                {
+                    if (!bSkipFailures)
+                        break;
+                    CPLErrorReset();
+                    ret = OGRERR_NONE;
+                }
+            }
+            if (ret != OGRERR_NONE)
+                break;
+
+            if (pfnProgress)
+            {
+                progress_counter += static_cast<double>(sJob.nInputCount);
+                const double p =
+                    progress_max > 0
+                        ? std::min(1.0, progress_counter / progress_max)
+                        : 0.0;
+                if (!pfnProgress(p, "", pProgressArg))
+                {
+                    CPLError(CE_Failure, CPLE_UserInterrupt, "User terminated");
+                    ret = OGRERR_FAILURE;
+                    break;
+                }
+            }
+        }
+    }
+
+    if (ret == OGRERR_NONE && pfnProgress &&
+        !pfnProgress(1.0, "", pProgressArg))
+    {
+        CPLError(CE_Failure, CPLE_UserInterrupt, "User terminated");
+        ret = OGRERR_FAILURE;
+    }
+    return ret;
+}
+
 /************************************************************************/
 /*                          Intersection()                              */
 /************************************************************************/
@@ -2615,6 +2918,16 @@ static OGRGeometry *promote_to_multi(OGRGeometry *poGeom)
  *     features with lower dimension geometry, but only if the result layer
  *     has an unknown geometry type.
  * </li>
+ * <li>NUM_THREADS=number|ALL_CPUS (since GDAL 3.10). Number of worker
+ *     threads. When greater than 1, the features of the method layer are
+ *     loaded once into an in-memory spatial index instead of setting a
+ *     spatial filter on the method layer for each input feature, and
+ *     input features are processed concurrently. The geometry of each
+ *     input feature is prepared, unless USE_PREPARED_GEOMETRIES=NO, to
+ *     skip the method features it does not intersect. Result features
+ *     are written by the calling thread, in the order of the input layer.
+ *     Defaults to 1.
+ * </li>
  * </ul>
  *
  * This method is the same as the C function OGR_L_Intersection().
@@ -2666,6 +2979,7 @@ OGRErr OGRLayer::Intersection(OGRLayer *pLayerMethod, OGRLayer *pLayerResult,
         CSLFetchNameValueDef(papszOptions, "PRETEST_CONTAINMENT", "NO"));
     bool bKeepLowerDimGeom = CPLTestBool(CSLFetchNameValueDef(
         papszOptions, "KEEP_LOWER_DIMENSION_GEOMETRIES", "YES"));
+    const int nThreads = get_num_threads(papszOptions);
 
     // check for GEOS
     if (!OGRGeometryFactory::haveGEOS())
@@ -2702,6 +3016,89 @@ OGRErr OGRLayer::Intersection(OGRLayer *pLayerMethod, OGRLayer *pLayerResult,
         }
     }
 
+    if (nThreads > 1)
+    {
+        const OGRLayerOverlayFunc pfnOverlay =
+            [&](OGRFeature *x, OGRGeometry *x_geom,
+                const std::vector<OGRFeature *> &ay,
+                std::vector<OGRFeatureUniquePtr> &az)
+        {
+            OGRPreparedGeometryUniquePtr x_prepared_geom;
+            if (bUsePreparedGeometries)
+            {
+                x_prepared_geom.reset(
+                    OGRCreatePreparedGeometry(OGRGeometry::ToHandle(x_geom)));
+                if (!x_prepared_geom)
+                    return OGRERR_FAILURE;
+            }
+
+            for (OGRFeature *y : ay)
+            {
+                OGRGeometry *y_geom = y->GetGeometryRef();
+                OGRGeometryUniquePtr z_geom;
+
+                if (x_prepared_geom)
+                {
+                    CPLErrorReset();
+                    if (bPretestContainment &&
+                        OGRPreparedGeometryContains(
+                            x_prepared_geom.get(),
+                            OGRGeometry::ToHandle(y_geom)))
+                    {
+                        if (CPLGetLastErrorType() == CE_None)
+                            z_geom.reset(y_geom->clone());
+                    }
+                    else if (!(OGRPreparedGeometryIntersects(
+                                 x_prepared_geom.get(),
+                                 OGRGeometry::ToHandle(y_geom))))
+                    {
+                        if (CPLGetLastErrorType() == CE_None)
+                            continue;
+                    }
+                    if (CPLGetLastErrorType() != CE_None)
+                    {
+                        if (!bSkipFailures)
+                            return OGRERR_FAILURE;
+                        CPLErrorReset();
+                        continue;
+                    }
+                }
+                if (!z_geom)
+                {
+                    CPLErrorReset();
+                    z_geom.reset(x_geom->Intersection(y_geom));
+                    if (CPLGetLastErrorType() != CE_None || z_geom == nullptr)
+                    {
+                        if (!bSkipFailures)
+                            return OGRERR_FAILURE;
+                        CPLErrorReset();
+                        continue;
+                    }
+                    if (z_geom->IsEmpty() ||
+                        (!bKeepLowerDimGeom &&
+                         (x_geom->getDimension() == y_geom->getDimension() &&
+                          z_geom->getDimension() < x_geom->getDimension())))
+                    {
+                        continue;
+                    }
+                }
+                OGRFeatureUniquePtr z(new OGRFeature(poDefnResult));
+                z->SetFieldsFrom(x, mapInput);
+                z->SetFieldsFrom(y, mapMethod);
+                if (bPromoteToMulti)
+                    z_geom.reset(promote_to_multi(z_geom.release()));
+                z->SetGeometryDirectly(z_geom.release());
+                az.push_back(std::move(z));
+            }
+            return OGRERR_NONE;
+        };
+        ret = overlay_multi_threaded(this, pLayerMethod, pLayerResult,
+                                     pGeometryMethodFilter, nThreads,
+                                     bSkipFailures, pfnOverlay, pfnProgress,
+                                     pProgressArg);
+        goto done;
+    }
+
     for (auto &&x : this)
     {
 
@@ -2937,6 +3334,16 @@ done:
  *     features with lower dimension geometry, but only if the result layer
  *     has an unknown geometry type.
  * </li>
+ * <li>NUM_THREADS=number|ALL_CPUS (since GDAL 3.10). Number of worker
+ *     threads. When greater than 1, the features of the method layer are
+ *     loaded once into an in-memory spatial index instead of setting a
+ *     spatial filter on the method layer for each input feature, and
+ *     input features are processed concurrently. The geometry of each
+ *     input feature is prepared, unless USE_PREPARED_GEOMETRIES=NO, to
+ *     skip the method features it does not intersect. Result features
+ *     are written by the calling thread, in the order of the input layer.
+ *     Defaults to 1.
+ * </li>
  * </ul>
  *
  * This function is the same as the C++ method OGRLayer::Intersection().
@@ -4000,6 +4407,16 @@ OGRErr OGR_L_SymDifference(OGRLayerH pLayerInput, OGRLayerH pLayerMethod,
  *     features with lower dimension geometry, but only if the result layer
  *     has an unknown geometry type.
  * </li>
+ * <li>NUM_THREADS=number|ALL_CPUS (since GDAL 3.10). Number of worker
+ *     threads. When greater than 1, the features of the method layer are
+ *     loaded once into an in-memory spatial index instead of setting a
+ *     spatial filter on the method layer for each input feature, and
+ *     input features are processed concurrently. The geometry of each
+ *     input feature is prepared, unless USE_PREPARED_GEOMETRIES=NO, to
+ *     skip the method features it does not intersect. Result features
+ *     are written by the calling thread, in the order of the input layer.
+ *     Defaults to 1.
+ * </li>
  * </ul>
  *
  * This method is the same as the C function OGR_L_Identity().
@@ -4047,6 +4464,7 @@ OGRErr OGRLayer::Identity(OGRLayer *pLayerMethod, OGRLayer *pLayerResult,
         CSLFetchNameValueDef(papszOptions, "USE_PREPARED_GEOMETRIES", "YES"));
     bool bKeepLowerDimGeom = CPLTestBool(CSLFetchNameValueDef(
         papszOptions, "KEEP_LOWER_DIMENSION_GEOMETRIES", "YES"));
+    const int nThreads = get_num_threads(papszOptions);
 
     // check for GEOS
     if (!OGRGeometryFactory::haveGEOS())
@@ -4082,6 +4500,109 @@ OGRErr OGRLayer::Identity(OGRLayer *pLayerMethod, OGRLayer *pLayerResult,
         goto done;
     poDefnResult = pLayerResult->GetLayerDefn();
 
+    if (nThreads > 1)
+    {
+        const OGRLayerOverlayFunc pfnOverlay =
+            [&](OGRFeature *x, OGRGeometry *x_geom,
+                const std::vector<OGRFeature *> &ay,
+                std::vector<OGRFeatureUniquePtr> &az)
+        {
+            OGRPreparedGeometryUniquePtr x_prepared_geom;
+            if (bUsePreparedGeometries)
+            {
+                x_prepared_geom.reset(
+                    OGRCreatePreparedGeometry(OGRGeometry::ToHandle(x_geom)));
+                if (!x_prepared_geom)
+                    return OGRERR_FAILURE;
+            }
+
+            // this will be the geometry of the result feature
+            OGRGeometryUniquePtr x_geom_diff(x_geom->clone());
+            for (OGRFeature *y : ay)
+            {
+                OGRGeometry *y_geom = y->GetGeometryRef();
+
+                CPLErrorReset();
+                if (x_prepared_geom &&
+                    !(OGRPreparedGeometryIntersects(
+                        x_prepared_geom.get(), OGRGeometry::ToHandle(y_geom))))
+                {
+                    if (CPLGetLastErrorType() == CE_None)
+                        continue;
+                }
+                if (CPLGetLastErrorType() != CE_None)
+                {
+                    if (!bSkipFailures)
+                        return OGRERR_FAILURE;
+                    CPLErrorReset();
+                }
+
+                CPLErrorReset();
+                OGRGeometryUniquePtr poIntersection(
+                    x_geom->Intersection(y_geom));
+                if (CPLGetLastErrorType() != CE_None ||
+                    poIntersection == nullptr)
+                {
+                    if (!bSkipFailures)
+                        return OGRERR_FAILURE;
+                    CPLErrorReset();
+                }
+                else if (poIntersection->IsEmpty() ||
+                         (!bKeepLowerDimGeom &&
+                          (x_geom->getDimension() == y_geom->getDimension() &&
+                           poIntersection->getDimension() <
+                               x_geom->getDimension())))
+                {
+                    /* ok*/
+                }
+                else
+                {
+                    OGRFeatureUniquePtr z(new OGRFeature(poDefnResult));
+                    z->SetFieldsFrom(x, mapInput);
+                    z->SetFieldsFrom(y, mapMethod);
+                    if (bPromoteToMulti)
+                        poIntersection.reset(
+                            promote_to_multi(poIntersection.release()));
+                    z->SetGeometryDirectly(poIntersection.release());
+                    if (x_geom_diff)
+                    {
+                        CPLErrorReset();
+                        OGRGeometryUniquePtr x_geom_diff_new(
+                            x_geom_diff->Difference(y_geom));
+                        if (CPLGetLastErrorType() != CE_None ||
+                            x_geom_diff_new == nullptr)
+                        {
+                            if (!bSkipFailures)
+                                return OGRERR_FAILURE;
+                            CPLErrorReset();
+                        }
+                        else
+                        {
+                            x_geom_diff.swap(x_geom_diff_new);
+                        }
+                    }
+                    az.push_back(std::move(z));
+                }
+            }
+
+            if (x_geom_diff != nullptr && !x_geom_diff->IsEmpty())
+            {
+                OGRFeatureUniquePtr z(new OGRFeature(poDefnResult));
+                z->SetFieldsFrom(x, mapInput);
+                if (bPromoteToMulti)
+                    x_geom_diff.reset(promote_to_multi(x_geom_diff.release()));
+                z->SetGeometryDirectly(x_geom_diff.release());
+                az.push_back(std::move(z));
+            }
+            return OGRERR_NONE;
+        };
+        ret = overlay_multi_threaded(this, pLayerMethod, pLayerResult,
+                                     pGeometryMethodFilter, nThreads,
+                                     bSkipFailures, pfnOverlay, pfnProgress,
+                                     pProgressArg);
+        goto done;
+    }
+
     // split the features in input layer to the result layer
     for (auto &&x : this)
     {
@@ -4334,6 +4855,16 @@ done:
  *     features with lower dimension geometry, but only if the result layer
  *     has an unknown geometry type.
  * </li>
+ * <li>NUM_THREADS=number|ALL_CPUS (since GDAL 3.10). Number of worker
+ *     threads. When greater than 1, the features of the method layer are
+ *     loaded once into an in-memory spatial index instead of setting a
+ *     spatial filter on the method layer for each input feature, and
+ *     input features are processed concurrently. The geometry of each
+ *     input feature is prepared, unless USE_PREPARED_GEOMETRIES=NO, to
+ *     skip the method features it does not intersect. Result features
+ *     are written by the calling thread, in the order of the input layer.
+ *     Defaults to 1.
+ * </li>
  * </ul>
  *
  * This function is the same as the C++ method OGRLayer::Identity().
@@ -4767,6 +5298,16 @@ OGRErr OGR_L_Update(OGRLayerH pLayerInput, OGRLayerH pLayerMethod,
  * <li>METHOD_PREFIX=string. Set a prefix for the field names that
  *     will be created from the fields of the method layer.
  * </li>
+ * <li>NUM_THREADS=number|ALL_CPUS (since GDAL 3.10). Number of worker
+ *     threads. When greater than 1, the features of the method layer are
+ *     loaded once into an in-memory spatial index instead of setting a
+ *     spatial filter on the method layer for each input feature, and
+ *     input features are processed concurrently. The geometry of each
+ *     input feature is prepared, unless USE_PREPARED_GEOMETRIES=NO, to
+ *     skip the method features it does not intersect. Result features
+ *     are written by the calling thread, in the order of the input layer.
+ *     Defaults to 1.
+ * </li>
  * </ul>
  *
  * This method is the same as the C function OGR_L_Clip().
@@ -4808,6 +5349,9 @@ OGRErr OGRLayer::Clip(OGRLayer *pLayerMethod, OGRLayer *pLayerResult,
         CPLTestBool(CSLFetchNameValueDef(papszOptions, "SKIP_FAILURES", "NO"));
     const bool bPromoteToMulti = CPLTestBool(
         CSLFetchNameValueDef(papszOptions, "PROMOTE_TO_MULTI", "NO"));
+    const bool bUsePreparedGeometries = CPLTestBool(
+        CSLFetchNameValueDef(papszOptions, "USE_PREPARED_GEOMETRIES", "YES"));
+    const int nThreads = get_num_threads(papszOptions);
 
     // check for GEOS
     if (!OGRGeometryFactory::haveGEOS())
@@ -4829,6 +5373,99 @@ OGRErr OGRLayer::Clip(OGRLayer *pLayerMethod, OGRLayer *pLayerResult,
         goto done;
 
     poDefnResult = pLayerResult->GetLayerDefn();
+    if (nThreads > 1)
+    {
+        const OGRLayerOverlayFunc pfnOverlay =
+            [&](OGRFeature *x, OGRGeometry *x_geom,
+                const std::vector<OGRFeature *> &ay,
+                std::vector<OGRFeatureUniquePtr> &az)
+        {
+            OGRPreparedGeometryUniquePtr x_prepared_geom;
+            if (bUsePreparedGeometries)
+            {
+                x_prepared_geom.reset(
+                    OGRCreatePreparedGeometry(OGRGeometry::ToHandle(x_geom)));
+                if (!x_prepared_geom)
+                    return OGRERR_FAILURE;
+            }
+
+            // this will be the geometry of the result feature
+            OGRGeometryUniquePtr geom;
+            // incrementally add area from y to geom
+            for (OGRFeature *y : ay)
+            {
+                OGRGeometry *y_geom = y->GetGeometryRef();
+
+                // skip the method features that do not intersect the input
+                // feature
+                if (x_prepared_geom)
+                {
+                    CPLErrorReset();
+                    if (!(OGRPreparedGeometryIntersects(
+                            x_prepared_geom.get(),
+                            OGRGeometry::ToHandle(y_geom))) &&
+                        CPLGetLastErrorType() == CE_None)
+                    {
+                        continue;
+                    }
+                    CPLErrorReset();
+                }
+
+                if (!geom)
+                {
+                    geom.reset(y_geom->clone());
+                }
+                else
+                {
+                    CPLErrorReset();
+                    OGRGeometryUniquePtr geom_new(geom->Union(y_geom));
+                    if (CPLGetLastErrorType() != CE_None ||
+                        geom_new == nullptr)
+                    {
+                        if (!bSkipFailures)
+                            return OGRERR_FAILURE;
+                        CPLErrorReset();
+                    }
+                    else
+                    {
+                        geom.swap(geom_new);
+                    }
+                }
+            }
+
+            // possibly add a new feature with area x intersection sum of y
+            if (geom)
+            {
+                CPLErrorReset();
+                OGRGeometryUniquePtr poIntersection(
+                    x_geom->Intersection(geom.get()));
+                if (CPLGetLastErrorType() != CE_None ||
+                    poIntersection == nullptr)
+                {
+                    if (!bSkipFailures)
+                        return OGRERR_FAILURE;
+                    CPLErrorReset();
+                }
+                else if (!poIntersection->IsEmpty())
+                {
+                    OGRFeatureUniquePtr z(new OGRFeature(poDefnResult));
+                    z->SetFieldsFrom(x, mapInput);
+                    if (bPromoteToMulti)
+                        poIntersection.reset(
+                            promote_to_multi(poIntersection.release()));
+                    z->SetGeometryDirectly(poIntersection.release());
+                    az.push_back(std::move(z));
+                }
+            }
+            return OGRERR_NONE;
+        };
+        ret = overlay_multi_threaded(this, pLayerMethod, pLayerResult,
+                                     pGeometryMethodFilter, nThreads,
+                                     bSkipFailures, pfnOverlay, pfnProgress,
+                                     pProgressArg);
+        goto done;
+    }
+
     for (auto &&x : this)
     {
 
@@ -4999,6 +5636,16 @@ done:
  * <li>METHOD_PREFIX=string. Set a prefix for the field names that
  *     will be created from the fields of the method layer.
  * </li>
+ * <li>NUM_THREADS=number|ALL_CPUS (since GDAL 3.10). Number of worker
+ *     threads. When greater than 1, the features of the method layer are
+ *     loaded once into an in-memory spatial index instead of setting a
+ *     spatial filter on the method layer for each input feature, and
+ *     input features are processed concurrently. The geometry of each
+ *     input feature is prepared, unless USE_PREPARED_GEOMETRIES=NO, to
+ *     skip the method features it does not intersect. Result features
+ *     are written by the calling thread, in the order of the input layer.
+ *     Defaults to 1.
+ * </li>
  * </ul>
  *
  * This function is the same as the C++ method OGRLayer::Clip().
@@ -5076,6 +5723,16 @@ OGRErr OGR_L_Clip(OGRLayerH pLayerInput, OGRLayerH pLayerMethod,
  * <li>METHOD_PREFIX=string. Set a prefix for the field names that
  *     will be created from the fields of the method layer.
  * </li>
+ * <li>NUM_THREADS=number|ALL_CPUS (since GDAL 3.10). Number of worker
+ *     threads. When greater than 1, the features of the method layer are
+ *     loaded once into an in-memory spatial index instead of setting a
+ *     spatial filter on the method layer for each input feature, and
+ *     input features are processed concurrently. The geometry of each
+ *     input feature is prepared, unless USE_PREPARED_GEOMETRIES=NO, to
+ *     skip the method features it does not intersect. Result features
+ *     are written by the calling thread, in the order of the input layer.
+ *     Defaults to 1.
+ * </li>
  * </ul>
  *
  * This method is the same as the C function OGR_L_Erase().
@@ -5117,6 +5774,9 @@ OGRErr OGRLayer::Erase(OGRLayer *pLayerMethod, OGRLayer *pLayerResult,
         CPLTestBool(CSLFetchNameValueDef(papszOptions, "SKIP_FAILURES", "NO"));
     const bool bPromoteToMulti = CPLTestBool(
         CSLFetchNameValueDef(papszOptions, "PROMOTE_TO_MULTI", "NO"));
+    const bool bUsePreparedGeometries = CPLTestBool(
+        CSLFetchNameValueDef(papszOptions, "USE_PREPARED_GEOMETRIES", "YES"));
+    const int nThreads = get_num_threads(papszOptions);
 
     // check for GEOS
     if (!OGRGeometryFactory::haveGEOS())
@@ -5139,6 +5799,79 @@ OGRErr OGRLayer::Erase(OGRLayer *pLayerMethod, OGRLayer *pLayerResult,
         goto done;
     poDefnResult = pLayerResult->GetLayerDefn();
 
+    if (nThreads > 1)
+    {
+        const OGRLayerOverlayFunc pfnOverlay =
+            [&](OGRFeature *x, OGRGeometry *x_geom,
+                const std::vector<OGRFeature *> &ay,
+                std::vector<OGRFeatureUniquePtr> &az)
+        {
+            OGRPreparedGeometryUniquePtr x_prepared_geom;
+            if (bUsePreparedGeometries)
+            {
+                x_prepared_geom.reset(
+                    OGRCreatePreparedGeometry(OGRGeometry::ToHandle(x_geom)));
+                if (!x_prepared_geom)
+                    return OGRERR_FAILURE;
+            }
+
+            // this will be the geometry of the result feature
+            OGRGeometryUniquePtr geom(x_geom->clone());
+            // incrementally erase y from geom
+            for (OGRFeature *y : ay)
+            {
+                OGRGeometry *y_geom = y->GetGeometryRef();
+
+                // skip the method features that do not intersect the input
+                // feature
+                if (x_prepared_geom)
+                {
+                    CPLErrorReset();
+                    if (!(OGRPreparedGeometryIntersects(
+                            x_prepared_geom.get(),
+                            OGRGeometry::ToHandle(y_geom))) &&
+                        CPLGetLastErrorType() == CE_None)
+                    {
+                        continue;
+                    }
+                    CPLErrorReset();
+                }
+
+                CPLErrorReset();
+                OGRGeometryUniquePtr geom_new(geom->Difference(y_geom));
+                if (CPLGetLastErrorType() != CE_None || geom_new == nullptr)
+                {
+                    if (!bSkipFailures)
+                        return OGRERR_FAILURE;
+                    CPLErrorReset();
+                }
+                else
+                {
+                    geom.swap(geom_new);
+                    if (geom->IsEmpty())
+                        break;
+                }
+            }
+
+            // add a new feature if there is remaining area
+            if (!geom->IsEmpty())
+            {
+                OGRFeatureUniquePtr z(new OGRFeature(poDefnResult));
+                z->SetFieldsFrom(x, mapInput);
+                if (bPromoteToMulti)
+                    geom.reset(promote_to_multi(geom.release()));
+                z->SetGeometryDirectly(geom.release());
+                az.push_back(std::move(z));
+            }
+            return OGRERR_NONE;
+        };
+        ret = overlay_multi_threaded(this, pLayerMethod, pLayerResult,
+                                     pGeometryMethodFilter, nThreads,
+                                     bSkipFailures, pfnOverlay, pfnProgress,
+                                     pProgressArg);
+        goto done;
+    }
+
     for (auto &&x : this)
     {
 
@@ -5287,6 +6020,16 @@ done:
  * <li>METHOD_PREFIX=string. Set a prefix for the field names that
  *     will be created from the fields of the method layer.
  * </li>
+ * <li>NUM_THREADS=number|ALL_CPUS (since GDAL 3.10). Number of worker
+ *     threads. When greater than 1, the features of the method layer are
+ *     loaded once into an in-memory spatial index instead of setting a
+ *     spatial filter on the method layer for each input feature, and
+ *     input features are processed concurrently. The geometry of each
+ *     input feature is prepared, unless USE_PREPARED_GEOMETRIES=NO, to
+ *     skip the method features it does not intersect. Result features
+ *     are written by the calling thread, in the order of the input layer.
+ *     Defaults to 1.
+ * </li>
  * </ul>
  *
  * This function is the same as the C++ method OGRLayer::Erase().
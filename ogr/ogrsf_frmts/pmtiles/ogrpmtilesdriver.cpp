@@ -126,6 +126,27 @@ static GDALDataset *OGRPMTilesDriverVectorTranslateFrom(
     }
 
     GDALOpenInfo oOpenInfo(pszDestName, GA_ReadOnly);
+    if (oOpenInfo.nHeaderBytes >= 127)
+    {
+        std::string osHeader;
+        osHeader.assign(reinterpret_cast<const char *>(oOpenInfo.pabyHeader),
+                        127);
+        try
+        {
+            const auto sHeader = pmtiles::deserialize_header(osHeader);
+            if (sHeader.tile_type != pmtiles::TILETYPE_MVT)
+            {
+                // Raster tiles are not handled by the driver, so return an
+                // empty dataset just to signal success.
+                auto poDS = std::make_unique<OGRPMTilesDataset>();
+                poDS->SetDescription(pszDestName);
+                return poDS.release();
+            }
+        }
+        catch (const std::exception &)
+        {
+        }
+    }
     return OGRPMTilesDriverOpen(&oOpenInfo);
 }
 
@@ -96,8 +96,29 @@ static bool ProcessMetadata(GDALDataset *poSQLiteDS, pmtiles::headerv3 &sHeader,
     // MBTiles advertises scheme=tms. Override this
     oObj.Set("scheme", "xyz");
 
+    // Vector tiles are stored gzip-compressed in MBTiles. Raster tiles are
+    // stored as such.
     const auto osFormat = oObj.GetString("format", "{missing}");
-    if (osFormat != "pbf")
+    uint8_t nTileType = pmtiles::TILETYPE_UNKNOWN;
+    uint8_t nTileCompression = pmtiles::COMPRESSION_NONE;
+    if (osFormat == "pbf")
+    {
+        nTileType = pmtiles::TILETYPE_MVT;
+        nTileCompression = pmtiles::COMPRESSION_GZIP;
+    }
+    else if (osFormat == "png")
+    {
+        nTileType = pmtiles::TILETYPE_PNG;
+    }
+    else if (osFormat == "jpg" || osFormat == "jpeg")
+    {
+        nTileType = pmtiles::TILETYPE_JPEG;
+    }
+    else if (osFormat == "webp")
+    {
+        nTileType = pmtiles::TILETYPE_WEBP;
+    }
+    else
     {
         CPLError(CE_Failure, CPLE_AppDefined, "format=%s unhandled",
                  osFormat.c_str());
@@ -175,8 +196,8 @@ static bool ProcessMetadata(GDALDataset *poSQLiteDS, pmtiles::headerv3 &sHeader,
     sHeader.tile_contents_count = 0;
     sHeader.clustered = true;
     sHeader.internal_compression = pmtiles::COMPRESSION_GZIP;
-    sHeader.tile_compression = pmtiles::COMPRESSION_GZIP;
-    sHeader.tile_type = pmtiles::TILETYPE_MVT;
+    sHeader.tile_compression = nTileCompression;
+    sHeader.tile_type = nTileType;
     sHeader.min_zoom = static_cast<uint8_t>(nMinZoom);
     sHeader.max_zoom = static_cast<uint8_t>(nMaxZoom);
     sHeader.min_lon_e7 = static_cast<int32_t>(dfMinX * 10e6);
@@ -149,6 +149,51 @@ using namespace std;
 
 #include "ogr_srs_api.h"
 
+#ifdef SWIGPYTHON
+#include <algorithm>
+#include <string>
+#include <thread>
+#include <vector>
+
+/* Minimum number of points transformed by each thread of
+ * CoordinateTransformation._TransformPointsArrays() */
+#define OSR_TRANSFORM_POINTS_PER_THREAD_MIN 10000
+
+typedef struct
+{
+    CPLErr eErr;
+    CPLErrorNum nNo;
+    std::string osMsg;
+} OSRAccumulatedError;
+
+static void CPL_STDCALL OSRErrorAccumulator(CPLErr eErr, CPLErrorNum nNo, const char* pszMsg)
+{
+    std::vector<OSRAccumulatedError>* paoErrors =
+        static_cast<std::vector<OSRAccumulatedError>*>(CPLGetErrorHandlerUserData());
+    paoErrors->push_back(OSRAccumulatedError{eErr, nNo, pszMsg});
+}
+
+static int OSRTransformPointsArrays( OGRCoordinateTransformationH hCT, size_t nCount,
+                                     double *x, double *y, double *z, double *t,
+                                     int *panErrorCodes )
+{
+    int bRet = TRUE;
+    size_t i = 0;
+    while( i < nCount )
+    {
+        const int nChunk = static_cast<int>(
+            nCount - i > INT_MAX ? INT_MAX : nCount - i);
+        if( !OCTTransform4DWithErrorCodes( hCT, nChunk, x + i, y + i,
+                                           z ? z + i : NULL,
+                                           t ? t + i : NULL,
+                                           panErrorCodes ? panErrorCodes + i : NULL ) )
+            bRet = FALSE;
+        i += nChunk;
+    }
+    return bRet;
+}
+#endif
+
 #ifdef DEBUG
 typedef struct OGRSpatialReferenceHS OSRSpatialReferenceShadow;
 typedef struct OGRCoordinateTransformationHS OSRCoordinateTransformationShadow;
@@ -1372,6 +1417,93 @@ public:
   }
 #endif
 
+#ifdef SWIGPYTHON
+%apply (size_t nDoubleBufferCount, double *padfInOutBuffer) {(size_t nCountX, double *x),
+                                                           (size_t nCountY, double *y),
+                                                           (size_t nCountZ, double *z),
+                                                           (size_t nCountT, double *t)};
+%apply (size_t nIntBufferCount, int *panOutBuffer) {(size_t nCountErrorCodes, int *panErrorCodes)};
+  /* Transforms arrays of coordinates in place. The Python wrapper runs this
+   * without the GIL. With num_threads > 1 (or <= 0 for all CPUs), the arrays
+   * are split in chunks transformed concurrently, each by its own clone of the
+   * transformation. */
+%thread;
+  bool _TransformPointsArrays( size_t nCountX, double *x, size_t nCountY, double *y,
+                               size_t nCountZ, double *z, size_t nCountT, double *t,
+                               size_t nCountErrorCodes, int *panErrorCodes,
+                               int num_threads = 1 ) {
+    if (self == NULL)
+        return false;
+    if( x == NULL || y == NULL || nCountY != nCountX ||
+        (z != NULL && nCountZ != nCountX) ||
+        (t != NULL && nCountT != nCountX) ||
+        (panErrorCodes != NULL && nCountErrorCodes != nCountX) )
+    {
+        CPLError(CE_Failure, CPLE_IllegalArg,
+                 "x, y, z, t and error code arrays should have the same length");
+        return false;
+    }
+
+    size_t nThreads = num_threads <= 0 ? CPLGetNumCPUs() : num_threads;
+    nThreads = std::min(nThreads, std::max<size_t>(
+                            1, nCountX / OSR_TRANSFORM_POINTS_PER_THREAD_MIN));
+    std::vector<OGRCoordinateTransformationH> ahCT;
+    for( size_t i = 1; i < nThreads; ++i )
+    {
+        OGRCoordinateTransformationH hCT = OCTClone(self);
+        if( hCT == NULL )
+            break;
+        ahCT.push_back(hCT);
+    }
+    nThreads = ahCT.size() + 1;
+
+    /* The calling thread transforms the first chunk with self, and the
+     * others are transformed by worker threads with the clones. Errors
+     * emitted by workers are accumulated and emitted again afterwards
+     * in the calling thread. */
+    const size_t nChunkSize = (nCountX + nThreads - 1) / nThreads;
+    std::vector<std::vector<OSRAccumulatedError>> aaoErrors(nThreads);
+    std::vector<int> abRet(nThreads, TRUE);
+    std::vector<std::thread> aoThreads;
+    for( size_t i = 1; i < nThreads && i * nChunkSize < nCountX; ++i )
+    {
+        const size_t nStart = i * nChunkSize;
+        const size_t nCount = std::min(nChunkSize, nCountX - nStart);
+        OGRCoordinateTransformationH hCT = ahCT[i - 1];
+        std::vector<OSRAccumulatedError>* paoErrors = &aaoErrors[i];
+        int* pbRet = &abRet[i];
+        aoThreads.emplace_back([=]() {
+            CPLPushErrorHandlerEx(OSRErrorAccumulator, paoErrors);
+            *pbRet = OSRTransformPointsArrays( hCT, nCount, x + nStart, y + nStart,
+                                               z ? z + nStart : NULL,
+                                               t ? t + nStart : NULL,
+                                               panErrorCodes ? panErrorCodes + nStart : NULL );
+            CPLPopErrorHandler();
+        });
+    }
+    abRet[0] = OSRTransformPointsArrays( self, std::min(nChunkSize, nCountX),
+                                         x, y, z, t, panErrorCodes );
+    for( auto& oThread: aoThreads )
+        oThread.join();
+    for( OGRCoordinateTransformationH hCT: ahCT )
+        OCTDestroyCoordinateTransformation(hCT);
+
+    bool bRet = true;
+    for( size_t i = 0; i < nThreads; ++i )
+    {
+        for( const auto& oError: aaoErrors[i] )
+            CPLError(oError.eErr, oError.nNo, "%s", oError.osMsg.c_str());
+        if( !abRet[i] )
+            bRet = false;
+    }
+    return bRet;
+  }
+%nothread;
+%clear (size_t nCountX, double *x), (size_t nCountY, double *y),
+       (size_t nCountZ, double *z), (size_t nCountT, double *t),
+       (size_t nCountErrorCodes, int *panErrorCodes);
+#endif
+
 #ifdef SWIGJAVA
   %apply (int* outIntArray) {int*};
   int* TransformPointsWithErrorCodes( int nCount, double *x, double *y, double *z, double *t, int* pnCountOut, int** outErrorCodes ) {
@@ -59,32 +59,6 @@ tuple
 
 ";
 
-%feature("docstring") TransformPoints "
-
-Transform multiple points.
-
-See :cpp:func:`OCTTransform`.
-
-Parameters
-----------
-arg
-    A list of tuples, or a 2xN, 3xN, or 4xN numpy array
-
-Returns
--------
-list
-    A list of tuples of (x, y, z) or (x, y, z, t) values, depending on the input.
-
-Examples
---------
->>> ct.TransformPoints([(-72.58, 44.26), (-72.59, 44.26)])
-[(7390620.052019633, -51202148.77747277, 0.0), (7387261.070131293, -51200373.68798984, 0.0)]
-
->>> import numpy as np
->>> ct.TransformPoints(np.array([[-72.58, 44.26], [-72.59, 44.26]]))
-[(7390620.052019633, -51202148.77747277, 0.0), (7387261.070131293, -51200373.68798984, 0.0)]
-
-
-";
+// TransformPoints is documented inline
 
 }
@@ -46,6 +46,19 @@ def _WarnIfUserHasNotSpecifiedIfUsingExceptions():
 
 // End: to be removed in GDAL 4.0
 
+%pythoncode %{
+
+def _get_num_threads(num_threads):
+    """Returns the number of threads argument of CoordinateTransformation._TransformPointsArrays()"""
+    if isinstance(num_threads, str):
+        if num_threads.upper() == "ALL_CPUS":
+            return 0
+        num_threads = int(num_threads)
+    if num_threads < 1:
+        raise ValueError("num_threads should be a positive number or ALL_CPUS")
+    return num_threads
+%}
+
 %extend OSRSpatialReferenceShadow {
   %pythoncode %{
 
@@ -155,4 +168,100 @@ def TransformPoint(self, *args):
     return $action(self, *args)
 %}
 
+%feature("shadow") TransformPoints %{
+
+def TransformPoints(self, *args, num_threads=1):
+    """
+    TransformPoints(CoordinateTransformation self, points)
+    TransformPoints(CoordinateTransformation self, x, y, z=None, t=None, num_threads=1)
+
+    Transform multiple points.
+
+    See :cpp:func:`OCTTransform`.
+
+    Parameters
+    ----------
+    points
+        A list of tuples, or a 2xN, 3xN, or 4xN numpy array
+    x, y, z, t
+        Writable C-contiguous float64 arrays (e.g. numpy arrays) of the same
+        length, transformed in place without copy and without holding the
+        Python GIL. z and t are optional. This form is available since GDAL 3.10.
+    num_threads : int or str
+        Only for arrays. Number of threads among which the points are split,
+        each using its own clone of the transformation, or "ALL_CPUS".
+        At least 10000 points are transformed by each thread.
+
+    Returns
+    -------
+    list
+        A list of tuples of (x, y, z) or (x, y, z, t) values, depending on the input,
+        or None when transforming arrays in place.
+
+    Examples
+    --------
+    >>> ct.TransformPoints([(-72.58, 44.26), (-72.59, 44.26)])
+    [(7390620.052019633, -51202148.77747277, 0.0), (7387261.070131293, -51200373.68798984, 0.0)]
+
+    >>> import numpy as np
+    >>> ct.TransformPoints(np.array([[-72.58, 44.26], [-72.59, 44.26]]))
+    [(7390620.052019633, -51202148.77747277, 0.0), (7387261.070131293, -51200373.68798984, 0.0)]
+
+    >>> x = np.array([-72.58, -72.59])
+    >>> y = np.array([44.26, 44.26])
+    >>> ct.TransformPoints(x, y)
+    >>> x, y
+    (array([7390620.05201963, 7387261.07013129]), array([-51202148.77747277, -51200373.68798984]))
+    """
+
+    if len(args) >= 2:
+        if len(args) > 4:
+            raise TypeError("TransformPoints() takes at most 4 arrays")
+        x, y, z, t = (list(args) + [None, None])[:4]
+        self._TransformPointsArrays(x, y, z, t, None, _get_num_threads(num_threads))
+        return None
+
+    return $action(self, *args)
+%}
+
+%pythoncode %{
+
+def TransformPointsWithErrorCodes(self, x, y, z=None, t=None, num_threads=1):
+    """
+    Variant of :py:meth:`TransformPoints` for arrays that provides per point error codes.
+
+    See :cpp:func:`OCTTransform4DWithErrorCodes`.
+
+    Parameters
+    ----------
+    x, y, z, t
+        Writable C-contiguous float64 arrays (e.g. numpy arrays) of the same
+        length, transformed in place without copy and without holding the
+        Python GIL. z and t are optional.
+    num_threads : int or str
+        Number of threads among which the points are split,
+        each using its own clone of the transformation, or "ALL_CPUS".
+        At least 10000 points are transformed by each thread.
+
+    Returns
+    -------
+    array
+        An array of error codes, 0 for points that were transformed successfully,
+        otherwise a PROJ error code. A numpy int32 array if numpy is available,
+        otherwise an array.array.
+
+    .. versionadded:: 3.10
+    """
+
+    count = len(x)
+    try:
+        import numpy
+        error_codes = numpy.zeros(count, dtype=numpy.intc)
+    except ImportError:
+        import array
+        error_codes = array.array("i", bytes(count * array.array("i").itemsize))
+    self._TransformPointsArrays(x, y, z, t, error_codes, _get_num_threads(num_threads))
+    return error_codes
+%}
+
 }
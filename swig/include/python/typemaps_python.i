@@ -2411,6 +2411,83 @@ DecomposeSequenceOf4DCoordinates( PyObject *seq, int nCount, double *x, double *
 }
 
 
+/***************************************************
+ * Typemaps for CoordinateTransformation._TransformPointsArrays():
+ * writable C-contiguous buffers (e.g. numpy arrays) of doubles or ints
+ * that are modified in place, without copy. None is accepted.
+ ***************************************************/
+
+%fragment("GetWritableContiguousBuffer","header") %{
+static bool
+GetWritableContiguousBuffer( PyObject* input, Py_buffer *view, Py_ssize_t nItemSize, const char* pszFormats, const char* pszTypeName )
+{
+  if (PyObject_GetBuffer(input, view, PyBUF_WRITABLE | PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) == 0)
+  {
+    const char* pszFormat = view->format ? view->format : "B";
+    if( *pszFormat == '@' || *pszFormat == '=' || *pszFormat == (CPL_IS_LSB ? '<' : '>') )
+      pszFormat ++;
+    if( view->itemsize == nItemSize && strlen(pszFormat) == 1 && strchr(pszFormats, *pszFormat) != NULL )
+      return true;
+    PyBuffer_Release(view);
+  }
+  else
+  {
+    PyErr_Clear();
+  }
+  PyErr_Format(PyExc_TypeError, "a writable C-contiguous buffer of %s is expected", pszTypeName);
+  return false;
+}
+%}
+
+%typemap(in,numinputs=1,fragment="GetWritableContiguousBuffer") (size_t nDoubleBufferCount, double *padfInOutBuffer) (Py_buffer view, bool viewIsValid = false)
+{
+  /* %typemap(in,numinputs=1) (size_t nDoubleBufferCount, double *padfInOutBuffer) */
+  $1 = 0;
+  $2 = NULL;
+  if( $input != Py_None )
+  {
+    if( !GetWritableContiguousBuffer($input, &view, sizeof(double), "d", "float64 values") ) {
+      SWIG_fail;
+    }
+    viewIsValid = true;
+    $1 = (size_t)(view.len / sizeof(double));
+    $2 = (double*) view.buf;
+  }
+}
+
+%typemap(freearg) (size_t nDoubleBufferCount, double *padfInOutBuffer)
+{
+  /* %typemap(freearg) (size_t nDoubleBufferCount, double *padfInOutBuffer) */
+  if( viewIsValid$argnum ) {
+    PyBuffer_Release(&view$argnum);
+  }
+}
+
+%typemap(in,numinputs=1,fragment="GetWritableContiguousBuffer") (size_t nIntBufferCount, int *panOutBuffer) (Py_buffer view, bool viewIsValid = false)
+{
+  /* %typemap(in,numinputs=1) (size_t nIntBufferCount, int *panOutBuffer) */
+  $1 = 0;
+  $2 = NULL;
+  if( $input != Py_None )
+  {
+    if( !GetWritableContiguousBuffer($input, &view, sizeof(int), "il", "int32 values") ) {
+      SWIG_fail;
+    }
+    viewIsValid = true;
+    $1 = (size_t)(view.len / sizeof(int));
+    $2 = (int*) view.buf;
+  }
+}
+
+%typemap(freearg) (size_t nIntBufferCount, int *panOutBuffer)
+{
+  /* %typemap(freearg) (size_t nIntBufferCount, int *panOutBuffer) */
+  if( viewIsValid$argnum ) {
+    PyBuffer_Release(&view$argnum);
+  }
+}
+
+
 /***************************************************
  * Typemaps for Geometry.GetPoints()
  ***************************************************/
@@ -28,8 +28,7 @@
 #  DEALINGS IN THE SOFTWARE.
 # ******************************************************************************
 import math
-import os
-import tempfile
+import uuid
 from enum import Enum
 from numbers import Number
 from typing import Dict, Optional, Sequence, Union
@@ -139,12 +138,18 @@ def calc_geotransform_and_dimensions(
 
 
 def make_temp_vrt(ds, extent: GeoRectangle):
+    """Create a VRT of ds on the given extent, as an in-memory /vsimem/ file.
+
+    Returns the VRT filename, which must be removed with gdal.Unlink()
+    once the returned VRT dataset is closed, and the VRT dataset.
+    """
     options = gdal.BuildVRTOptions(
         outputBounds=(extent.min_x, extent.min_y, extent.max_x, extent.max_y)
     )
-    tmp_fd, vrt_filename = tempfile.mkstemp(suffix=".vrt")
+    vrt_filename = f"/vsimem/extent_util_{uuid.uuid4().hex}.vrt"
     vrt_ds = gdal.BuildVRT(vrt_filename, ds, options=options)
-    os.close(tmp_fd)
     if vrt_ds is None:
         raise Exception("Error! cannot create vrt. Cannot proceed")
+    # serialize the VRT, so that it can be opened again from its filename
+    vrt_ds.FlushCache()
     return vrt_filename, vrt_ds
@@ -139,11 +139,35 @@ def transform_points(
     x: ArrayLike,
     y: ArrayLike,
     z: Optional[ArrayLike] = None,
+    num_threads: Union[int, str] = 1,
 ) -> None:
-    if ct is not None:
-        if z is None:
-            for idx, (x0, y0) in enumerate(zip(x, y)):
-                x[idx], y[idx], _z = ct.TransformPoint(x0, y0)
-        else:
-            for idx, (x0, y0, z0) in enumerate(zip(x, y, z)):
-                x[idx], y[idx], z[idx] = ct.TransformPoint(x0, y0, z0)
+    """
+    transforms the given points in place.
+    numpy arrays are transformed at once by the bulk TransformPoints() of the bindings,
+    through contiguous float64 copies if they are not such arrays already,
+    using up to num_threads threads (or "ALL_CPUS");
+    other sequences are transformed point by point.
+    """
+    if ct is None:
+        return
+    arrays = (x, y) if z is None else (x, y, z)
+    if hasattr(ct, "TransformPointsWithErrorCodes"):
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        if np is not None and all(isinstance(a, np.ndarray) for a in arrays):
+            buffers = [np.ascontiguousarray(a, dtype=np.float64) for a in arrays]
+            buffers = [b if b.flags.writeable else b.copy() for b in buffers]
+            ct.TransformPoints(*buffers, num_threads=num_threads)
+            for a, b in zip(arrays, buffers):
+                if b is not a:
+                    a[...] = b
+            return
+
+    if z is None:
+        for idx, (x0, y0) in enumerate(zip(x, y)):
+            x[idx], y[idx], _z = ct.TransformPoint(x0, y0)
+    else:
+        for idx, (x0, y0, z0) in enumerate(zip(x, y, z)):
+            x[idx], y[idx], z[idx] = ct.TransformPoint(x0, y0, z0)
@@ -40,6 +40,7 @@ from __future__ import division
 
 import contextlib
 import glob
+import hashlib
 import json
 import logging
 import math
@@ -50,8 +51,10 @@ import stat
 import sys
 import tempfile
 import threading
+from collections import OrderedDict
 from functools import partial
-from typing import Any, List, NoReturn, Optional, Tuple
+from multiprocessing.pool import Pool, ThreadPool
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Tuple
 from uuid import uuid4
 from xml.etree import ElementTree
 
@@ -89,6 +92,7 @@ resampling_list = (
     "q3",
 )
 webviewer_list = ("all", "google", "openlayers", "leaflet", "mapml", "none")
+container_list = ("MBTiles", "GPKG", "PMTiles")
 
 logger = logging.getLogger("gdal2tiles")
 
@@ -141,6 +145,277 @@ def my_open(filename, mode):
         yield open(filename, mode)
 
 
+def read_vsimem_file(filename):
+    """Return the content of a /vsimem/ file"""
+    f = gdal.VSIFOpenL(filename, "rb")
+    if f is None:
+        raise Exception(f"Cannot open {filename}")
+    try:
+        gdal.VSIFSeekL(f, 0, 2)
+        size = gdal.VSIFTellL(f)
+        gdal.VSIFSeekL(f, 0, 0)
+        return gdal.VSIFReadL(1, size, f)
+    finally:
+        gdal.VSIFCloseL(f)
+
+
+class TileContainer(object):
+    """
+    Write tiles into, and read them back from, the tile table of a MBTiles or
+    GeoPackage file.
+
+    Tiles are buffered in memory and inserted in batched transactions, so that
+    several processes can write into the same file without holding the
+    database lock while they compute tiles. Each process must use its own
+    instance.
+
+    If the MBTiles file has the map and images tables (created with --dedup),
+    tiles with the same content share the same blob, identified by tile_id.
+    """
+
+    batch_size = 256
+
+    def __init__(self, filename: str, table: str, tms_rows: bool) -> None:
+        self.filename = filename
+        self.table = '"%s"' % table.replace('"', '""')
+        self.tms_rows = tms_rows
+        self.pending = {}
+        # SQLite connections must not be shared with forked processes
+        self.pid = os.getpid()
+        # Imported here, as sqlite3 is only needed with --container, and is
+        # not available in all Python builds
+        import sqlite3
+
+        # Transactions are explicitly managed by flush()
+        self.conn = sqlite3.connect(filename, timeout=3600, isolation_level=None)
+        self.conn.execute("PRAGMA synchronous = OFF")
+        self.shared_blobs = tms_rows and (
+            self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'map'"
+            ).fetchone()
+            is not None
+        )
+        # tile_id -> tile_data of the pending new blobs
+        self.pending_images = {}
+
+    def _row(self, tz: int, ty: int) -> int:
+        # ty is in TMS numbering (0=bottom-most row)
+        return ty if self.tms_rows else (2**tz - 1) - ty
+
+    def put(
+        self,
+        tz: int,
+        tx: int,
+        ty: int,
+        data: Optional[bytes],
+        tile_id: Optional[str] = None,
+    ) -> None:
+        """
+        Add a tile. With shared blobs, data may be None to reference the blob
+        of a tile with the same tile_id that has already been put.
+        """
+        key = (tz, tx, self._row(tz, ty))
+        if self.shared_blobs:
+            if tile_id is None:
+                tile_id = hashlib.blake2b(data, digest_size=16).hexdigest()
+            if data is not None:
+                self.pending_images[tile_id] = data
+            self.pending[key] = tile_id
+        else:
+            self.pending[key] = data
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def get(self, tz: int, tx: int, ty: int) -> Optional[bytes]:
+        key = (tz, tx, self._row(tz, ty))
+        if key in self.pending:
+            if not self.shared_blobs:
+                return self.pending[key]
+            tile_id = self.pending[key]
+            if tile_id in self.pending_images:
+                return self.pending_images[tile_id]
+            row = self.conn.execute(
+                "SELECT tile_data FROM images WHERE tile_id = ?", (tile_id,)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT tile_data FROM %s WHERE zoom_level = ? AND "
+                "tile_column = ? AND tile_row = ?" % self.table,
+                key,
+            ).fetchone()
+        return bytes(row[0]) if row is not None else None
+
+    def exists(self, tz: int, tx: int, ty: int) -> bool:
+        key = (tz, tx, self._row(tz, ty))
+        if key in self.pending:
+            return True
+        row = self.conn.execute(
+            "SELECT 1 FROM %s WHERE zoom_level = ? AND "
+            "tile_column = ? AND tile_row = ?" % self.table,
+            key,
+        ).fetchone()
+        return row is not None
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        # BEGIN IMMEDIATE waits for the write lock, whereas a deferred
+        # transaction could fail on lock upgrade when other processes write.
+        self.conn.execute("BEGIN IMMEDIATE")
+        if self.shared_blobs:
+            # Blobs may have been inserted by other processes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO images (tile_id, tile_data) VALUES (?, ?)",
+                self.pending_images.items(),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO map (zoom_level, tile_column, tile_row, "
+                "tile_id) VALUES (?, ?, ?, ?)",
+                [key + (tile_id,) for key, tile_id in self.pending.items()],
+            )
+        else:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO %s (zoom_level, tile_column, tile_row, "
+                "tile_data) VALUES (?, ?, ?, ?)" % self.table,
+                [key + (data,) for key, data in self.pending.items()],
+            )
+        self.conn.execute("COMMIT")
+        self.pending = {}
+        self.pending_images = {}
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+
+def get_container_filename(options: Options, output: str) -> str:
+    """Return the name of the SQLite file in which tiles are written"""
+    if options.container == "PMTiles":
+        # Tiles are first written into a temporary MBTiles file, which is
+        # converted to PMTiles at the end by the PMTiles driver.
+        return output + ".tmp.mbtiles"
+    return output
+
+
+def get_container_table(options: Options, output: str) -> str:
+    if options.container == "GPKG":
+        return os.path.splitext(os.path.basename(output))[0]
+    return "tiles"
+
+
+def get_tile_container(options: Options, output: str) -> Optional[TileContainer]:
+    """Return the tile container of the current thread, if any"""
+    if not getattr(options, "container", None):
+        return None
+    filename = get_container_filename(options, output)
+    container = getattr(threadLocal, "tile_container", None)
+    if (
+        container is None
+        or container.filename != filename
+        or container.pid != os.getpid()
+    ):
+        container = TileContainer(
+            filename,
+            get_container_table(options, output),
+            tms_rows=options.container != "GPKG",
+        )
+        threadLocal.tile_container = container
+    return container
+
+
+def flush_tile_container() -> None:
+    """Commit the pending tiles of the tile container of the current thread"""
+    container = getattr(threadLocal, "tile_container", None)
+    if container is not None:
+        container.flush()
+
+
+def close_tile_container() -> None:
+    container = getattr(threadLocal, "tile_container", None)
+    if container is not None:
+        container.close()
+        del threadLocal.tile_container
+
+
+def tile_exists(
+    options: Options, output: str, tz: int, tx: int, ty: int, tilefilename: str
+) -> bool:
+    """
+    Return whether a tile, with ty in output numbering, has already been
+    generated
+    """
+    container = get_tile_container(options, output)
+    if container is None:
+        return isfile(tilefilename)
+    return container.exists(tz, tx, GDAL2Tiles.getYTile(ty, tz, options))
+
+
+def finalize_tile_container(options: Options, output: str) -> None:
+    """Finish writing the tile container, once all tiles are generated"""
+    close_tile_container()
+    if options.container == "PMTiles":
+        mbtiles_filename = get_container_filename(options, output)
+        if not options.quiet:
+            logger.info("Converting to PMTiles")
+        if gdal.VSIStatL(output) is not None:
+            gdal.Unlink(output)
+        src_ds = gdal.OpenEx(
+            mbtiles_filename, gdal.OF_RASTER, allowed_drivers=["MBTiles"]
+        )
+        gdal.VectorTranslate(output, src_ds, format="PMTiles")
+        src_ds = None
+        os.remove(mbtiles_filename)
+
+
+class TileDedupStore(object):
+    """
+    Map the hash of the raw content of tiles to the (tz, tx, ty, tilefilename)
+    of the first tile written with that content, so that following identical
+    tiles (typically empty or uniform ones) are not encoded again.
+
+    Only the max_entries most recently used contents are remembered, which
+    is enough to catch the frequently repeated ones.
+    """
+
+    max_entries = 65536
+
+    def __init__(self) -> None:
+        self.entries = OrderedDict()
+        self.nb_dedup = 0
+
+    def get(self, digest: str) -> Optional[Tuple[int, int, int, str]]:
+        tile = self.entries.get(digest)
+        if tile is not None:
+            self.entries.move_to_end(digest)
+        return tile
+
+    def put(self, digest: str, tile: Tuple[int, int, int, str]) -> None:
+        self.entries[digest] = tile
+        self.entries.move_to_end(digest)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+def get_tile_dedup_store() -> TileDedupStore:
+    """Return the tile dedup store of the current thread"""
+    store = getattr(threadLocal, "tile_dedup_store", None)
+    if store is None:
+        store = TileDedupStore()
+        threadLocal.tile_dedup_store = store
+    return store
+
+
+def get_nb_dedup_tiles() -> int:
+    """Return the number of deduplicated tiles of the current thread"""
+    store = getattr(threadLocal, "tile_dedup_store", None)
+    return store.nb_dedup if store is not None else 0
+
+
+def log_dedup_summary(options: Options, nb_dedup: int) -> None:
+    if getattr(options, "dedup", False) and not options.quiet:
+        logger.info("Deduplicated tiles: %d" % nb_dedup)
+
+
 class UnsupportedTileMatrixSet(Exception):
     pass
 
@@ -1337,7 +1612,226 @@ def _get_creation_options(options):
     return copts
 
 
-def create_base_tile(tile_job_info: "TileJobInfo", tile_detail: "TileDetail") -> None:
+def get_metatile_dataset(
+    ds: gdal.Dataset, tile_job_info: "TileJobInfo", tile_detail: "TileDetail"
+) -> gdal.Dataset:
+    """
+    Return a MEM dataset with the content of the source window of the
+    metatile of tile_detail, its last band being the alpha band.
+
+    The source window is read in a single request, and kept for the following
+    tiles of the same metatile processed by the current thread.
+    """
+
+    key = (
+        tile_job_info.src_file,
+        tile_detail.mrx,
+        tile_detail.mry,
+        tile_detail.mrxsize,
+        tile_detail.mrysize,
+    )
+    cached_metatile = getattr(threadLocal, "cached_metatile", None)
+    if cached_metatile and cached_metatile[0] == key:
+        return cached_metatile[1]
+
+    # Release the previous metatile before allocating the new one
+    threadLocal.cached_metatile = None
+
+    dataBandsCount = tile_job_info.nb_data_bands
+    _, mrx, mry, mrxsize, mrysize = key
+    if tile_job_info.options.verbose:
+        logger.debug(
+            f"\tReadRaster Metatile Extent: ({mrx}, {mry}, {mrxsize}, {mrysize})"
+        )
+
+    band_list = list(range(1, dataBandsCount + 1))
+    metatile_ds = gdal.GetDriverByName("MEM").Create(
+        "",
+        mrxsize,
+        mrysize,
+        dataBandsCount + 1,
+        ds.GetRasterBand(1).DataType,
+    )
+    metatile_ds.WriteRaster(
+        0,
+        0,
+        mrxsize,
+        mrysize,
+        ds.ReadRaster(mrx, mry, mrxsize, mrysize, band_list=band_list),
+        band_list=band_list,
+    )
+    alphaband = metatile_ds.GetRasterBand(dataBandsCount + 1)
+    alphaband.SetColorInterpretation(gdal.GCI_AlphaBand)
+    alphaband.WriteRaster(
+        0,
+        0,
+        mrxsize,
+        mrysize,
+        ds.GetRasterBand(1).GetMaskBand().ReadRaster(mrx, mry, mrxsize, mrysize),
+        buf_type=gdal.GDT_Byte,
+    )
+
+    threadLocal.cached_metatile = (key, metatile_ds)
+    return metatile_ds
+
+
+def write_tile(
+    tile_job_info: "TileJobInfo",
+    tz: int,
+    tx: int,
+    ty: int,
+    tilefilename: str,
+    dstile: gdal.Dataset,
+) -> None:
+    """Encode a tile, with ty in output numbering, into its file or container"""
+
+    options = tile_job_info.options
+    out_drv = gdal.GetDriverByName(tile_job_info.tile_driver)
+    container = get_tile_container(options, tile_job_info.output_file_path)
+
+    digest = None
+    if getattr(options, "dedup", False):
+        # Hash the raw tile content, which is much cheaper than encoding it
+        store = get_tile_dedup_store()
+        digest = hashlib.blake2b(dstile.ReadRaster(), digest_size=16).hexdigest()
+        first_tile = store.get(digest)
+        if first_tile is not None and write_duplicate_tile(
+            tile_job_info, container, first_tile, tz, tx, ty, tilefilename, digest
+        ):
+            store.nb_dedup += 1
+            return
+        if container is None and os.path.lexists(tilefilename):
+            # Do not overwrite the content of a tile linked to by other ones
+            os.remove(tilefilename)
+
+    if container is not None:
+        tilefilename = "/vsimem/gdal2tiles_%s.%s" % (
+            uuid4(),
+            tile_job_info.tile_extension,
+        )
+
+    out_drv.CreateCopy(
+        tilefilename,
+        dstile if tile_job_info.tile_driver != "JPEG" else remove_alpha_band(dstile),
+        strict=0,
+        options=_get_creation_options(options),
+    )
+
+    # Remove useless side car file
+    aux_xml = tilefilename + ".aux.xml"
+    if gdal.VSIStatL(aux_xml) is not None:
+        gdal.Unlink(aux_xml)
+
+    if container is not None:
+        container.put(
+            tz,
+            tx,
+            GDAL2Tiles.getYTile(ty, tz, options),
+            read_vsimem_file(tilefilename),
+            tile_id=digest,
+        )
+        gdal.Unlink(tilefilename)
+
+    if digest is not None:
+        store.put(digest, (tz, tx, ty, tilefilename))
+
+
+def write_duplicate_tile(
+    tile_job_info: "TileJobInfo",
+    container: Optional[TileContainer],
+    first_tile: Tuple[int, int, int, str],
+    tz: int,
+    tx: int,
+    ty: int,
+    tilefilename: str,
+    digest: str,
+) -> bool:
+    """
+    Write a tile with the same content as first_tile, without encoding it:
+    as a reference to the same blob in containers that support it, or as a
+    hard link (or symbolic link) to the first tile file.
+
+    Returns False if the tile could not be written that way.
+    """
+
+    options = tile_job_info.options
+    first_tz, first_tx, first_ty, first_tilefilename = first_tile
+
+    if container is not None:
+        ty = GDAL2Tiles.getYTile(ty, tz, options)
+        if container.shared_blobs:
+            container.put(tz, tx, ty, None, tile_id=digest)
+            return True
+        data = container.get(
+            first_tz, first_tx, GDAL2Tiles.getYTile(first_ty, first_tz, options)
+        )
+        if data is None:
+            return False
+        container.put(tz, tx, ty, data)
+        return True
+
+    if os.path.lexists(tilefilename):
+        os.remove(tilefilename)
+    try:
+        os.link(first_tilefilename, tilefilename)
+        return True
+    except OSError:
+        pass
+    try:
+        os.symlink(
+            os.path.relpath(first_tilefilename, os.path.dirname(tilefilename)),
+            tilefilename,
+        )
+        return True
+    except OSError:
+        pass
+    # e.g. /vsi file systems
+    return gdal.CopyFile(first_tilefilename, tilefilename) == 0
+
+
+def group_metatiles(
+    tile_details: List["TileDetail"], metatile: int, querysize: int, options: Options
+) -> List["TileDetail"]:
+    """
+    Assign to each base tile the source window of the metatile (block of
+    metatile x metatile tiles) it belongs to, so that this window is read
+    only once, and return the tiles ordered metatile by metatile.
+    """
+
+    metatiles = OrderedDict()
+    for tile_detail in tile_details:
+        ty = GDAL2Tiles.getYTile(tile_detail.ty, tile_detail.tz, options)
+        key = (ty // metatile, tile_detail.tx // metatile)
+        metatiles.setdefault(key, []).append(tile_detail)
+
+    grouped_tile_details = []
+    for metatile_details in metatiles.values():
+        mrx = min(t.rx for t in metatile_details)
+        mry = min(t.ry for t in metatile_details)
+        mrxsize = max(t.rx + t.rxsize for t in metatile_details) - mrx
+        mrysize = max(t.ry + t.rysize for t in metatile_details) - mry
+
+        # Do not read at once source windows much larger than the tiles
+        # (e.g. when the source resolution is much finer than the one of
+        # the base zoom level), and do not bother for a single tile
+        max_size = 2 * metatile * querysize
+        if len(metatile_details) > 1 and mrxsize <= max_size and mrysize <= max_size:
+            for t in metatile_details:
+                t.mrx = mrx
+                t.mry = mry
+                t.mrxsize = mrxsize
+                t.mrysize = mrysize
+
+        grouped_tile_details += metatile_details
+
+    return grouped_tile_details
+
+
+def create_base_tile(
+    tile_job_info: "TileJobInfo",
+    tile_detail: "TileDetail",
+    tile_cache: Optional["TileCache"] = None,
+) -> None:
 
     dataBandsCount = tile_job_info.nb_data_bands
     output = tile_job_info.output_file_path
@@ -1355,8 +1849,6 @@ def create_base_tile(tile_job_info: "TileJobInfo", tile_detail: "TileDetail") ->
         threadLocal.cached_ds = ds
 
     mem_drv = gdal.GetDriverByName("MEM")
-    out_drv = gdal.GetDriverByName(tile_job_info.tile_driver)
-    alphaband = ds.GetRasterBand(1).GetMaskBand()
 
     tx = tile_detail.tx
     ty = tile_detail.ty
@@ -1371,6 +1863,15 @@ def create_base_tile(tile_job_info: "TileJobInfo", tile_detail: "TileDetail") ->
     wysize = tile_detail.wysize
     querysize = tile_detail.querysize
 
+    if tile_detail.mrxsize and tile_detail.mrysize:
+        # Read from the in-memory copy of the metatile source window
+        ds = get_metatile_dataset(ds, tile_job_info, tile_detail)
+        alphaband = ds.GetRasterBand(ds.RasterCount)
+        rx -= tile_detail.mrx
+        ry -= tile_detail.mry
+    else:
+        alphaband = ds.GetRasterBand(1).GetMaskBand()
+
     # Tile dataset in memory
     tilefilename = os.path.join(output, str(tz), str(tx), "%s.%s" % (ty, tileext))
     dstile = mem_drv.Create("", tile_size, tile_size, tilebands)
@@ -1447,21 +1948,12 @@ def create_base_tile(tile_job_info: "TileJobInfo", tile_detail: "TileDetail") ->
 
     del data
 
+    if tz > tile_job_info.tminz:
+        cache_tile(tile_cache, (tz, tx, ty), dstile, tile_job_info)
+
     if options.resampling != "antialias":
         # Write a copy of tile to png/jpg
-        out_drv.CreateCopy(
-            tilefilename,
-            dstile
-            if tile_job_info.tile_driver != "JPEG"
-            else remove_alpha_band(dstile),
-            strict=0,
-            options=_get_creation_options(options),
-        )
-
-        # Remove useless side car file
-        aux_xml = tilefilename + ".aux.xml"
-        if gdal.VSIStatL(aux_xml) is not None:
-            gdal.Unlink(aux_xml)
+        write_tile(tile_job_info, tz, tx, ty, tilefilename, dstile)
 
     del dstile
 
@@ -1522,14 +2014,149 @@ def remove_alpha_band(src_ds):
     return dst_ds
 
 
+class TileCache(object):
+    """
+    Bounded in-memory cache of decoded tile pixel buffers, keyed by (tz, tx, ty).
+
+    It is used to build overview tiles from the content of their children
+    without reading and decoding again the tiles just written in the output
+    directory. When the cache exceeds its maximum size, the oldest entries are
+    dropped, and the corresponding tiles are read back from disk.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.cur_bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, key: Tuple[int, int, int], data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        self.discard(key)
+        self.entries[key] = data
+        self.cur_bytes += len(data)
+        while self.cur_bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.cur_bytes -= len(evicted)
+
+    def pop(self, key: Tuple[int, int, int]) -> Optional[bytes]:
+        data = self.entries.pop(key, None)
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.cur_bytes -= len(data)
+        return data
+
+    def discard(self, key: Tuple[int, int, int]) -> None:
+        data = self.entries.pop(key, None)
+        if data is not None:
+            self.cur_bytes -= len(data)
+
+
+def cache_tile(
+    tile_cache: Optional[TileCache],
+    key: Tuple[int, int, int],
+    dstile: gdal.Dataset,
+    tile_job_info: "TileJobInfo",
+) -> None:
+    """Store the pixel content of a tile into the overview tile cache"""
+
+    if tile_cache is None or tile_job_info.options.resampling == "antialias":
+        # In antialias mode, tiles are directly written by PIL and dstile
+        # does not hold their content
+        return
+
+    tile_size = tile_job_info.tile_size
+    if tile_job_info.tile_driver == "JPEG":
+        # JPEG tiles have no alpha band: mimic what read_base_tile() does
+        # when reading them back from disk
+        data = dstile.ReadRaster(
+            0,
+            0,
+            tile_size,
+            tile_size,
+            band_list=list(range(1, dstile.RasterCount)),
+        ) + b"\xff" * (tile_size * tile_size)
+    else:
+        data = dstile.ReadRaster(0, 0, tile_size, tile_size)
+    tile_cache.put(key, data)
+
+
+def read_base_tile(base_tile_path: str, tile_job_info: "TileJobInfo") -> bytes:
+    """Read the content of an already generated tile, with an alpha band"""
+
+    mem_driver = gdal.GetDriverByName("MEM")
+    tilebands = tile_job_info.nb_data_bands + 1
+
+    dsquerytile = gdal.Open(base_tile_path, gdal.GA_ReadOnly)
+
+    if (
+        tile_job_info.tile_driver == "JPEG"
+        and dsquerytile.RasterCount == 3
+        and tilebands == 2
+    ):
+        # Input is RGB with R=G=B. Add An alpha band
+        tmp_ds = mem_driver.Create(
+            "", dsquerytile.RasterXSize, dsquerytile.RasterYSize, 2
+        )
+        tmp_ds.GetRasterBand(1).WriteRaster(
+            0,
+            0,
+            tile_job_info.tile_size,
+            tile_job_info.tile_size,
+            dsquerytile.GetRasterBand(1).ReadRaster(),
+        )
+        mask = bytearray([255] * (tile_job_info.tile_size * tile_job_info.tile_size))
+        tmp_ds.GetRasterBand(2).WriteRaster(
+            0,
+            0,
+            tile_job_info.tile_size,
+            tile_job_info.tile_size,
+            mask,
+        )
+        tmp_ds.GetRasterBand(2).SetColorInterpretation(gdal.GCI_AlphaBand)
+        dsquerytile = tmp_ds
+    elif dsquerytile.RasterCount == tilebands - 1:
+        # assume that the alpha band is missing and add it
+        tmp_ds = mem_driver.CreateCopy("", dsquerytile, 0)
+        tmp_ds.AddBand()
+        mask = bytearray([255] * (tile_job_info.tile_size * tile_job_info.tile_size))
+        tmp_ds.WriteRaster(
+            0,
+            0,
+            tile_job_info.tile_size,
+            tile_job_info.tile_size,
+            mask,
+            band_list=[tilebands],
+        )
+        dsquerytile = tmp_ds
+    elif dsquerytile.RasterCount != tilebands:
+        raise Exception(
+            "Unexpected number of bands in base tile. Got %d, expected %d"
+            % (dsquerytile.RasterCount, tilebands)
+        )
+
+    return dsquerytile.ReadRaster(
+        0, 0, tile_job_info.tile_size, tile_job_info.tile_size
+    )
+
+
 def create_overview_tile(
     base_tz: int,
     base_tiles: List[Tuple[int, int]],
     output_folder: str,
     tile_job_info: "TileJobInfo",
     options: Options,
+    tile_cache: Optional[TileCache] = None,
 ):
-    """Generating an overview tile from no more than 4 underlying tiles(base tiles)"""
+    """Generating an overview tile from no more than 4 underlying tiles(base tiles)
+
+    If tile_cache is set, the content of the base tiles is taken from it when
+    available, and the content of the overview tile is stored into it.
+    """
 
     overview_tz = base_tz - 1
     overview_tx = base_tiles[0][0] >> 1
@@ -1544,14 +2171,19 @@ def create_overview_tile(
     )
     if options.verbose:
         logger.debug(tilefilename)
-    if options.resume and isfile(tilefilename):
+    if options.resume and tile_exists(
+        options,
+        output_folder,
+        overview_tz,
+        overview_tx,
+        overview_ty_real,
+        tilefilename,
+    ):
         if options.verbose:
             logger.debug("Tile generation skipped because of --resume")
         return
 
     mem_driver = gdal.GetDriverByName("MEM")
-    tile_driver = tile_job_info.tile_driver
-    out_driver = gdal.GetDriverByName(tile_driver)
 
     tilebands = tile_job_info.nb_data_bands + 1
 
@@ -1565,6 +2197,7 @@ def create_overview_tile(
     )
     dstile.GetRasterBand(tilebands).SetColorInterpretation(gdal.GCI_AlphaBand)
 
+    container = get_tile_container(options, output_folder)
     usable_base_tiles = []
 
     for base_tile in base_tiles:
@@ -1572,17 +2205,6 @@ def create_overview_tile(
         base_ty = base_tile[1]
         base_ty_real = GDAL2Tiles.getYTile(base_ty, base_tz, options)
 
-        base_tile_path = os.path.join(
-            output_folder,
-            str(base_tz),
-            str(base_tx),
-            "%s.%s" % (base_ty_real, tile_job_info.tile_extension),
-        )
-        if not isfile(base_tile_path):
-            continue
-
-        dsquerytile = gdal.Open(base_tile_path, gdal.GA_ReadOnly)
-
         if base_tx % 2 == 0:
             tileposx = 0
         else:
@@ -1599,59 +2221,36 @@ def create_overview_tile(
             else:
                 tileposy = 0
 
-        if (
-            tile_job_info.tile_driver == "JPEG"
-            and dsquerytile.RasterCount == 3
-            and tilebands == 2
-        ):
-            # Input is RGB with R=G=B. Add An alpha band
-            tmp_ds = mem_driver.Create(
-                "", dsquerytile.RasterXSize, dsquerytile.RasterYSize, 2
-            )
-            tmp_ds.GetRasterBand(1).WriteRaster(
-                0,
-                0,
-                tile_job_info.tile_size,
-                tile_job_info.tile_size,
-                dsquerytile.GetRasterBand(1).ReadRaster(),
-            )
-            mask = bytearray(
-                [255] * (tile_job_info.tile_size * tile_job_info.tile_size)
-            )
-            tmp_ds.GetRasterBand(2).WriteRaster(
-                0,
-                0,
-                tile_job_info.tile_size,
-                tile_job_info.tile_size,
-                mask,
-            )
-            tmp_ds.GetRasterBand(2).SetColorInterpretation(gdal.GCI_AlphaBand)
-            dsquerytile = tmp_ds
-        elif dsquerytile.RasterCount == tilebands - 1:
-            # assume that the alpha band is missing and add it
-            tmp_ds = mem_driver.CreateCopy("", dsquerytile, 0)
-            tmp_ds.AddBand()
-            mask = bytearray(
-                [255] * (tile_job_info.tile_size * tile_job_info.tile_size)
-            )
-            tmp_ds.WriteRaster(
-                0,
-                0,
-                tile_job_info.tile_size,
-                tile_job_info.tile_size,
-                mask,
-                band_list=[tilebands],
+        base_data = None
+        if tile_cache is not None:
+            base_data = tile_cache.pop((base_tz, base_tx, base_ty_real))
+
+        if base_data is None and container is not None:
+            encoded_data = container.get(base_tz, base_tx, base_ty)
+            if encoded_data is None:
+                continue
+
+            base_tile_path = "/vsimem/gdal2tiles_%s.%s" % (
+                uuid4(),
+                tile_job_info.tile_extension,
             )
-            dsquerytile = tmp_ds
-        elif dsquerytile.RasterCount != tilebands:
-            raise Exception(
-                "Unexpected number of bands in base tile. Got %d, expected %d"
-                % (dsquerytile.RasterCount, tilebands)
+            gdal.FileFromMemBuffer(base_tile_path, encoded_data)
+            try:
+                base_data = read_base_tile(base_tile_path, tile_job_info)
+            finally:
+                gdal.Unlink(base_tile_path)
+
+        elif base_data is None:
+            base_tile_path = os.path.join(
+                output_folder,
+                str(base_tz),
+                str(base_tx),
+                "%s.%s" % (base_ty_real, tile_job_info.tile_extension),
             )
+            if not isfile(base_tile_path):
+                continue
 
-        base_data = dsquerytile.ReadRaster(
-            0, 0, tile_job_info.tile_size, tile_job_info.tile_size
-        )
+            base_data = read_base_tile(base_tile_path, tile_job_info)
 
         dsquery.WriteRaster(
             tileposx,
@@ -1668,21 +2267,24 @@ def create_overview_tile(
         return
 
     scale_query_to_tile(dsquery, dstile, options, tilefilename=tilefilename)
+    if overview_tz > tile_job_info.tminz:
+        cache_tile(
+            tile_cache,
+            (overview_tz, overview_tx, overview_ty_real),
+            dstile,
+            tile_job_info,
+        )
     # Write a copy of tile to png/jpg
     if options.resampling != "antialias":
         # Write a copy of tile to png/jpg
-        out_driver.CreateCopy(
+        write_tile(
+            tile_job_info,
+            overview_tz,
+            overview_tx,
+            overview_ty_real,
             tilefilename,
-            dstile
-            if tile_job_info.tile_driver != "JPEG"
-            else remove_alpha_band(dstile),
-            strict=0,
-            options=_get_creation_options(options),
+            dstile,
         )
-        # Remove useless side car file
-        aux_xml = tilefilename + ".aux.xml"
-        if gdal.VSIStatL(aux_xml) is not None:
-            gdal.Unlink(aux_xml)
 
     if options.verbose:
         logger.debug(
@@ -1737,6 +2339,8 @@ def group_overview_base_tiles(
     # Create directories for the tiles
     overview_tz = base_tz - 1
     for tx in range(tminx, tmaxx + 1):
+        if tile_job_info.options.container:
+            break
         overview_tx = tx >> 1
         tiledirname = os.path.join(output_folder, str(overview_tz), str(overview_tx))
         makedirs(tiledirname)
@@ -1753,6 +2357,204 @@ def count_overview_tiles(tile_job_info: "TileJobInfo") -> int:
     return tile_number
 
 
+def get_pyramid_tile_ranges(
+    tile_job_info: "TileJobInfo",
+) -> Dict[int, Tuple[int, int, int, int]]:
+    """
+    Return the (tminx, tminy, tmaxx, tmaxy) range of the tiles generated at
+    each zoom level, the ones of overview levels being derived from the base
+    level
+    """
+    tmaxz = tile_job_info.tmaxz
+    ranges = {tmaxz: tuple(tile_job_info.tminmax[tmaxz])}
+    for tz in range(tmaxz - 1, tile_job_info.tminz - 1, -1):
+        ranges[tz] = tuple(v >> 1 for v in ranges[tz + 1])
+    return ranges
+
+
+def count_pyramid_overview_tiles(tile_job_info: "TileJobInfo") -> int:
+    ranges = get_pyramid_tile_ranges(tile_job_info)
+    tile_number = 0
+    for tz in range(tile_job_info.tminz, tile_job_info.tmaxz):
+        tminx, tminy, tmaxx, tmaxy = ranges[tz]
+        tile_number += (1 + tmaxx - tminx) * (1 + tmaxy - tminy)
+
+    return tile_number
+
+
+def create_overview_tile_directories(tile_job_info: "TileJobInfo") -> None:
+    """Create directories for the overview tiles of a depth-first generation"""
+    if tile_job_info.options.container:
+        return
+    ranges = get_pyramid_tile_ranges(tile_job_info)
+    for tz in range(tile_job_info.tminz, tile_job_info.tmaxz):
+        tminx, _, tmaxx, _ = ranges[tz]
+        for tx in range(tminx, tmaxx + 1):
+            makedirs(os.path.join(tile_job_info.output_file_path, str(tz), str(tx)))
+
+
+def create_pyramid_depth_first(
+    tile_job_info: "TileJobInfo",
+    tile_details: List["TileDetail"],
+    tile_cache: Optional[TileCache],
+    progress_cbk: Optional[Callable[[], None]] = None,
+    roots: Optional[List[Tuple[int, int, int]]] = None,
+    leaf_tz: Optional[int] = None,
+) -> int:
+    """
+    Generate base and overview tiles by a depth-first traversal of the tile
+    quadtree, so that each overview tile is built as soon as its children
+    are, while their content is still in tile_cache.
+
+    roots is the list of (tz, tx, ty) tiles, in TMS numbering, whose subtree
+    must be generated. It defaults to all tiles of the minimum zoom level.
+
+    leaf_tz is the zoom level at which the traversal stops. It defaults to the
+    base zoom level, whose tiles are generated from tile_details. Tiles of
+    a lower leaf_tz zoom level are assumed to be already generated.
+
+    Overview tile directories must have been created with
+    create_overview_tile_directories().
+
+    Returns the number of generated tiles.
+    """
+
+    options = tile_job_info.options
+    output_folder = tile_job_info.output_file_path
+    base_tz = tile_job_info.tmaxz
+    if leaf_tz is None:
+        leaf_tz = base_tz
+    ranges = get_pyramid_tile_ranges(tile_job_info)
+
+    # tile_details use the output tile numbering, whereas the traversal
+    # is done in TMS numbering
+    tile_details_map = {
+        (
+            tile_detail.tx,
+            GDAL2Tiles.getYTile(tile_detail.ty, base_tz, options),
+        ): tile_detail
+        for tile_detail in tile_details
+    }
+
+    nb_tiles = 0
+
+    def create_subtree(tz, tx, ty):
+        nonlocal nb_tiles
+
+        if tz == leaf_tz:
+            if tz == base_tz:
+                tile_detail = tile_details_map.get((tx, ty))
+                if tile_detail is not None:
+                    create_base_tile(tile_job_info, tile_detail, tile_cache)
+                    nb_tiles += 1
+                    if progress_cbk:
+                        progress_cbk()
+            return
+
+        tminx, tminy, tmaxx, tmaxy = ranges[tz + 1]
+        base_tiles = []
+        for child_ty in (2 * ty + 1, 2 * ty):
+            for child_tx in (2 * tx, 2 * tx + 1):
+                if tminx <= child_tx <= tmaxx and tminy <= child_ty <= tmaxy:
+                    create_subtree(tz + 1, child_tx, child_ty)
+                    base_tiles.append((child_tx, child_ty))
+
+        if base_tiles:
+            create_overview_tile(
+                tz + 1, base_tiles, output_folder, tile_job_info, options, tile_cache
+            )
+        nb_tiles += 1
+        if progress_cbk:
+            progress_cbk()
+
+    if roots is None:
+        tminz = tile_job_info.tminz
+        tminx, tminy, tmaxx, tmaxy = ranges[tminz]
+        roots = [
+            (tminz, tx, ty)
+            for ty in range(tmaxy, tminy - 1, -1)
+            for tx in range(tminx, tmaxx + 1)
+        ]
+
+    for tz, tx, ty in roots:
+        create_subtree(tz, tx, ty)
+
+    return nb_tiles
+
+
+def get_subtree_root_zoom(tile_job_info: "TileJobInfo", nb_workers: int) -> int:
+    """
+    Return the lowest zoom level that has enough tiles to distribute
+    subtrees rooted at them among nb_workers workers, with some load balancing
+    """
+    ranges = get_pyramid_tile_ranges(tile_job_info)
+    for tz in range(tile_job_info.tminz, tile_job_info.tmaxz):
+        tminx, tminy, tmaxx, tmaxy = ranges[tz]
+        if (1 + tmaxx - tminx) * (1 + tmaxy - tminy) >= 4 * nb_workers:
+            return tz
+    return tile_job_info.tmaxz
+
+
+def group_subtree_tile_details(
+    tile_job_info: "TileJobInfo", tile_details: List["TileDetail"], root_tz: int
+) -> List[Tuple[int, int, int, List["TileDetail"]]]:
+    """
+    Group base tile details by the tile of the root_tz zoom level they belong to.
+
+    Returns a list of (root_tz, root_tx, root_ty, tile_details) tuples, with the
+    root tile in TMS numbering, sorted by decreasing number of base tiles.
+    """
+    options = tile_job_info.options
+    base_tz = tile_job_info.tmaxz
+    shift = base_tz - root_tz
+
+    tminx, tminy, tmaxx, tmaxy = get_pyramid_tile_ranges(tile_job_info)[root_tz]
+    subtrees = OrderedDict(
+        ((tx, ty), [])
+        for ty in range(tmaxy, tminy - 1, -1)
+        for tx in range(tminx, tmaxx + 1)
+    )
+    for tile_detail in tile_details:
+        ty = GDAL2Tiles.getYTile(tile_detail.ty, base_tz, options)
+        subtrees[(tile_detail.tx >> shift, ty >> shift)].append(tile_detail)
+
+    # Schedule the biggest subtrees first
+    return sorted(
+        [(root_tz, tx, ty, details) for (tx, ty), details in subtrees.items()],
+        key=lambda subtree: len(subtree[3]),
+        reverse=True,
+    )
+
+
+def create_pyramid_subtree(
+    tile_job_info: "TileJobInfo",
+    subtree: Tuple[int, int, int, List["TileDetail"]],
+) -> Tuple[int, int, Tuple[int, int, int], Optional[bytes]]:
+    """
+    Generate all tiles of a subtree, as returned by group_subtree_tile_details()
+
+    Returns the number of generated tiles, the number of deduplicated tiles,
+    and the (tz, tx, ty) key and content of the root tile, if available, so
+    that the caller can build lower zoom levels from it.
+    """
+    tz, tx, ty, tile_details = subtree
+    nb_dedup_before = get_nb_dedup_tiles()
+
+    tile_cache = None
+    if tile_job_info.options.overview_cache:
+        tile_cache = TileCache(tile_job_info.options.overview_cache * 1024 * 1024)
+
+    nb_tiles = create_pyramid_depth_first(
+        tile_job_info, tile_details, tile_cache, roots=[(tz, tx, ty)]
+    )
+    # Make the tiles visible to the main process
+    flush_tile_container()
+
+    root_key = (tz, tx, GDAL2Tiles.getYTile(ty, tz, tile_job_info.options))
+    root_data = tile_cache.pop(root_key) if tile_cache is not None else None
+    return nb_tiles, get_nb_dedup_tiles() - nb_dedup_before, root_key, root_data
+
+
 def optparse_init() -> optparse.OptionParser:
     """Prepare the option parser for input (argv)"""
 
@@ -1850,6 +2652,14 @@ def optparse_init() -> optparse.OptionParser:
         type="int",
         help="Number of processes to use for tiling",
     )
+    p.add_option(
+        "--threads",
+        dest="nb_threads",
+        type="int",
+        metavar="NB_THREADS",
+        help="Number of threads to use for tiling, sharing the GDAL block "
+        "cache, instead of processes",
+    )
     p.add_option(
         "--mpi",
         action="store_true",
@@ -1857,6 +2667,40 @@ def optparse_init() -> optparse.OptionParser:
         help="Assume launched by mpiexec and ignore --processes. "
         "User should set GDAL_CACHEMAX to size per process.",
     )
+    p.add_option(
+        "--overview-cache",
+        dest="overview_cache",
+        metavar="SIZE_MB",
+        type="int",
+        help="Generate tiles depth-first and build overview tiles from up to "
+        "SIZE_MB megabytes of in-memory tiles, instead of reading them back "
+        "from the output directory",
+    )
+    p.add_option(
+        "--metatile",
+        dest="metatile",
+        metavar="N",
+        type="int",
+        default=1,
+        help="Read and resample blocks of NxN base tiles from the input in a "
+        "single request",
+    )
+    p.add_option(
+        "--container",
+        dest="container",
+        type="choice",
+        choices=container_list,
+        help="Write tiles into a single %s file instead of a directory"
+        % "/".join(container_list),
+    )
+    p.add_option(
+        "--dedup",
+        dest="dedup",
+        action="store_true",
+        help="Encode tiles with identical content (e.g. empty or uniform tiles) "
+        "only once, and write the other ones as links to the first one, or as "
+        "shared blobs in a MBTiles container",
+    )
     p.add_option(
         "--tilesize",
         dest="tilesize",
@@ -2046,6 +2890,8 @@ def process_args(argv: List[str], called_from_main=False) -> Tuple[str, str, Opt
     else:
         # Directory with input filename without extension in actual directory
         output_folder = os.path.splitext(os.path.basename(input_file))[0]
+        if options.container:
+            output_folder += "." + options.container.lower()
 
     if options.webviewer == "mapml":
         options.xyz = True
@@ -2123,6 +2969,30 @@ def options_post_processing(
             exit_with_error("jpeg_quality should be in the range [1-100]")
         options.jpeg_quality = int(options.jpeg_quality)
 
+    overview_cache = getattr(options, "overview_cache", None)
+    if overview_cache is not None and overview_cache <= 0:
+        exit_with_error("overview_cache should be strictly positive")
+
+    if getattr(options, "metatile", 1) <= 0:
+        exit_with_error("metatile should be strictly positive")
+
+    nb_threads = getattr(options, "nb_threads", None)
+    if nb_threads is not None:
+        if nb_threads <= 0:
+            exit_with_error("threads should be strictly positive")
+        if (options.nb_processes or 1) > 1 or options.mpi:
+            exit_with_error("--threads cannot be combined with --processes or --mpi")
+
+    if getattr(options, "container", None):
+        if options.profile != "mercator":
+            exit_with_error("--container is only supported with the mercator profile")
+        if options.resampling == "antialias":
+            exit_with_error("'antialias' resampling is not supported with --container")
+        if output_folder.startswith("/vsi"):
+            exit_with_error("--container is not supported on /vsi file systems")
+        options.kml = False
+        options.webviewer = "none"
+
     # Output the results
     if options.verbose:
         logger.debug("Options: %s" % str(options))
@@ -2146,6 +3016,11 @@ class TileDetail(object):
     wxsize = 0
     wysize = 0
     querysize = 0
+    # Source window of the metatile the tile belongs to, if any
+    mrx = 0
+    mry = 0
+    mrxsize = 0
+    mrysize = 0
 
     def __init__(self, **kwargs):
         for key in kwargs:
@@ -2243,7 +3118,11 @@ class GDAL2Tiles(object):
             self.tileext = "webp"
         else:
             self.tileext = "jpg"
-        if options.mpi:
+        if options.mpi and options.container:
+            self.tmp_dir = tempfile.mkdtemp(
+                dir=os.path.dirname(os.path.abspath(output_folder))
+            )
+        elif options.mpi:
             makedirs(output_folder)
             self.tmp_dir = tempfile.mkdtemp(dir=output_folder)
         else:
@@ -2721,7 +3600,8 @@ class GDAL2Tiles(object):
         tiles are generated during the tile processing).
         """
 
-        makedirs(self.output_folder)
+        if not self.options.container:
+            makedirs(self.output_folder)
 
         if self.options.profile == "mercator":
 
@@ -2731,6 +3611,11 @@ class GDAL2Tiles(object):
             north, east = min(85.05112878, north), min(180.0, east)
             self.swne = (south, west, north, east)
 
+            if self.options.container:
+                # No web viewer or KML with tile containers
+                self.create_tile_container()
+                return
+
             # Generate googlemaps.html
             if (
                 self.options.webviewer in ("all", "google")
@@ -2839,6 +3724,95 @@ class GDAL2Tiles(object):
                             ).encode("utf-8")
                         )
 
+    def create_tile_container(self) -> None:
+        """
+        Create the MBTiles or GeoPackage file, with its metadata, in which tiles
+        are written
+        """
+
+        filename = get_container_filename(self.options, self.output_folder)
+        if os.path.exists(filename):
+            if self.options.resume:
+                return
+            os.remove(filename)
+
+        if self.options.container == "GPKG":
+            # Let the GeoPackage driver create the tile matrix set and tile
+            # matrices. Tiles themselves are inserted by TileContainer.
+            ds = gdal.GetDriverByName("GPKG").Create(
+                filename,
+                self.warped_input_dataset.RasterXSize,
+                self.warped_input_dataset.RasterYSize,
+                self.dataBandsCount + 1,
+                options=[
+                    "TILING_SCHEME=GoogleMapsCompatible",
+                    "ZOOM_LEVEL=%d" % self.tmaxz,
+                    "BLOCKSIZE=%d" % self.tile_size,
+                    "TILE_FORMAT=%s" % self.tiledriver,
+                    "RASTER_TABLE=%s"
+                    % get_container_table(self.options, self.output_folder),
+                    "RASTER_IDENTIFIER=%s" % self.options.title,
+                ],
+            )
+            ds.SetGeoTransform(self.out_gt)
+            ds.SetSpatialRef(self.out_srs)
+            ds = None
+            return
+
+        south, west, north, east = self.swne
+        metadata = [
+            ("name", self.options.title),
+            ("type", "overlay"),
+            ("description", self.options.title),
+            ("version", "1.3" if self.tiledriver == "WEBP" else "1.1"),
+            ("format", self.tileext),
+            ("bounds", "%.17g,%.17g,%.17g,%.17g" % (west, south, east, north)),
+            (
+                "center",
+                "%.17g,%.17g,%d" % ((west + east) / 2, (south + north) / 2, self.tminz),
+            ),
+            ("minzoom", str(self.tminz)),
+            ("maxzoom", str(self.tmaxz)),
+        ]
+        import sqlite3
+
+        conn = sqlite3.connect(filename)
+        try:
+            if self.options.dedup and self.options.container == "MBTiles":
+                # Tiles with the same content share the same image.
+                # Not worth for PMTiles, whose driver deduplicates tiles itself.
+                conn.execute(
+                    "CREATE TABLE map (zoom_level INTEGER NOT NULL, "
+                    "tile_column INTEGER NOT NULL, tile_row INTEGER NOT NULL, "
+                    "tile_id TEXT NOT NULL, "
+                    "UNIQUE (zoom_level, tile_column, tile_row))"
+                )
+                conn.execute(
+                    "CREATE TABLE images (tile_id TEXT NOT NULL PRIMARY KEY, "
+                    "tile_data BLOB NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE VIEW tiles AS SELECT map.zoom_level AS zoom_level, "
+                    "map.tile_column AS tile_column, map.tile_row AS tile_row, "
+                    "images.tile_data AS tile_data FROM map "
+                    "JOIN images ON images.tile_id = map.tile_id"
+                )
+            else:
+                # Same structure as the one created by the MBTiles driver
+                conn.execute(
+                    "CREATE TABLE tiles (zoom_level INTEGER NOT NULL, "
+                    "tile_column INTEGER NOT NULL, tile_row INTEGER NOT NULL, "
+                    "tile_data BLOB NOT NULL, "
+                    "UNIQUE (zoom_level, tile_column, tile_row))"
+                )
+            conn.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+            conn.executemany(
+                "INSERT INTO metadata (name, value) VALUES (?, ?)", metadata
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
     def generate_base_tiles(self) -> Tuple[TileJobInfo, List[TileDetail]]:
         """
         Generation of the base tiles (the lowest in the pyramid) directly from the input raster
@@ -2873,6 +3847,8 @@ class GDAL2Tiles(object):
 
         # Create directories for the tiles
         for tx in range(tminx, tmaxx + 1):
+            if self.options.container:
+                break
             tiledirname = os.path.join(self.output_folder, str(tz), str(tx))
             makedirs(tiledirname)
 
@@ -2890,7 +3866,9 @@ class GDAL2Tiles(object):
                 if self.options.verbose:
                     logger.debug("%d / %d, %s" % (ti, tcount, tilefilename))
 
-                if self.options.resume and isfile(tilefilename):
+                if self.options.resume and tile_exists(
+                    self.options, self.output_folder, tz, tx, ytile, tilefilename
+                ):
                     if self.options.verbose:
                         logger.debug("Tile generation skipped because of --resume")
                     continue
@@ -2984,6 +3962,11 @@ class GDAL2Tiles(object):
                     )
                 )
 
+        if self.options.metatile > 1:
+            tile_details = group_metatiles(
+                tile_details, self.options.metatile, querysize, self.options
+            )
+
         conf = TileJobInfo(
             src_file=self.tmp_vrt_filename,
             nb_data_bands=self.dataBandsCount,
@@ -4551,6 +5534,14 @@ def single_threaded_tiling(
     if options.verbose:
         logger.debug("Tiles details calc complete.")
 
+    if options.overview_cache:
+        single_threaded_tiling_depth_first(conf, tile_details, options)
+        if options.container:
+            finalize_tile_container(options, output_folder)
+        log_dedup_summary(options, get_nb_dedup_tiles())
+        shutil.rmtree(os.path.dirname(conf.src_file))
+        return
+
     if not options.verbose and not options.quiet:
         base_progress_bar = ProgressBar(len(tile_details))
         base_progress_bar.start()
@@ -4563,6 +5554,8 @@ def single_threaded_tiling(
 
     if getattr(threadLocal, "cached_ds", None):
         del threadLocal.cached_ds
+    if getattr(threadLocal, "cached_metatile", None):
+        del threadLocal.cached_metatile
 
     if not options.quiet:
         count = count_overview_tiles(conf)
@@ -4580,14 +5573,58 @@ def single_threaded_tiling(
             if not options.verbose and not options.quiet:
                 overview_progress_bar.log_progress()
 
+    if options.container:
+        finalize_tile_container(options, output_folder)
+    log_dedup_summary(options, get_nb_dedup_tiles())
     shutil.rmtree(os.path.dirname(conf.src_file))
 
 
+def single_threaded_tiling_depth_first(
+    conf: TileJobInfo, tile_details: List[TileDetail], options: Options
+) -> None:
+    """
+    Generate the whole pyramid in a single depth-first pass, building
+    overview tiles from the in-memory content of their children
+    """
+    tile_cache = TileCache(options.overview_cache * 1024 * 1024)
+
+    progress_cbk = None
+    if not options.verbose and not options.quiet:
+        count = len(tile_details) + count_pyramid_overview_tiles(conf)
+        if count:
+            progress_bar = ProgressBar(count)
+            progress_bar.start()
+            progress_cbk = progress_bar.log_progress
+
+    create_overview_tile_directories(conf)
+    create_pyramid_depth_first(conf, tile_details, tile_cache, progress_cbk)
+
+    if options.verbose:
+        logger.debug(
+            "Overview tile cache: %d hits, %d misses"
+            % (tile_cache.hits, tile_cache.misses)
+        )
+
+    if getattr(threadLocal, "cached_ds", None):
+        del threadLocal.cached_ds
+    if getattr(threadLocal, "cached_metatile", None):
+        del threadLocal.cached_metatile
+
+
 @enable_gdal_exceptions
 def multi_threaded_tiling(
     input_file: str, output_folder: str, options: Options, pool
 ) -> None:
-    nb_processes = options.nb_processes or 1
+    """
+    Generate tiles with a pool of workers (multiprocessing, threads or MPI).
+
+    The tile pyramid is split into independent subtrees, rooted at the lowest
+    zoom level that has enough tiles to keep all workers busy. Each worker
+    generates whole subtrees, from the base zoom level up to their root tile,
+    without any synchronization between zoom levels. Only the remaining
+    lowest zoom levels are generated by the main process.
+    """
+    nb_workers = getattr(options, "nb_threads", None) or options.nb_processes or 1
 
     if options.verbose:
         logger.debug("Begin tiles details calc")
@@ -4597,45 +5634,60 @@ def multi_threaded_tiling(
     if options.verbose:
         logger.debug("Tiles details calc complete.")
 
-    if not options.verbose and not options.quiet:
-        base_progress_bar = ProgressBar(len(tile_details))
-        base_progress_bar.start()
+    root_tz = get_subtree_root_zoom(conf, nb_workers)
+    subtrees = group_subtree_tile_details(conf, tile_details, root_tz)
+    if options.verbose:
+        logger.debug("Subtrees rooted at zoom level %d: %d" % (root_tz, len(subtrees)))
 
-    # TODO: gbataille - check the confs for which each element is an array... one useless level?
-    # TODO: gbataille - assign an ID to each job for print in verbose mode "ReadRaster Extent ..."
-    chunksize = max(1, min(128, len(tile_details) // nb_processes))
-    for _ in pool.imap_unordered(
-        partial(create_base_tile, conf), tile_details, chunksize=chunksize
-    ):
-        if not options.verbose and not options.quiet:
-            base_progress_bar.log_progress()
+    create_overview_tile_directories(conf)
 
-    if not options.quiet:
-        count = count_overview_tiles(conf)
+    progress_bar = None
+    if not options.verbose and not options.quiet:
+        count = len(tile_details) + count_pyramid_overview_tiles(conf)
         if count:
-            logger.info("Generating Overview Tiles:")
-
-            if not options.verbose:
-                overview_progress_bar = ProgressBar(count)
-                overview_progress_bar.start()
-
-    for base_tz in range(conf.tmaxz, conf.tminz, -1):
-        base_tile_groups = group_overview_base_tiles(base_tz, output_folder, conf)
-        chunksize = max(1, min(128, len(base_tile_groups) // nb_processes))
-        for _ in pool.imap_unordered(
-            partial(
-                create_overview_tile,
-                base_tz,
-                output_folder=output_folder,
-                tile_job_info=conf,
-                options=options,
-            ),
-            base_tile_groups,
-            chunksize=chunksize,
-        ):
-            if not options.verbose and not options.quiet:
-                overview_progress_bar.log_progress()
+            progress_bar = ProgressBar(count)
+            progress_bar.start()
+
+    # Content of the subtree root tiles, to build the lowest zoom levels
+    tile_cache = None
+    if options.overview_cache:
+        tile_cache = TileCache(options.overview_cache * 1024 * 1024)
+
+    # Subtrees are big enough work units, and are sorted by decreasing size:
+    # dispatch them one at a time for better load balancing
+    worker = partial(create_pyramid_subtree, conf)
+    if isinstance(pool, ThreadPool):
+        # The GDAL exception mode is thread-local
+        worker = enable_gdal_exceptions(worker)
+
+    nb_dedup = 0
+    for nb_tiles, nb_subtree_dedup, root_key, root_data in pool.imap_unordered(
+        worker, subtrees, chunksize=1
+    ):
+        nb_dedup += nb_subtree_dedup
+        if tile_cache is not None and root_data is not None:
+            tile_cache.put(root_key, root_data)
+        if progress_bar:
+            progress_bar.log_progress(nb_tiles)
+
+    if isinstance(pool, Pool):
+        # Let workers release their datasets and tile container connections
+        pool.close()
+        pool.join()
+
+    if root_tz > conf.tminz:
+        create_pyramid_depth_first(
+            conf,
+            [],
+            tile_cache,
+            progress_bar.log_progress if progress_bar else None,
+            leaf_tz=root_tz,
+        )
+        nb_dedup += get_nb_dedup_tiles()
 
+    if options.container:
+        finalize_tile_container(options, output_folder)
+    log_dedup_summary(options, nb_dedup)
     shutil.rmtree(os.path.dirname(conf.src_file))
 
 
@@ -4696,8 +5748,15 @@ def submain(argv: List[str], pool=None, pool_size=0, called_from_main=False) ->
         options.nb_processes = pool_size
     nb_processes = options.nb_processes or 1
 
+    nb_threads = getattr(options, "nb_threads", None) or 1
+
     if pool is not None:  # MPI
         multi_threaded_tiling(input_file, output_folder, options, pool)
+    elif nb_threads > 1:
+        # GDAL releases the GIL during I/O and encoding, and the block cache
+        # is shared among threads, contrary to processes.
+        with ThreadPool(processes=nb_threads) as pool:
+            multi_threaded_tiling(input_file, output_folder, options, pool)
     elif nb_processes == 1:
         single_threaded_tiling(input_file, output_folder, options)
     else:
@@ -4707,7 +5766,6 @@ def submain(argv: List[str], pool=None, pool_size=0, called_from_main=False) ->
 
         if not hasattr(__main__, "__spec__"):
             __main__.__spec__ = None
-        from multiprocessing import Pool
 
         with DividedCache(nb_processes), Pool(processes=nb_processes) as pool:
             multi_threaded_tiling(input_file, output_folder, options, pool)
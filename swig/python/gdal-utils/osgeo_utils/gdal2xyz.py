@@ -29,15 +29,16 @@
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 ###############################################################################
+import os
 import sys
 import textwrap
 from numbers import Number
-from typing import Optional, Sequence, Tuple, Union
+from typing import Iterator, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
 from osgeo import gdal
-from osgeo_utils.auxiliary.base import PathLikeOrStr
+from osgeo_utils.auxiliary.base import PathLikeOrStr, get_extension
 from osgeo_utils.auxiliary.gdal_argparse import GDALArgumentParser, GDALScript
 from osgeo_utils.auxiliary.numpy_util import GDALTypeCodeAndNumericTypeCodeFromDataSet
 from osgeo_utils.auxiliary.progress import (
@@ -47,10 +48,235 @@ from osgeo_utils.auxiliary.progress import (
 from osgeo_utils.auxiliary.util import (
     PathOrDS,
     enable_gdal_exceptions,
+    get_band_nums,
     get_bands,
     open_ds,
 )
 
+# Number of source pixels read (per band) for each emitted block.
+BLOCK_PIXELS = 256 * 1024
+
+OUTPUT_FORMATS = ("XYZ", "Parquet", "Arrow")
+
+
+def get_output_format(dstfile: Optional[PathLikeOrStr]) -> str:
+    """returns the output format implied by the extension of dstfile"""
+    if dstfile is not None:
+        ext = get_extension(dstfile).lower()
+        if ext == "parquet":
+            return "Parquet"
+        if ext in ("arrow", "arrows", "feather", "ipc"):
+            return "Arrow"
+    return "XYZ"
+
+
+def get_block_rows(band: gdal.Band, x_size: int, y_skip: int) -> int:
+    """
+    returns how many rows are read per block, so that about BLOCK_PIXELS pixels
+    are read per band, aligned to the natural block height when reading whole blocks
+    """
+    block_ysize = band.GetBlockSize()[1]
+    rows = max(1, BLOCK_PIXELS // max(1, x_size))
+    if y_skip == 1 and rows > block_ysize:
+        rows -= rows % block_ysize
+    return rows
+
+
+def get_skip(skip: Union[int, Sequence[int]]) -> Tuple[int, int]:
+    """returns (x_skip, y_skip) from a single skip factor or a pair of factors"""
+    if isinstance(skip, Sequence):
+        x_skip, y_skip = skip
+    else:
+        x_skip = y_skip = skip
+    return x_skip, y_skip
+
+
+def get_point_count(srcwin: Sequence[int], x_skip: int, y_skip: int) -> int:
+    """returns the number of points of srcwin that are emitted with the given skip factors"""
+    _x_off, _y_off, x_size, y_size = srcwin
+    return (-(-x_size // x_skip)) * (-(-y_size // y_skip))
+
+
+def get_nodata_values(
+    bands: Sequence[gdal.Band],
+    np_dt,
+    src_nodata: Optional[Union[Sequence, Number]] = None,
+    dst_nodata: Optional[Union[Sequence, Number]] = None,
+    skip_nodata: bool = False,
+) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], bool]:
+    """
+    returns (src_nodata, dst_nodata, skip_nodata) normalized to per band arrays.
+    dst_nodata is None unless source nodata is to be replaced,
+    skip_nodata is False unless there is a source nodata to skip
+    """
+    band_count = len(bands)
+    if isinstance(src_nodata, Number):
+        src_nodata = [src_nodata] * band_count
+    elif src_nodata is None:
+        src_nodata = list(band.GetNoDataValue() for band in bands)
+    if None in src_nodata:
+        src_nodata = None
+    if src_nodata is not None:
+        src_nodata = np.asarray(src_nodata, dtype=np_dt)
+
+    if isinstance(dst_nodata, Number):
+        dst_nodata = [dst_nodata] * band_count
+    if (dst_nodata is None) or (None in dst_nodata) or (src_nodata is None):
+        dst_nodata = None
+    if dst_nodata is not None:
+        dst_nodata = np.asarray(dst_nodata, dtype=np_dt)
+
+    skip_nodata = skip_nodata and (src_nodata is not None)
+    if skip_nodata:
+        dst_nodata = None
+    return src_nodata, dst_nodata, skip_nodata
+
+
+def get_output_nodata(
+    src_nodata: Optional[np.ndarray],
+    dst_nodata: Optional[np.ndarray],
+    skip_nodata: bool,
+) -> Optional[np.ndarray]:
+    """returns the nodata value of the emitted points"""
+    if skip_nodata:
+        return None
+    return dst_nodata if dst_nodata is not None else src_nodata
+
+
+def concatenate_blocks(
+    blocks: Sequence[Tuple[np.ndarray, np.ndarray, np.ndarray]], band_count: int, np_dt
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """concatenates a sequence of (geo_x, geo_y, data) blocks into single arrays"""
+    if not blocks:
+        return np.empty(0), np.empty(0), np.empty((band_count, 0), dtype=np_dt)
+    all_geo_x = np.concatenate([block[0] for block in blocks])
+    all_geo_y = np.concatenate([block[1] for block in blocks])
+    all_data = np.concatenate([block[2] for block in blocks], axis=1)
+    return all_geo_x, all_geo_y, all_data
+
+
+def nodata_mask(data: np.ndarray, nodata: np.ndarray) -> np.ndarray:
+    """
+    returns a boolean mask of the points (columns of data) in which all the bands equal to nodata
+    data - array of dims (bands, points)
+    nodata - array of dims (bands,)
+    """
+    equal = data == nodata[:, None]
+    if np.issubdtype(data.dtype, np.floating):
+        nan_nodata = np.isnan(nodata)
+        if nan_nodata.any():
+            equal |= np.isnan(data) & nan_nodata[:, None]
+    return np.all(equal, axis=0)
+
+
+def iter_xyz_blocks(
+    bands: Sequence[gdal.Band],
+    gt: Sequence[float],
+    srcwin: Sequence[int],
+    x_skip: int,
+    y_skip: int,
+    np_dt,
+    src_nodata: Optional[np.ndarray] = None,
+    dst_nodata: Optional[np.ndarray] = None,
+    skip_nodata: bool = False,
+    progress_callback: OptionalProgressCallback = None,
+):
+    """
+    yields a tuple of (geo_x, geo_y, data) numpy arrays for each block of rows of srcwin,
+    geo_x, geo_y are the coordinates of the pixel centers with dims (points,)
+    and data holds the band values with dims (bands, points)
+    """
+    x_off, y_off, x_size, y_size = srcwin
+    band_count = len(bands)
+    rows = range(y_off, y_off + y_size, y_skip)
+    block_rows = get_block_rows(bands[0], x_size, y_skip)
+
+    xs = x_off + np.arange(0, x_size, x_skip) + 0.5
+    x_geo_x = gt[0] + xs * gt[1]
+    x_geo_y = gt[3] + xs * gt[4]
+
+    for row_idx in range(0, len(rows), block_rows):
+        block_ys = rows[row_idx : row_idx + block_rows]
+        block_count = len(block_ys)
+        buf = np.empty((band_count, block_count, x_size), dtype=np_dt)
+        for i_bnd, band in enumerate(bands):
+            if y_skip == 1:
+                band.ReadAsArray(
+                    x_off, block_ys[0], x_size, block_count, buf_obj=buf[i_bnd]
+                )
+            else:
+                for i, y in enumerate(block_ys):
+                    band.ReadAsArray(x_off, y, x_size, 1, buf_obj=buf[i_bnd, i : i + 1])
+        data = buf[:, :, ::x_skip].reshape(band_count, -1)
+
+        ys = np.asarray(block_ys, dtype=np.float64)[:, None] + 0.5
+        geo_x = (x_geo_x + ys * gt[2]).ravel()
+        geo_y = (x_geo_y + ys * gt[5]).ravel()
+
+        if src_nodata is not None and (skip_nodata or dst_nodata is not None):
+            is_nodata = nodata_mask(data, src_nodata)
+            if skip_nodata:
+                valid = ~is_nodata
+                geo_x = geo_x[valid]
+                geo_y = geo_y[valid]
+                data = data[:, valid]
+            else:
+                data[:, is_nodata] = dst_nodata[:, None]
+
+        if progress_callback:
+            progress_callback((row_idx + block_count) / len(rows))
+
+        yield geo_x, geo_y, data
+
+
+def write_xyz_block(
+    dst_fh, line_format: str, geo_x: np.ndarray, geo_y: np.ndarray, data: np.ndarray
+):
+    """writes a block of points as text lines, formatting the whole block at once"""
+    count = len(geo_x)
+    if not count:
+        return
+    values = np.empty((count, 2 + len(data)), dtype=object)
+    values[:, 0] = geo_x
+    values[:, 1] = geo_y
+    values[:, 2:] = data.transpose()
+    dst_fh.write((line_format * count) % tuple(values.ravel()))
+
+
+def open_arrow_writer(
+    dstfile: PathLikeOrStr, output_format: str, column_names: Sequence[str], np_dt
+):
+    """returns a pyarrow (schema, writer) for writing Parquet or Arrow IPC files"""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise Exception(
+            f"pyarrow Python module not available, it is required for {output_format} output. "
+            "Try 'pip install pyarrow'"
+        )
+    schema = pa.schema(
+        [("x", pa.float64()), ("y", pa.float64())]
+        + [(name, pa.from_numpy_dtype(np_dt)) for name in column_names]
+    )
+    dstfile = os.fspath(dstfile)
+    if output_format == "Parquet":
+        writer = pyarrow.parquet.ParquetWriter(dstfile, schema)
+    else:
+        writer = pyarrow.ipc.new_file(dstfile, schema)
+    return schema, writer
+
+
+def write_arrow_block(schema, writer, geo_x, geo_y, data):
+    """writes a block of points as a record batch of a Parquet or Arrow IPC file"""
+    import pyarrow as pa
+
+    if not len(geo_x):
+        return
+    table = pa.Table.from_arrays([geo_x, geo_y, *data], schema=schema)
+    writer.write_table(table)
+
 
 @enable_gdal_exceptions
 def gdal2xyz(
@@ -66,6 +292,7 @@ def gdal2xyz(
     return_np_arrays: bool = False,
     pre_allocate_np_arrays: bool = True,
     progress_callback: OptionalProgressCallback = ...,
+    output_format: Optional[str] = None,
 ) -> Optional[Tuple]:
     """
     translates a raster file (or dataset) into xyz format
@@ -84,9 +311,12 @@ def gdal2xyz(
     srcfile - The source dataset filename or dataset object
     dstfile - The output dataset filename; for dstfile=None - if return_np_arrays=False then output will be printed to stdout
     return_np_arrays - return numpy arrays of the result, otherwise returns None
-    pre_allocate_np_arrays - pre-allocated result arrays.
-        Should be faster unless skip_nodata and the input is very sparse thus most data points will be skipped.
+    pre_allocate_np_arrays - pre-allocated result arrays of the exact number of points (before skipping nodata).
+        Should be faster unless skip_nodata and the input is very sparse thus most data points will be skipped,
+        otherwise the arrays of all the blocks are concatenated once at the end.
     progress_callback - progress callback function. use None for quiet or Ellipsis for using the default callback
+    output_format - XYZ (text), Parquet or Arrow (IPC file). Parquet and Arrow require pyarrow.
+        default (`None`) - guess from the extension of dstfile, otherwise XYZ.
     """
 
     result = None
@@ -98,6 +328,7 @@ def gdal2xyz(
     if ds is None:
         raise Exception(f"Could not open {srcfile}.")
 
+    band_nums = get_band_nums(ds, band_nums)
     bands = get_bands(ds, band_nums)
     band_count = len(bands)
 
@@ -109,19 +340,30 @@ def gdal2xyz(
 
     dt, np_dt = GDALTypeCodeAndNumericTypeCodeFromDataSet(ds)
 
+    if output_format is None:
+        output_format = get_output_format(dstfile)
+    elif output_format not in OUTPUT_FORMATS:
+        raise Exception(f"Unsupported output format: {output_format}")
+    if output_format != "XYZ" and dstfile is None:
+        raise Exception(f"An output file is required for {output_format} output.")
+
     # Open the output file.
-    if dstfile is not None:
+    dst_fh = None
+    arrow_writer = None
+    if output_format != "XYZ":
+        arrow_schema, arrow_writer = open_arrow_writer(
+            dstfile, output_format, [f"band_{i}" for i in band_nums], np_dt
+        )
+    elif dstfile is not None:
         dst_fh = open(dstfile, "wt")
-    elif return_np_arrays:
-        dst_fh = None
-    else:
+    elif not return_np_arrays:
         dst_fh = sys.stdout
 
     if dst_fh:
         if dt == gdal.GDT_Int32 or dt == gdal.GDT_UInt32:
-            band_format = (("%d" + delim) * len(bands)).rstrip(delim) + "\n"
+            band_format = "%d"
         else:
-            band_format = (("%g" + delim) * len(bands)).rstrip(delim) + "\n"
+            band_format = "%g"
 
         # Setup an appropriate print format.
         if (
@@ -130,112 +372,135 @@ def gdal2xyz(
             and abs(ds.RasterXSize * gt[1]) < 180
             and abs(ds.RasterYSize * gt[5]) < 180
         ):
-            frmt = "%.10g" + delim + "%.10g" + delim + "%s"
+            coord_format = "%.10g"
         else:
-            frmt = "%.3f" + delim + "%.3f" + delim + "%s"
-
-    if isinstance(src_nodata, Number):
-        src_nodata = [src_nodata] * band_count
-    elif src_nodata is None:
-        src_nodata = list(band.GetNoDataValue() for band in bands)
-    if None in src_nodata:
-        src_nodata = None
-    if src_nodata is not None:
-        src_nodata = np.asarray(src_nodata, dtype=np_dt)
+            coord_format = "%.3f"
+        line_format = delim.join([coord_format] * 2 + [band_format] * band_count) + "\n"
 
-    if isinstance(dst_nodata, Number):
-        dst_nodata = [dst_nodata] * band_count
-    if (dst_nodata is None) or (None in dst_nodata) or (src_nodata is None):
-        dst_nodata = None
-    if dst_nodata is not None:
-        dst_nodata = np.asarray(dst_nodata, dtype=np_dt)
-
-    skip_nodata = skip_nodata and (src_nodata is not None)
-    replace_nodata = (not skip_nodata) and (dst_nodata is not None)
-    process_nodata = skip_nodata or replace_nodata
+    src_nodata, dst_nodata, skip_nodata = get_nodata_values(
+        bands, np_dt, src_nodata, dst_nodata, skip_nodata
+    )
+    x_skip, y_skip = get_skip(skip)
 
-    if isinstance(skip, Sequence):
-        x_skip, y_skip = skip
-    else:
-        x_skip = y_skip = skip
-
-    x_off, y_off, x_size, y_size = srcwin
-    bands_count = len(bands)
-
-    nXBlocks = (x_size - x_off) // x_skip
-    nYBlocks = (y_size - y_off) // y_skip
-    progress_end = nXBlocks * nYBlocks
-    progress_curr = 0
-    progress_prev = -1
-    progress_parts = 100
+    point_count = get_point_count(srcwin, x_skip, y_skip)
 
     if return_np_arrays:
-        size = progress_end if pre_allocate_np_arrays else 0
-        all_geo_x = np.empty(size)
-        all_geo_y = np.empty(size)
-        all_data = np.empty((size, band_count), dtype=np_dt)
+        if pre_allocate_np_arrays:
+            all_geo_x = np.empty(point_count)
+            all_geo_y = np.empty(point_count)
+            all_data = np.empty((band_count, point_count), dtype=np_dt)
+        else:
+            blocks = []
 
-    # Loop emitting data.
+    # Loop emitting data, one block of rows at a time.
     idx = 0
-    for y in range(y_off, y_off + y_size, y_skip):
-
-        size = bands_count if pre_allocate_np_arrays else 0
-        data = np.empty((size, x_size), dtype=np_dt)  # dims: (bands_count, x_size)
-        for i_bnd, band in enumerate(bands):
-            band_data = band.ReadAsArray(x_off, y, x_size, 1)  # read one band line
-            if pre_allocate_np_arrays:
-                data[i_bnd] = band_data[0]
-            else:
-                data = np.append(data, band_data, axis=0)
-
-        for x_i in range(0, x_size, x_skip):
-
-            progress_curr += 1
-            if progress_callback:
-                progress_frac = progress_curr / progress_end
-                progress = int(progress_frac * progress_parts)
-                if progress > progress_prev:
-                    progress_prev = progress
-                    progress_callback(progress_frac)
-
-            x_i_data = data[:, x_i]  # single pixel, dims: (bands)
-            if process_nodata and np.array_equal(src_nodata, x_i_data):
-                if skip_nodata:
-                    continue
-                elif replace_nodata:
-                    x_i_data = dst_nodata
-
-            x = x_i + x_off
-
-            geo_x = gt[0] + (x + 0.5) * gt[1] + (y + 0.5) * gt[2]
-            geo_y = gt[3] + (x + 0.5) * gt[4] + (y + 0.5) * gt[5]
-
+    try:
+        for geo_x, geo_y, data in iter_xyz_blocks(
+            bands,
+            gt,
+            srcwin,
+            x_skip,
+            y_skip,
+            np_dt,
+            src_nodata=src_nodata,
+            dst_nodata=dst_nodata,
+            skip_nodata=skip_nodata,
+            progress_callback=progress_callback,
+        ):
             if dst_fh:
-                band_str = band_format % tuple(x_i_data)
-                line = frmt % (float(geo_x), float(geo_y), band_str)
-                dst_fh.write(line)
+                write_xyz_block(dst_fh, line_format, geo_x, geo_y, data)
+            if arrow_writer:
+                write_arrow_block(arrow_schema, arrow_writer, geo_x, geo_y, data)
             if return_np_arrays:
+                count = len(geo_x)
                 if pre_allocate_np_arrays:
-                    all_geo_x[idx] = geo_x
-                    all_geo_y[idx] = geo_y
-                    all_data[idx] = x_i_data
+                    all_geo_x[idx : idx + count] = geo_x
+                    all_geo_y[idx : idx + count] = geo_y
+                    all_data[:, idx : idx + count] = data
                 else:
-                    all_geo_x = np.append(all_geo_x, geo_x)
-                    all_geo_y = np.append(all_geo_y, geo_y)
-                    all_data = np.append(all_data, [x_i_data], axis=0)
-            idx += 1
+                    blocks.append((geo_x, geo_y, data))
+            idx += len(geo_x)
+    finally:
+        if arrow_writer:
+            arrow_writer.close()
+        if dst_fh and dst_fh is not sys.stdout:
+            dst_fh.close()
 
     if return_np_arrays:
-        nodata = None if skip_nodata else dst_nodata if replace_nodata else src_nodata
-        if idx != progress_curr:
+        if not pre_allocate_np_arrays:
+            all_geo_x, all_geo_y, all_data = concatenate_blocks(
+                blocks, band_count, np_dt
+            )
+        elif idx != point_count:
             all_geo_x = all_geo_x[:idx]
             all_geo_y = all_geo_y[:idx]
-            all_data = all_data[:idx, :]
-        result = all_geo_x, all_geo_y, all_data.transpose(), nodata
+            all_data = all_data[:, :idx]
+        nodata = get_output_nodata(src_nodata, dst_nodata, skip_nodata)
+        result = all_geo_x, all_geo_y, all_data, nodata
 
     return result
 
 
+def gdal2xyz_blocks(
+    srcfile: PathOrDS,
+    srcwin: Optional[Sequence[int]] = None,
+    skip: Union[int, Sequence[int]] = 1,
+    band_nums: Optional[Sequence[int]] = None,
+    skip_nodata: bool = False,
+    src_nodata: Optional[Union[Sequence, Number]] = None,
+    dst_nodata: Optional[Union[Sequence, Number]] = None,
+    progress_callback: OptionalProgressCallback = None,
+) -> Iterator[Tuple]:
+    """
+    translates a raster file (or dataset) into xyz numpy arrays, one block of rows at a time
+
+    yields a tuple of (geo_x, geo_y, data, nodata) for each block,
+    in the same form as the result of gdal2xyz with return_np_arrays=True,
+    so the points can be streamed without holding all of them in memory.
+    See gdal2xyz for the description of the arguments.
+    """
+    with gdal.ExceptionMgr(useExceptions=True):
+        progress_callback = get_progress_callback(progress_callback)
+
+        ds = open_ds(srcfile)
+        if ds is None:
+            raise Exception(f"Could not open {srcfile}.")
+
+        bands = get_bands(ds, band_nums)
+        gt = ds.GetGeoTransform()
+        if srcwin is None:
+            srcwin = (0, 0, ds.RasterXSize, ds.RasterYSize)
+        _dt, np_dt = GDALTypeCodeAndNumericTypeCodeFromDataSet(ds)
+
+        src_nodata, dst_nodata, skip_nodata = get_nodata_values(
+            bands, np_dt, src_nodata, dst_nodata, skip_nodata
+        )
+        nodata = get_output_nodata(src_nodata, dst_nodata, skip_nodata)
+        x_skip, y_skip = get_skip(skip)
+
+        blocks = iter_xyz_blocks(
+            bands,
+            gt,
+            srcwin,
+            x_skip,
+            y_skip,
+            np_dt,
+            src_nodata=src_nodata,
+            dst_nodata=dst_nodata,
+            skip_nodata=skip_nodata,
+            progress_callback=progress_callback,
+        )
+
+    # Only enable exceptions while reading a block, not while the caller consumes it.
+    while True:
+        with gdal.ExceptionMgr(useExceptions=True):
+            block = next(blocks, None)
+        if block is None:
+            return
+        geo_x, geo_y, data = block
+        yield geo_x, geo_y, data, nodata
+
+
 class GDAL2XYZ(GDALScript):
     def __init__(self):
         super().__init__()
@@ -247,6 +512,7 @@ class GDAL2XYZ(GDALScript):
             But supporting other options, for example:
             * Select more then one band;
             * Skip or replace nodata value;
+            * Write the output as Parquet or Arrow files;
             * Return the output as numpy arrays."""
         )
 
@@ -301,6 +567,16 @@ class GDAL2XYZ(GDALScript):
             help="Use comma instead of space as a delimiter.",
         )
 
+        parser.add_argument(
+            "-of",
+            dest="output_format",
+            metavar="format",
+            choices=OUTPUT_FORMATS,
+            help="Output format: XYZ (text), Parquet or Arrow (IPC file). "
+            "Parquet and Arrow require the pyarrow Python module. "
+            "Default: guessed from the extension of the destination file, otherwise XYZ.",
+        )
+
         parser.add_argument(
             "-skipnodata",
             "--skipnodata",
@@ -32,17 +32,27 @@
 # ******************************************************************************
 
 import argparse
+import ast
 import glob
+import math
+import operator
 import os
 import os.path
 import string
 import sys
 import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from numbers import Number
-from typing import Dict, Optional, Sequence, Tuple, Union
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
 
 import numpy
 
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
+
 from osgeo import gdal, gdal_array
 from osgeo_utils.auxiliary import extent_util
 from osgeo_utils.auxiliary.base import MaybeSequence, PathLikeOrStr, is_path_like
@@ -82,6 +92,309 @@ DefaultNDVLookup = {
 # tuple of available output datatypes names
 GDALDataTypeNames = tuple(gdal.GetDataTypeName(dt) for dt in DefaultNDVLookup.keys())
 
+# name of the boolean array, True where any input is nodata, in expressions
+NoDataMaskName = "nodata_mask"
+
+# tuple of available expression evaluators
+EvaluatorNames = ("eval", "fused", "numpy", "numexpr")
+
+# NumPy ufuncs equivalent to Python operators on arrays
+_BinaryOpUfuncs = {
+    ast.Add: numpy.add,
+    ast.Sub: numpy.subtract,
+    ast.Mult: numpy.multiply,
+    ast.Div: numpy.true_divide,
+    ast.FloorDiv: numpy.floor_divide,
+    ast.Mod: numpy.remainder,
+    ast.Pow: numpy.power,
+    ast.LShift: numpy.left_shift,
+    ast.RShift: numpy.right_shift,
+    ast.BitAnd: numpy.bitwise_and,
+    ast.BitOr: numpy.bitwise_or,
+    ast.BitXor: numpy.bitwise_xor,
+    ast.Lt: numpy.less,
+    ast.LtE: numpy.less_equal,
+    ast.Gt: numpy.greater,
+    ast.GtE: numpy.greater_equal,
+    ast.Eq: numpy.equal,
+    ast.NotEq: numpy.not_equal,
+}
+_UnaryOpUfuncs = {
+    ast.USub: numpy.negative,
+    ast.UAdd: numpy.positive,
+    ast.Invert: numpy.invert,
+}
+# Python operators, applied when all operands are Python scalars
+_PythonOperators = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Invert: operator.invert,
+}
+
+
+class CalcEvaluator:
+    """Evaluate a calc expression on blocks of data.
+
+    The expression is parsed and compiled once, and then evaluated for each
+    block with a namespace holding the arrays of the input alphas.
+
+    evaluator is one of:
+        "eval": evaluate the compiled expression with eval(), each NumPy
+            operator allocating its own temporary array.
+        "numpy": call the NumPy ufuncs equivalent to the operators and
+            functions of the expression with their out= argument, so that the
+            temporary arrays of the previous block are reused. Parts of the
+            expression that are not operators or calls to ufuncs by their bare
+            name (e.g. sqrt(A), but not numpy.sqrt(A)) are evaluated with
+            eval().
+        "numexpr": evaluate the expression with numexpr, in a single
+            multi-threaded pass over the data. The "numpy" evaluator is used
+            instead if numexpr cannot evaluate the expression.
+        "fused": "numexpr" if numexpr is available, "numpy" otherwise.
+    """
+
+    def __init__(
+        self,
+        calc: str,
+        evaluator: str,
+        global_namespace: Dict,
+        local_names: Sequence[str],
+        debug: bool = False,
+    ):
+        if evaluator not in EvaluatorNames:
+            raise Exception(f"Error! Unknown evaluator {evaluator}")
+        if evaluator == "numexpr" and numexpr is None:
+            raise Exception("Error! numexpr evaluator requested but numexpr is missing")
+        if evaluator == "fused":
+            evaluator = "numexpr" if numexpr is not None else "numpy"
+
+        self.calc = calc
+        self.evaluator = evaluator
+        self.global_namespace = global_namespace
+        self.local_names = set(local_names)
+        self.debug = debug
+        try:
+            self.tree = ast.parse(calc.strip(), mode="eval")
+            self.code = compile(self.tree, "<calc>", "eval")
+        except SyntaxError:
+            print(f"evaluation of calculation {calc} failed")
+            raise
+        # names referenced by the expression
+        self.names = {
+            node.id for node in ast.walk(self.tree) if isinstance(node, ast.Name)
+        }
+
+        if evaluator == "numpy":
+            self._evaluate = self._compile_node(self.tree.body)
+        elif evaluator == "numexpr":
+            # names that are not inputs, such as user_namespace constants
+            self.numexpr_globals = {
+                key: value
+                for key, value in global_namespace.items()
+                if isinstance(value, (Number, numpy.ndarray))
+            }
+            self.numexpr_checked = False
+            self._evaluate = self._evaluate_numexpr
+        else:
+            self._evaluate = self._evaluate_eval
+
+    def evaluate(self, local_namespace: Dict):
+        return self._evaluate(local_namespace)
+
+    def _evaluate_eval(self, local_namespace: Dict):
+        return eval(self.code, self.global_namespace, local_namespace)
+
+    def _evaluate_numexpr(self, local_namespace: Dict):
+        try:
+            result = numexpr.evaluate(
+                self.calc, local_dict=local_namespace, global_dict=self.numexpr_globals
+            )
+        except (KeyError, NotImplementedError, SyntaxError, TypeError, ValueError):
+            # Only fallback if the very first evaluation fails
+            if self.numexpr_checked:
+                raise
+            if self.debug:
+                print(f"numexpr cannot evaluate {self.calc}, using the numpy evaluator")
+            self.evaluator = "numpy"
+            self._evaluate = self._compile_node(self.tree.body)
+            return self._evaluate(local_namespace)
+        self.numexpr_checked = True
+        return result
+
+    def _lookup(self, name: str, local_namespace: Dict):
+        if name in local_namespace:
+            return local_namespace[name]
+        return self.global_namespace[name]
+
+    def _compile_node(self, node: ast.AST):
+        """Return a function evaluating node for a given local namespace"""
+
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda local_namespace: value
+
+        if isinstance(node, ast.Name):
+            name = node.id
+            return lambda local_namespace: self._lookup(name, local_namespace)
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BinaryOpUfuncs:
+            return self._compile_ufunc(
+                _BinaryOpUfuncs[type(node.op)],
+                _PythonOperators[type(node.op)],
+                [node.left, node.right],
+            )
+
+        if (
+            isinstance(node, ast.Compare)
+            and len(node.ops) == 1
+            and type(node.ops[0]) in _BinaryOpUfuncs
+        ):
+            return self._compile_ufunc(
+                _BinaryOpUfuncs[type(node.ops[0])],
+                _PythonOperators[type(node.ops[0])],
+                [node.left, node.comparators[0]],
+            )
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UnaryOpUfuncs:
+            return self._compile_ufunc(
+                _UnaryOpUfuncs[type(node.op)],
+                _PythonOperators[type(node.op)],
+                [node.operand],
+            )
+
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id not in self.local_names
+            and not node.keywords
+            and not any(isinstance(arg, ast.Starred) for arg in node.args)
+        ):
+            func = self.global_namespace.get(node.func.id)
+            if (
+                isinstance(func, numpy.ufunc)
+                and func.nout == 1
+                and func.nin == len(node.args)
+            ):
+                return self._compile_ufunc(func, func, node.args)
+
+        # Anything else is evaluated as is
+        return self._compile_eval(node)
+
+    def _compile_eval(self, node: ast.AST):
+        code = compile(ast.Expression(body=node), "<calc>", "eval")
+        return lambda local_namespace: eval(
+            code, self.global_namespace, local_namespace
+        )
+
+    def _compile_ufunc(
+        self, ufunc: numpy.ufunc, scalar_func: Callable, args: Sequence[ast.AST]
+    ):
+        """Return a function calling ufunc, reusing its previous result array.
+
+        scalar_func is called instead when all arguments are Python scalars.
+        """
+
+        arg_funcs = [self._compile_node(arg) for arg in args]
+        out = None
+        out_signature = None
+
+        def evaluate(local_namespace):
+            nonlocal out, out_signature
+            arg_values = [arg_func(local_namespace) for arg_func in arg_funcs]
+            if not any(
+                isinstance(value, (numpy.ndarray, numpy.generic))
+                for value in arg_values
+            ):
+                # Operations on Python scalars must keep their Python
+                # semantics (e.g. 2*3 is a Python int, not a numpy.int64)
+                return scalar_func(*arg_values)
+            signature = tuple(
+                (value.dtype, value.shape)
+                if isinstance(value, (numpy.ndarray, numpy.generic))
+                else type(value)
+                for value in arg_values
+            )
+            if out is not None and signature == out_signature:
+                return ufunc(*arg_values, out=out)
+            result = ufunc(*arg_values)
+            if isinstance(result, numpy.ndarray):
+                out = result
+                out_signature = signature
+            return result
+
+        return evaluate
+
+
+def get_window_size(
+    dimensions: Sequence[int],
+    block_sizes: Sequence[Sequence[int]],
+    bytes_per_pixel: int,
+    max_window_memory: int,
+    min_window_count: int = 1,
+) -> Tuple[int, int]:
+    """Return the (xsize, ysize) of the windows in which rasters are processed.
+
+    The window size is a multiple of all block_sizes (clamped to the raster
+    dimensions), so that no block is read or written by several windows.
+    It is then enlarged, first to whole rows of blocks and then to several
+    rows, while the window fits in max_window_memory bytes (given
+    bytes_per_pixel), and while there are at least min_window_count windows.
+    """
+    xsize, ysize = dimensions
+
+    def lcm(values, size):
+        result = 1
+        for value in values:
+            result = result * value // math.gcd(result, value)
+            if result >= size:
+                return size
+        return result
+
+    base_xsize = lcm([block_size[0] for block_size in block_sizes], xsize)
+    base_ysize = lcm([block_size[1] for block_size in block_sizes], ysize)
+    max_pixels = max(1, max_window_memory // max(1, bytes_per_pixel))
+    if base_xsize * base_ysize > max_pixels:
+        # blocks of inputs and output do not match well: only align windows
+        # on the blocks of the output (the last block size)
+        base_xsize = min(block_sizes[-1][0], xsize)
+        base_ysize = min(block_sizes[-1][1], ysize)
+
+    # enlarge to whole rows of blocks, or as many blocks as possible
+    k = max(1, max_pixels // (base_xsize * base_ysize))
+    win_xsize = min(k * base_xsize, xsize)
+
+    # then to several rows of blocks
+    win_ysize = base_ysize
+    if win_xsize == xsize:
+        k = max(1, max_pixels // (xsize * base_ysize))
+        win_ysize = min(k * base_ysize, ysize)
+
+        # but keep at least min_window_count windows (e.g. for threads)
+        max_win_ysize = -(-ysize // max(1, min_window_count))
+        max_win_ysize = max(base_ysize, max_win_ysize - max_win_ysize % base_ysize)
+        win_ysize = min(win_ysize, max_win_ysize)
+
+    return win_xsize, win_ysize
+
+
 """ Perform raster calculations with numpy syntax.
 Use any basic arithmetic supported by numpy arrays such as +-* along with logical
 operators such as >. Note that all files must have the same dimensions, but no projection checking is performed.
@@ -127,6 +440,9 @@ def Calc(
     debug: bool = False,
     quiet: bool = False,
     progress_callback: Optional = gdal.TermProgress_nocb,
+    evaluator: str = "eval",
+    threads: int = 1,
+    max_window_memory: int = 64,
     **input_files,
 ):
 
@@ -212,6 +528,7 @@ def Calc(
     GeoTransforms = []  # GeoTransform of each input file
     GeoTransformDiffer = False  # True if we have inputs with different GeoTransforms
     myTempFileNames = []  # vrt filename from each input file
+    myOpenNames = []  # filename to open each input file (None for Datasets)
     myAlphaFileLists = []  # list of the Alphas which holds a list of inputs
 
     # loop through input files - checking dimensions
@@ -247,6 +564,7 @@ def Calc(
                     raise IOError(f"No such file or directory: '{filename}'")
 
                 myFileNames.append(filename)
+                myOpenNames.append(filename)
                 myFiles.append(myFile)
                 myBands.append(myBand)
                 myAlphaList.append(alpha)
@@ -332,6 +650,18 @@ def Calc(
     else:
         allBandsCount = len(calc)
 
+    if threads < 1:
+        raise Exception("Error! threads must be at least 1")
+    if max_window_memory <= 0:
+        raise Exception("Error! max_window_memory must be strictly positive")
+
+    # parse and compile the expressions once, and not for each block
+    calc_evaluators = [
+        CalcEvaluator(c, evaluator, global_namespace, myAlphaList, debug) for c in calc
+    ]
+    if debug:
+        print(f"using {calc_evaluators[0].evaluator} evaluator")
+
     if extent not in [Extent.IGNORE, Extent.FAIL] and (
         GeoTransformDiffer or isinstance(extent, GeoRectangle)
     ):
@@ -345,17 +675,28 @@ def Calc(
         )
         if GeoTransformCheck is None:
             raise Exception("Error! The requested extent is empty. Cannot proceed")
+        # in-memory vrt of each input file, shared by inputs from the same file
+        temp_vrts = {}
         for i in range(len(myFileNames)):
-            temp_vrt_filename, temp_vrt_ds = extent_util.make_temp_vrt(
-                myFiles[i], ExtentCheck
-            )
-            myTempFileNames.append(temp_vrt_filename)
+            if tuple(GeoTransforms[i]) == tuple(GeoTransformCheck) and list(
+                Dimensions[i]
+            ) == list(DimensionsCheck):
+                # already on the output grid
+                continue
+            key = myFileNames[i] if myFileNames[i] is not None else id(myFiles[i])
+            if key not in temp_vrts:
+                temp_vrts[key] = extent_util.make_temp_vrt(myFiles[i], ExtentCheck)
+                myTempFileNames.append(temp_vrts[key][0])
+            temp_vrt_filename, temp_vrt_ds = temp_vrts[key]
+            if myOpenNames[i] is not None:
+                myOpenNames[i] = temp_vrt_filename
             myFiles[i] = None  # close original ds
             myFiles[i] = temp_vrt_ds  # replace original ds with vrt_ds
 
             # update the new precise dimensions and gt from the new ds
             GeoTransformCheck = temp_vrt_ds.GetGeoTransform()
             DimensionsCheck = [temp_vrt_ds.RasterXSize, temp_vrt_ds.RasterYSize]
+        temp_vrts = None
         temp_vrt_ds = None
 
     ################################################################
@@ -480,34 +821,41 @@ def Calc(
     # find block size to chop grids into bite-sized chunks
     ################################################################
 
-    # use the block size of the first layer to read efficiently
-    myBlockSize = myFiles[0].GetRasterBand(myBands[0]).GetBlockSize()
+    # use windows aligned on the blocks of all inputs and of the output,
+    # as large as allowed by max_window_memory
+    myBlockSizes = [
+        myFile.GetRasterBand(myBand).GetBlockSize()
+        for myFile, myBand in zip(myFiles, myBands)
+    ]
+    myBlockSizes.append(myOut.GetRasterBand(1).GetBlockSize())
+    myBytesPerPixel = sum(
+        gdal.GetDataTypeSize(dt) // 8 for dt in myDataTypeNum + [myOutType]
+    )
+    myBlockSize = get_window_size(
+        DimensionsCheck,
+        myBlockSizes,
+        myBytesPerPixel,
+        max_window_memory * 1024 * 1024,
+        min_window_count=4 * threads if threads > 1 else 1,
+    )
     # find total x and y blocks to be read
     nXBlocks = (int)((DimensionsCheck[0] + myBlockSize[0] - 1) / myBlockSize[0])
     nYBlocks = (int)((DimensionsCheck[1] + myBlockSize[1] - 1) / myBlockSize[1])
-    myBufSize = myBlockSize[0] * myBlockSize[1]
 
     if debug:
         print(f"using blocksize {myBlockSize[0]} x {myBlockSize[1]}")
 
     # variables for displaying progress
-    ProgressCt = -1
+    ProgressCt = 0
     ProgressEnd = nXBlocks * nYBlocks * allBandsCount
 
     ################################################################
-    # start looping through each band in allBandsCount
+    # find the arrays to allocate for alphas with multiple files
     ################################################################
 
+    count_file_per_alpha_per_band = {}
+    largest_datatype_per_alpha_per_band = {}
     for bandNo in range(1, allBandsCount + 1):
-
-        ################################################################
-        # start looping through blocks of data
-        ################################################################
-
-        # store these numbers in variables that may change later
-        nXValid = myBlockSize[0]
-        nYValid = myBlockSize[1]
-
         count_file_per_alpha = {}
         largest_datatype_per_alpha = {}
         for i, Alpha in enumerate(myAlphaList):
@@ -527,139 +875,252 @@ def Calc(
                         largest_datatype_per_alpha[Alpha] = gdal.DataTypeUnion(
                             largest_datatype_per_alpha[Alpha], band.DataType
                         )
+        count_file_per_alpha_per_band[bandNo] = count_file_per_alpha
+        largest_datatype_per_alpha_per_band[bandNo] = largest_datatype_per_alpha
 
-        # loop through X-lines
-        for X in range(0, nXBlocks):
+    ################################################################
+    # set up per-thread input datasets and evaluators
+    ################################################################
 
-            # in case the blocks don't fit perfectly
-            # change the block size of the final piece
-            if X == nXBlocks - 1:
-                nXValid = DimensionsCheck[0] - X * myBlockSize[0]
-
-            # find X offset
-            myX = X * myBlockSize[0]
-
-            # reset buffer size for start of Y loop
-            nYValid = myBlockSize[1]
-            myBufSize = nXValid * nYValid
-
-            # loop through Y lines
-            for Y in range(0, nYBlocks):
-                ProgressCt += 1
-                if not quiet:
-                    progress_callback(float(ProgressCt) / ProgressEnd, "", None)
-
-                # change the block size of the final piece
-                if Y == nYBlocks - 1:
-                    nYValid = DimensionsCheck[1] - Y * myBlockSize[1]
-                    myBufSize = nXValid * nYValid
-
-                # find Y offset
-                myY = Y * myBlockSize[1]
-
-                # create empty buffer to mark where nodata occurs
-                myNDVs = None
-
-                # make local namespace for calculation
-                local_namespace = {}
-
-                # Create destination numpy arrays for each alpha
-                numpy_arrays = {}
-                counter_per_alpha = {}
-                for Alpha in count_file_per_alpha:
-                    dtype = gdal_array.GDALTypeCodeToNumericTypeCode(
-                        largest_datatype_per_alpha[Alpha]
+    thread_local = threading.local()
+    # inputs that can only be read through the caller's Dataset object must
+    # not be read concurrently
+    myReadLocks = [
+        threading.Lock() if threads > 1 and name is None else None
+        for name in myOpenNames
+    ]
+    myOutLock = threading.Lock()
+
+    myOutDType = numpy.dtype(gdal_array.GDALTypeCodeToNumericTypeCode(myOutType))
+
+    def set_nodata(myResult, myNDVs):
+        """Return a copy of myResult with the output NDV where myNDVs is True.
+
+        The copy is done into a buffer, reused from block to block, of the
+        output data type if it can hold all values of myResult and the output
+        NDV, so that it is written without conversion, or of the data type of
+        myResult (or float64 if the NDV does not fit in it) otherwise, so that
+        out of range values are clamped when written as before.
+        """
+
+        def ndv_fits(dtype):
+            ndv = numpy.array(myOutNDV)
+            try:
+                with numpy.errstate(invalid="ignore", over="ignore"):
+                    return numpy.array_equal(
+                        ndv.astype(dtype), ndv, equal_nan=ndv.dtype.kind == "f"
                     )
-                    if count_file_per_alpha[Alpha] == 1:
-                        numpy_arrays[Alpha] = numpy.empty(
-                            (nYValid, nXValid), dtype=dtype
-                        )
-                    else:
-                        numpy_arrays[Alpha] = numpy.empty(
-                            (count_file_per_alpha[Alpha], nYValid, nXValid), dtype=dtype
-                        )
-                    counter_per_alpha[Alpha] = 0
+            except (OverflowError, TypeError, ValueError):
+                return False
+
+        result_dtype = numpy.result_type(myResult)
+        if numpy.can_cast(result_dtype, myOutDType, "safe") and ndv_fits(myOutDType):
+            dtype = myOutDType
+        elif ndv_fits(result_dtype):
+            dtype = result_dtype
+        else:
+            dtype = numpy.dtype(numpy.float64)
+
+        buffers = getattr(thread_local, "nodata_buffers", None)
+        if buffers is None:
+            buffers = thread_local.nodata_buffers = {}
+        key = (myNDVs.shape, dtype)
+        buf = buffers.get(key)
+        if buf is None:
+            buf = buffers[key] = numpy.empty(myNDVs.shape, dtype=dtype)
+
+        numpy.copyto(buf, myResult, casting="unsafe")
+        numpy.putmask(buf, myNDVs, myOutNDV)
+        return buf
+
+    def get_thread_inputs():
+        """Return the input datasets and evaluators of the current thread"""
+        if threads <= 1:
+            return myFiles, calc_evaluators
+        if not hasattr(thread_local, "files"):
+            thread_local.files = [
+                myFile if name is None else open_ds(name)
+                for myFile, name in zip(myFiles, myOpenNames)
+            ]
+            thread_local.evaluators = [
+                CalcEvaluator(c, evaluator, global_namespace, myAlphaList) for c in calc
+            ]
+        return thread_local.files, thread_local.evaluators
+
+    def read_band_array(myFile, i, myBandNo, myX, myY, nXValid, nYValid, buf_obj):
+        band = myFile.GetRasterBand(myBandNo)
+        if myReadLocks[i] is None:
+            return gdal_array.BandReadAsArray(
+                band,
+                xoff=myX,
+                yoff=myY,
+                win_xsize=nXValid,
+                win_ysize=nYValid,
+                buf_obj=buf_obj,
+            )
+        with myReadLocks[i]:
+            return gdal_array.BandReadAsArray(
+                band,
+                xoff=myX,
+                yoff=myY,
+                win_xsize=nXValid,
+                win_ysize=nYValid,
+                buf_obj=buf_obj,
+            )
+
+    ################################################################
+    # block processing
+    ################################################################
 
-                # fetch data for each input layer
-                for i, Alpha in enumerate(myAlphaList):
+    def process_block(bandNo, myX, myY, nXValid, nYValid):
+        """Read, compute and write a block of the output band bandNo"""
 
-                    # populate lettered arrays with values
-                    if allBandsIndex is not None and allBandsIndex == i:
-                        myBandNo = bandNo
-                    else:
-                        myBandNo = myBands[i]
+        files, evaluators = get_thread_inputs()
+        count_file_per_alpha = count_file_per_alpha_per_band[bandNo]
+        largest_datatype_per_alpha = largest_datatype_per_alpha_per_band[bandNo]
 
-                    if Alpha in myAlphaFileLists:
-                        if count_file_per_alpha[Alpha] == 1:
-                            buf_obj = numpy_arrays[Alpha]
-                        else:
-                            buf_obj = numpy_arrays[Alpha][counter_per_alpha[Alpha]]
-                        myval = gdal_array.BandReadAsArray(
-                            myFiles[i].GetRasterBand(myBandNo),
-                            xoff=myX,
-                            yoff=myY,
-                            win_xsize=nXValid,
-                            win_ysize=nYValid,
-                            buf_obj=buf_obj,
-                        )
-                        counter_per_alpha[Alpha] += 1
-                    else:
-                        myval = gdal_array.BandReadAsArray(
-                            myFiles[i].GetRasterBand(myBandNo),
-                            xoff=myX,
-                            yoff=myY,
-                            win_xsize=nXValid,
-                            win_ysize=nYValid,
-                        )
-                    if myval is None:
-                        raise Exception(
-                            f"Input block reading failed from filename {filename[i]}"
-                        )
+        # create empty buffer to mark where nodata occurs
+        myNDVs = None
+
+        # make local namespace for calculation
+        local_namespace = {}
+
+        # Create destination numpy arrays for each alpha
+        numpy_arrays = {}
+        counter_per_alpha = {}
+        for Alpha in count_file_per_alpha:
+            dtype = gdal_array.GDALTypeCodeToNumericTypeCode(
+                largest_datatype_per_alpha[Alpha]
+            )
+            if count_file_per_alpha[Alpha] == 1:
+                numpy_arrays[Alpha] = numpy.empty((nYValid, nXValid), dtype=dtype)
+            else:
+                numpy_arrays[Alpha] = numpy.empty(
+                    (count_file_per_alpha[Alpha], nYValid, nXValid), dtype=dtype
+                )
+            counter_per_alpha[Alpha] = 0
+
+        # fetch data for each input layer
+        for i, Alpha in enumerate(myAlphaList):
+
+            # populate lettered arrays with values
+            if allBandsIndex is not None and allBandsIndex == i:
+                myBandNo = bandNo
+            else:
+                myBandNo = myBands[i]
 
-                    # fill in nodata values
-                    if myNDV[i] is not None:
-                        # myNDVs is a boolean buffer.
-                        # a cell equals to 1 if there is NDV in any of the corresponding cells in input raster bands.
-                        if myNDVs is None:
-                            # this is the first band that has NDV set. we initializes myNDVs to a zero buffer
-                            # as we didn't see any NDV value yet.
-                            myNDVs = numpy.zeros(myBufSize)
-                            myNDVs.shape = (nYValid, nXValid)
-                        myNDVs = 1 * numpy.logical_or(myNDVs == 1, myval == myNDV[i])
-
-                    # add an array of values for this block to the eval namespace
-                    if Alpha not in myAlphaFileLists:
-                        local_namespace[Alpha] = myval
-                    myval = None
-
-                for lst in myAlphaFileLists:
-                    local_namespace[lst] = numpy_arrays[lst]
-
-                # try the calculation on the array blocks
-                this_calc = calc[bandNo - 1 if len(calc) > 1 else 0]
-                try:
-                    myResult = eval(this_calc, global_namespace, local_namespace)
-                except Exception:
-                    print(f"evaluation of calculation {this_calc} failed")
-                    raise
-
-                # Propagate nodata values (set nodata cells to zero
-                # then add nodata value to these cells).
-                if myNDVs is not None and myOutNDV is not None:
-                    myResult = ((1 * (myNDVs == 0)) * myResult) + (myOutNDV * myNDVs)
-                elif not isinstance(myResult, numpy.ndarray):
-                    myResult = numpy.ones((nYValid, nXValid)) * myResult
-
-                # write data block to the output file
-                myOutB = myOut.GetRasterBand(bandNo)
-                if gdal_array.BandWriteArray(myOutB, myResult, xoff=myX, yoff=myY) != 0:
-                    raise Exception("Block writing failed")
-                myOutB = None  # write to band
+            if Alpha in myAlphaFileLists:
+                if count_file_per_alpha[Alpha] == 1:
+                    buf_obj = numpy_arrays[Alpha]
+                else:
+                    buf_obj = numpy_arrays[Alpha][counter_per_alpha[Alpha]]
+                counter_per_alpha[Alpha] += 1
+            else:
+                buf_obj = None
+            myval = read_band_array(
+                files[i], i, myBandNo, myX, myY, nXValid, nYValid, buf_obj
+            )
+            if myval is None:
+                raise Exception(
+                    f"Input block reading failed from filename {myFileNames[i]}"
+                )
+
+            # fill in nodata values
+            if myNDV[i] is not None:
+                # myNDVs is a boolean mask, True where there is NDV in any of
+                # the corresponding cells in input raster bands.
+                if math.isnan(myNDV[i]):
+                    myvalNDVs = numpy.isnan(myval)
+                else:
+                    myvalNDVs = myval == myNDV[i]
+                if myNDVs is None:
+                    # this is the first band that has NDV set
+                    myNDVs = myvalNDVs
+                else:
+                    myNDVs |= myvalNDVs
+                myvalNDVs = None
+
+            # add an array of values for this block to the eval namespace
+            if Alpha not in myAlphaFileLists:
+                local_namespace[Alpha] = myval
+            myval = None
+
+        for lst in myAlphaFileLists:
+            local_namespace[lst] = numpy_arrays[lst]
+
+        # expose the nodata mask to the expression
+        calc_evaluator = evaluators[bandNo - 1 if len(calc) > 1 else 0]
+        if NoDataMaskName in calc_evaluator.names:
+            local_namespace[NoDataMaskName] = (
+                myNDVs
+                if myNDVs is not None
+                else numpy.zeros((nYValid, nXValid), dtype=bool)
+            )
+
+        # try the calculation on the array blocks
+        try:
+            myResult = calc_evaluator.evaluate(local_namespace)
+        except Exception:
+            print(f"evaluation of calculation {calc_evaluator.calc} failed")
+            raise
+
+        # Propagate nodata values
+        if myNDVs is not None and myOutNDV is not None:
+            myResult = set_nodata(myResult, myNDVs)
+        elif not isinstance(myResult, numpy.ndarray):
+            myResult = numpy.ones((nYValid, nXValid)) * myResult
+
+        # write data block to the output file. Blocks are written by the
+        # thread that computed them, before the evaluator reuses its arrays.
+        with myOutLock:
+            myOutB = myOut.GetRasterBand(bandNo)
+            if gdal_array.BandWriteArray(myOutB, myResult, xoff=myX, yoff=myY) != 0:
+                raise Exception("Block writing failed")
+            myOutB = None  # write to band
+
+    # list the blocks of all bands, in the order they are processed:
+    # row-major, so that the output file is written sequentially
+    blocks = []
+    for bandNo in range(1, allBandsCount + 1):
+        for Y in range(0, nYBlocks):
+            myY = Y * myBlockSize[1]
+            # in case the blocks don't fit perfectly
+            # change the block size of the final piece
+            nYValid = min(myBlockSize[1], DimensionsCheck[1] - myY)
+            for X in range(0, nXBlocks):
+                myX = X * myBlockSize[0]
+                nXValid = min(myBlockSize[0], DimensionsCheck[0] - myX)
+                blocks.append((bandNo, myX, myY, nXValid, nYValid))
+
+    if threads <= 1:
+        for block in blocks:
+            process_block(*block)
+            ProgressCt += 1
+            if not quiet:
+                progress_callback(float(ProgressCt) / ProgressEnd, "", None)
+    else:
+        if debug:
+            print(f"using {threads} threads")
+        # The GDAL exception mode is thread-local
+        thread_process_block = enable_gdal_exceptions(process_block)
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futures = [executor.submit(thread_process_block, *b) for b in blocks]
+            try:
+                # report progress as blocks are completed, in order
+                for future in futures:
+                    future.result()
+                    ProgressCt += 1
+                    if not quiet:
+                        progress_callback(float(ProgressCt) / ProgressEnd, "", None)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
 
     # remove temp files
-    for idx, tempFile in enumerate(myTempFileNames):
-        myFiles[idx] = None
-        os.remove(tempFile)
+    myFiles = None  # close vrt datasets
+    for tempFile in myTempFileNames:
+        gdal.Unlink(tempFile)
 
     gdal.ErrorReset()
     myOut.FlushCache()
@@ -884,6 +1345,39 @@ class GDALCalc(GDALScript):
             help="check that all rasters share the same projection",
         )
 
+        parser.add_argument(
+            "--evaluator",
+            dest="evaluator",
+            type=str,
+            default="eval",
+            choices=EvaluatorNames,
+            help="how to evaluate the calculation: eval (Python eval), "
+            "numpy (NumPy ufuncs reusing their output arrays), numexpr, "
+            "or fused (numexpr if available, numpy otherwise). The numpy "
+            "evaluator fuses operators and calls to ufuncs by their bare name, "
+            "such as sqrt(A). Attribute calls, such as numpy.sqrt(A), and "
+            "other functions are evaluated with eval()",
+        )
+
+        parser.add_argument(
+            "--threads",
+            dest="threads",
+            type=int,
+            default=1,
+            metavar="N",
+            help="number of threads computing blocks in parallel",
+        )
+
+        parser.add_argument(
+            "--max-window-memory",
+            dest="max_window_memory",
+            type=int,
+            default=64,
+            metavar="MB",
+            help="maximum size in MB of the input and output data of a window "
+            "(default 64)",
+        )
+
         # parser.add_argument('--namespace', dest='user_namespace', action='extend', nargs='*', type=str)
 
         return parser
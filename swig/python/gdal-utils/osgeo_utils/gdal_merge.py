@@ -32,15 +32,94 @@
 
 import math
 import sys
+import threading
 import time
+from collections import OrderedDict
 
 from osgeo import gdal
-from osgeo_utils.auxiliary.util import GetOutputDriverFor
+from osgeo_utils.auxiliary.util import GetOutputDriverFor, enable_gdal_exceptions
 
 progress = gdal.TermProgress_nocb
 
 __version__ = "$id$"[5:-1]
 
+# Default memory budget, in megabytes, of the buffers used to copy one chunk
+# of a source into the target.
+DEFAULT_MAX_MEMORY = 64
+
+# Maximum number of source files kept open by each thread of tiled_copy().
+SOURCE_CACHE_SIZE = 32
+
+
+# =============================================================================
+def get_chunk_windows(band, xoff, yoff, xsize, ysize, bytes_per_pixel, max_memory):
+    """
+    Split a window of a band into chunks aligned on its block boundaries.
+
+    band -- gdal.Band whose block size drives the alignment of the chunks.
+    xoff, yoff, xsize, ysize -- window to split, in pixels.
+    bytes_per_pixel -- number of bytes needed per pixel to process a chunk.
+    max_memory -- memory budget of a chunk, in megabytes.
+
+    Returns a list of (xoff, yoff, xsize, ysize) tuples covering the window
+    in row-major order. Chunks span whole rows of blocks of the window when
+    possible, so that each block of band is read or written only once.
+    """
+    max_pixels = max(1, int(max_memory * 1024 * 1024 / bytes_per_pixel))
+    block_xsize, block_ysize = band.GetBlockSize()
+    block_xsize = min(block_xsize, xsize)
+    if block_xsize > max_pixels:
+        block_xsize = max_pixels
+    if block_xsize * min(block_ysize, ysize) > max_pixels:
+        # A single block does not fit in the budget (e.g. formats exposing
+        # the whole raster as one block): give up vertical alignment.
+        block_ysize = max(1, max_pixels // block_xsize)
+
+    if xsize * min(block_ysize, ysize) <= max_pixels:
+        chunk_xsize = xsize
+        chunk_ysize = max(1, max_pixels // (xsize * block_ysize)) * block_ysize
+    else:
+        chunk_xsize = max(1, max_pixels // (block_xsize * block_ysize)) * block_xsize
+        chunk_ysize = block_ysize
+
+    windows = []
+    y = yoff
+    while y < yoff + ysize:
+        y_end = min(yoff + ysize, (y // block_ysize) * block_ysize + chunk_ysize)
+        x = xoff
+        while x < xoff + xsize:
+            if chunk_xsize >= xsize:
+                x_end = xoff + xsize
+            else:
+                x_end = min(
+                    xoff + xsize, (x // block_xsize) * block_xsize + chunk_xsize
+                )
+            windows.append((x, y, x_end - x, y_end - y))
+            x = x_end
+        y = y_end
+    return windows
+
+
+def source_window(
+    s_xoff, s_yoff, s_xsize, s_ysize, t_xoff, t_yoff, t_xsize, t_ysize, window
+):
+    """
+    Return the (possibly fractional) source window matching a chunk of the
+    target window, so that reading it chunk by chunk gives the same result as
+    reading the whole source window at once.
+    """
+    x, y, xsize, ysize = window
+    if s_xsize == t_xsize and s_ysize == t_ysize:
+        return (s_xoff + x - t_xoff, s_yoff + y - t_yoff, xsize, ysize)
+    x_ratio = s_xsize / t_xsize
+    y_ratio = s_ysize / t_ysize
+    return (
+        s_xoff + (x - t_xoff) * x_ratio,
+        s_yoff + (y - t_yoff) * y_ratio,
+        xsize * x_ratio,
+        ysize * y_ratio,
+    )
+
 
 # =============================================================================
 def raster_copy(
@@ -58,6 +137,7 @@ def raster_copy(
     t_band_n,
     nodata=None,
     verbose=0,
+    max_memory=DEFAULT_MAX_MEMORY,
 ):
 
     if verbose != 0:
@@ -81,16 +161,11 @@ def raster_copy(
             t_ysize,
             t_band_n,
             nodata,
+            max_memory,
         )
 
     s_band = s_fh.GetRasterBand(s_band_n)
-    m_band = None
-    # Works only in binary mode and doesn't take into account
-    # intermediate transparency values for compositing.
-    if s_band.GetMaskFlags() != gdal.GMF_ALL_VALID:
-        m_band = s_band.GetMaskBand()
-    elif s_band.GetColorInterpretation() == gdal.GCI_AlphaBand:
-        m_band = s_band
+    m_band = get_mask_band(s_band)
     if m_band is not None:
         return raster_copy_with_mask(
             s_fh,
@@ -106,57 +181,203 @@ def raster_copy(
             t_ysize,
             t_band_n,
             m_band,
+            max_memory,
         )
 
     s_band = s_fh.GetRasterBand(s_band_n)
     t_band = t_fh.GetRasterBand(t_band_n)
 
-    data = s_band.ReadRaster(
-        s_xoff, s_yoff, s_xsize, s_ysize, t_xsize, t_ysize, t_band.DataType
-    )
-    t_band.WriteRaster(
-        t_xoff, t_yoff, t_xsize, t_ysize, data, t_xsize, t_ysize, t_band.DataType
-    )
+    bytes_per_pixel = gdal.GetDataTypeSize(t_band.DataType) // 8
+    for window in get_chunk_windows(
+        t_band, t_xoff, t_yoff, t_xsize, t_ysize, bytes_per_pixel, max_memory
+    ):
+        x, y, xsize, ysize = window
+        s_window = source_window(
+            s_xoff, s_yoff, s_xsize, s_ysize, t_xoff, t_yoff, t_xsize, t_ysize, window
+        )
+        data = s_band.ReadRaster(*s_window, xsize, ysize, t_band.DataType)
+        t_band.WriteRaster(x, y, xsize, ysize, data, xsize, ysize, t_band.DataType)
 
     return 0
 
 
 # =============================================================================
+def get_mask_band(s_band):
+    """
+    Return the band telling which pixels of s_band are valid, or None if
+    all of them are.
 
+    Works only in binary mode and doesn't take into account intermediate
+    transparency values for compositing.
+    """
+    if s_band.GetMaskFlags() != gdal.GMF_ALL_VALID:
+        return s_band.GetMaskBand()
+    if s_band.GetColorInterpretation() == gdal.GCI_AlphaBand:
+        return s_band
+    return None
 
-def raster_copy_with_nodata(
-    s_fh,
+
+# Buffers reused from one chunk to the next, for each thread.
+_thread_buffers = threading.local()
+
+
+def get_buffer(name, shape, dtype):
+    """
+    Return an uninitialized array of the given shape and dtype, backed by
+    a buffer that the calling thread reuses across calls with the same name.
+    """
+    import numpy as np
+
+    dtype = np.dtype(dtype)
+    buffers = getattr(_thread_buffers, "buffers", None)
+    if buffers is None:
+        buffers = _thread_buffers.buffers = {}
+    size = 1
+    for dim in shape:
+        size *= dim
+    buf = buffers.get((name, dtype))
+    if buf is None or buf.size < size:
+        buf = buffers[(name, dtype)] = np.empty(size, dtype=dtype)
+    return buf[:size].reshape(shape)
+
+
+def release_buffers():
+    """Release the buffers of the calling thread."""
+    _thread_buffers.buffers = None
+
+
+def read_into_buffer(band, xoff, yoff, xsize, ysize, name):
+    """Read a window of band into a reused buffer of its data type."""
+    from osgeo import gdal_array
+
+    typecode = gdal_array.GDALTypeCodeToNumericTypeCode(band.DataType)
+    if typecode is None:
+        return band.ReadAsArray(xoff, yoff, xsize, ysize)
+    return band.ReadAsArray(
+        xoff, yoff, xsize, ysize, buf_obj=get_buffer(name, (ysize, xsize), typecode)
+    )
+
+
+def composite_array(data_dst, data_src, invalid):
+    """
+    Put the pixels of data_src that are not flagged in invalid over
+    data_dst, updating one of the arrays in place when it can hold the
+    values of the other, and return the array to write.
+
+    invalid may be modified.
+    """
+    import numpy as np
+
+    if np.can_cast(data_src.dtype, data_dst.dtype):
+        valid = np.logical_not(invalid, out=invalid)
+        np.copyto(data_dst, data_src, where=valid)
+        return data_dst
+    if np.can_cast(data_dst.dtype, data_src.dtype):
+        np.copyto(data_src, data_dst, where=invalid)
+        return data_src
+    result = get_buffer(
+        "result", data_dst.shape, np.result_type(data_src.dtype, data_dst.dtype)
+    )
+    np.copyto(result, data_src)
+    np.copyto(result, data_dst, where=invalid)
+    return result
+
+
+def raster_composite(
+    s_band,
     s_xoff,
     s_yoff,
     s_xsize,
     s_ysize,
-    s_band_n,
-    t_fh,
+    t_band,
     t_xoff,
     t_yoff,
     t_xsize,
     t_ysize,
-    t_band_n,
     nodata,
+    m_band,
+    max_memory,
 ):
+    """
+    Copy the valid pixels of a source band over a target band, chunk by
+    chunk. Pixels are valid if they differ from nodata (when it is not None)
+    or if they are not masked by m_band.
+    """
     import numpy as np
 
-    s_band = s_fh.GetRasterBand(s_band_n)
-    t_band = t_fh.GetRasterBand(t_band_n)
+    # Source, mask and destination chunks and composited result, plus the
+    # boolean test array.
+    bytes_per_pixel = (
+        gdal.GetDataTypeSize(s_band.DataType)
+        + (gdal.GetDataTypeSize(m_band.DataType) if m_band is not None else 0)
+        + 2 * gdal.GetDataTypeSize(t_band.DataType)
+    ) // 8 + 1
+    for window in get_chunk_windows(
+        t_band, t_xoff, t_yoff, t_xsize, t_ysize, bytes_per_pixel, max_memory
+    ):
+        x, y, xsize, ysize = window
+        s_window = source_window(
+            s_xoff, s_yoff, s_xsize, s_ysize, t_xoff, t_yoff, t_xsize, t_ysize, window
+        )
+        data_src = s_band.ReadAsArray(*s_window, xsize, ysize)
+
+        invalid = get_buffer("invalid", (ysize, xsize), bool)
+        if m_band is not None:
+            data_mask = m_band.ReadAsArray(*s_window, xsize, ysize)
+            np.equal(data_mask, 0, out=invalid)
+            data_mask = None
+        elif not np.isnan(nodata):
+            np.equal(data_src, nodata, out=invalid)
+        else:
+            np.isnan(data_src, out=invalid)
 
-    data_src = s_band.ReadAsArray(s_xoff, s_yoff, s_xsize, s_ysize, t_xsize, t_ysize)
-    data_dst = t_band.ReadAsArray(t_xoff, t_yoff, t_xsize, t_ysize)
+        # Only read the destination if some of it remains visible.
+        if invalid.all():
+            continue
+        if not invalid.any():
+            t_band.WriteArray(data_src, x, y)
+            continue
 
-    if not np.isnan(nodata):
-        nodata_test = np.equal(data_src, nodata)
-    else:
-        nodata_test = np.isnan(data_src)
+        data_dst = read_into_buffer(t_band, x, y, xsize, ysize, "dst")
+        t_band.WriteArray(composite_array(data_dst, data_src, invalid), x, y)
 
-    to_write = np.choose(nodata_test, (data_src, data_dst))
+    return 0
 
-    t_band.WriteArray(to_write, t_xoff, t_yoff)
 
-    return 0
+# =============================================================================
+
+
+def raster_copy_with_nodata(
+    s_fh,
+    s_xoff,
+    s_yoff,
+    s_xsize,
+    s_ysize,
+    s_band_n,
+    t_fh,
+    t_xoff,
+    t_yoff,
+    t_xsize,
+    t_ysize,
+    t_band_n,
+    nodata,
+    max_memory=DEFAULT_MAX_MEMORY,
+):
+    return raster_composite(
+        s_fh.GetRasterBand(s_band_n),
+        s_xoff,
+        s_yoff,
+        s_xsize,
+        s_ysize,
+        t_fh.GetRasterBand(t_band_n),
+        t_xoff,
+        t_yoff,
+        t_xsize,
+        t_ysize,
+        nodata,
+        None,
+        max_memory,
+    )
 
 
 # =============================================================================
@@ -176,20 +397,117 @@ def raster_copy_with_mask(
     t_ysize,
     t_band_n,
     m_band,
+    max_memory=DEFAULT_MAX_MEMORY,
 ):
+    return raster_composite(
+        s_fh.GetRasterBand(s_band_n),
+        s_xoff,
+        s_yoff,
+        s_xsize,
+        s_ysize,
+        t_fh.GetRasterBand(t_band_n),
+        t_xoff,
+        t_yoff,
+        t_xsize,
+        t_ysize,
+        None,
+        m_band,
+        max_memory,
+    )
+
+
+# =============================================================================
+def get_stack_dtype(t_band, s_bands):
+    """
+    Return the NumPy data type able to hold the values of a target band and
+    of the source bands composited into it.
+    """
     import numpy as np
 
-    s_band = s_fh.GetRasterBand(s_band_n)
-    t_band = t_fh.GetRasterBand(t_band_n)
+    from osgeo import gdal_array
 
-    data_src = s_band.ReadAsArray(s_xoff, s_yoff, s_xsize, s_ysize, t_xsize, t_ysize)
-    data_mask = m_band.ReadAsArray(s_xoff, s_yoff, s_xsize, s_ysize, t_xsize, t_ysize)
-    data_dst = t_band.ReadAsArray(t_xoff, t_yoff, t_xsize, t_ysize)
+    dtypes = [gdal_array.GDALTypeCodeToNumericTypeCode(t_band.DataType)]
+    for s_band in s_bands:
+        dtypes.append(gdal_array.GDALTypeCodeToNumericTypeCode(s_band.DataType))
+    if None in dtypes:
+        return np.dtype(np.float64)
+    dtype = np.result_type(*dtypes)
+    if gdal_array.NumericTypeCodeToGDALTypeCode(dtype.type) is None:
+        return np.dtype(np.float64)
+    return dtype
 
-    mask_test = np.equal(data_mask, 0)
-    to_write = np.choose(mask_test, (data_src, data_dst))
 
-    t_band.WriteArray(to_write, t_xoff, t_yoff)
+# =============================================================================
+def raster_composite_stack(layers, t_band, x, y, xsize, ysize, nodata, t_lock):
+    """
+    Composite several sources over a window of a target band in one pass.
+
+    The overlapping source windows are stacked on top of the destination
+    window, and each pixel takes the value of the topmost valid layer. The
+    destination window is read and written only once, and is not read at
+    all (nor are lower layers) if a layer fully covers it with valid pixels.
+
+    layers -- list of (s_band, m_band, s_window, t_window) tuples in
+    priority order, the last one winning. m_band is the mask band of s_band,
+    or None to use nodata instead, s_window the source window matching t_window, the part of the
+    target window covered by the source.
+    t_lock -- lock serializing the accesses to the target.
+    """
+    import numpy as np
+
+    dtype = get_stack_dtype(t_band, [layer[0] for layer in layers])
+
+    nb_layers = len(layers) + 1
+    stack = get_buffer("stack", (nb_layers, ysize, xsize), dtype)
+    valid = get_buffer("valid", (nb_layers, ysize, xsize), bool)
+
+    # Read layers from the top, until one hides everything below it.
+    bottom = 0
+    for k in range(len(layers), 0, -1):
+        s_band, m_band, s_window, t_window = layers[k - 1]
+        lx, ly, lxsize, lysize = t_window
+        lx -= x
+        ly -= y
+        layer_valid = valid[k, ly : ly + lysize, lx : lx + lxsize]
+        covering = lxsize == xsize and lysize == ysize
+        if not covering:
+            valid[k] = False
+
+        data_src = s_band.ReadAsArray(*s_window, lxsize, lysize)
+        if m_band is not None:
+            data_mask = m_band.ReadAsArray(*s_window, lxsize, lysize)
+            np.not_equal(data_mask, 0, out=layer_valid)
+            data_mask = None
+        elif nodata is None:
+            layer_valid[...] = True
+        elif not np.isnan(nodata):
+            np.not_equal(data_src, nodata, out=layer_valid)
+        else:
+            np.isnan(data_src, out=layer_valid)
+            np.logical_not(layer_valid, out=layer_valid)
+        stack[k, ly : ly + lysize, lx : lx + lxsize] = data_src
+        data_src = None
+
+        if covering and layer_valid.all():
+            bottom = k
+            break
+
+    if bottom == 0:
+        with t_lock:
+            t_band.ReadAsArray(x, y, xsize, ysize, buf_obj=stack[0])
+        valid[0] = True
+
+    if bottom == nb_layers - 1:
+        result = stack[bottom]
+    else:
+        # Index, from the top, of the first valid layer of each pixel.
+        top = get_buffer("top", (1, ysize, xsize), np.intp)
+        np.argmax(valid[bottom:][::-1], axis=0, out=top[0])
+        np.subtract(nb_layers - 1 - bottom, top, out=top)
+        result = np.take_along_axis(stack[bottom:], top, axis=0)[0]
+
+    with t_lock:
+        t_band.WriteArray(result, x, y)
 
     return 0
 
@@ -274,23 +592,15 @@ class file_info(object):
         print("Pixel Size: %f x %f" % (self.geotransform[1], self.geotransform[5]))
         print("UL:(%f,%f)   LR:(%f,%f)" % (self.ulx, self.uly, self.lrx, self.lry))
 
-    def copy_into(self, t_fh, s_band=1, t_band=1, nodata_arg=None, verbose=0):
+    def get_windows(self, t_fh):
         """
-        Copy this files image into target file.
-
-        This method will compute the overlap area of the file_info objects
-        file, and the target gdal.Dataset object, and copy the image data
-        for the common window area.  It is assumed that the files are in
-        a compatible projection ... no checking or warping is done.  However,
-        if the destination file is a different resolution, or different
-        image pixel type, the appropriate resampling and conversions will
-        be done (using normal GDAL promotion/demotion rules).
+        Compute the overlap of this file with a target file.
 
-        t_fh -- gdal.Dataset object for the file into which some or all
-        of this file may be copied.
+        t_fh -- gdal.Dataset object for the target file.
 
-        Returns 1 on success (or if nothing needs to be copied), and zero one
-        failure.
+        Returns None if the file does not overlap the target, or a
+        (sw_xoff, sw_yoff, sw_xsize, sw_ysize, tw_xoff, tw_yoff, tw_xsize,
+        tw_ysize) tuple with the source and target windows, in pixels.
         """
         t_geotransform = t_fh.GetGeoTransform()
         t_ulx = t_geotransform[0]
@@ -310,11 +620,11 @@ class file_info(object):
 
         # do they even intersect?
         if tgw_ulx >= tgw_lrx:
-            return 1
+            return None
         if t_geotransform[5] < 0 and tgw_uly <= tgw_lry:
-            return 1
+            return None
         if t_geotransform[5] > 0 and tgw_uly >= tgw_lry:
-            return 1
+            return None
 
         # compute target window in pixel coordinates.
         tw_xoff = int((tgw_ulx - t_geotransform[0]) / t_geotransform[1] + 0.1)
@@ -327,7 +637,7 @@ class file_info(object):
         )
 
         if tw_xsize < 1 or tw_ysize < 1:
-            return 1
+            return None
 
         # Compute source window in pixel coordinates.
         sw_xoff = int((tgw_ulx - self.geotransform[0]) / self.geotransform[1] + 0.1)
@@ -340,6 +650,50 @@ class file_info(object):
         )
 
         if sw_xsize < 1 or sw_ysize < 1:
+            return None
+
+        return (
+            sw_xoff,
+            sw_yoff,
+            sw_xsize,
+            sw_ysize,
+            tw_xoff,
+            tw_yoff,
+            tw_xsize,
+            tw_ysize,
+        )
+
+    def copy_into(
+        self,
+        t_fh,
+        s_band=1,
+        t_band=1,
+        nodata_arg=None,
+        verbose=0,
+        max_memory=DEFAULT_MAX_MEMORY,
+    ):
+        """
+        Copy this files image into target file.
+
+        This method will compute the overlap area of the file_info objects
+        file, and the target gdal.Dataset object, and copy the image data
+        for the common window area.  It is assumed that the files are in
+        a compatible projection ... no checking or warping is done.  However,
+        if the destination file is a different resolution, or different
+        image pixel type, the appropriate resampling and conversions will
+        be done (using normal GDAL promotion/demotion rules).
+
+        t_fh -- gdal.Dataset object for the file into which some or all
+        of this file may be copied.
+
+        max_memory -- memory budget, in megabytes, of each chunk of the
+        common window copied at a time.
+
+        Returns 1 on success (or if nothing needs to be copied), and zero one
+        failure.
+        """
+        windows = self.get_windows(t_fh)
+        if windows is None:
             return 1
 
         # Open the source file, and copy the selected region.
@@ -347,20 +701,249 @@ class file_info(object):
 
         return raster_copy(
             s_fh,
+            *windows[0:4],
+            s_band,
+            t_fh,
+            *windows[4:8],
+            t_band,
+            nodata_arg,
+            verbose,
+            max_memory,
+        )
+
+
+# =============================================================================
+def tiled_copy(
+    file_infos,
+    t_fh,
+    band_maps,
+    nodata=None,
+    verbose=0,
+    max_memory=DEFAULT_MAX_MEMORY,
+    threads=1,
+    single_pass=False,
+    progress_cb=None,
+):
+    """
+    Copy a list of files into a target file, tile by tile.
+
+    The target is partitioned into tiles aligned on its blocks. A spatial
+    index maps each tile to the files overlapping it, and a pool of threads
+    fills the tiles in parallel. Files are composited in the order of
+    file_infos, so later files still win over earlier ones. Each thread
+    keeps the SOURCE_CACHE_SIZE source files it used most recently open.
+
+    By default each tile is composited in memory by copying the files one
+    after the other, and is then written once to the target. With
+    single_pass, all the files overlapping a chunk of a tile are stacked and
+    composited at once with raster_composite_stack().
+
+    file_infos -- list of file_info objects, in priority order.
+    t_fh -- gdal.Dataset object for the target file.
+    band_maps -- for each file, the list of (source band, target band)
+    pairs to copy.
+    max_memory -- overall memory budget, in megabytes, shared by the tiles
+    being processed.
+    threads -- number of worker threads.
+    single_pass -- whether to composite all the files at once.
+    progress_cb -- optional function called with the completed ratio.
+
+    Returns 1 on success.
+    """
+    import bisect
+    from concurrent.futures import ThreadPoolExecutor
+
+    t_xsize = t_fh.RasterXSize
+    t_ysize = t_fh.RasterYSize
+    t_band_type = t_fh.GetRasterBand(1).DataType
+
+    # Each tile is held twice: in the in-memory tile dataset and as the
+    # raw buffer read from or written to the target. Keep at least 4 tiles
+    # per thread so that the work is balanced between threads.
+    bytes_per_pixel = 2 * t_fh.RasterCount * gdal.GetDataTypeSize(t_band_type) // 8
+    tile_memory = max_memory / threads
+    if threads > 1:
+        tile_memory = min(
+            tile_memory,
+            t_xsize * t_ysize * bytes_per_pixel / (4 * threads) / (1024 * 1024),
+        )
+    tiles = get_chunk_windows(
+        t_fh.GetRasterBand(1),
+        0,
+        0,
+        t_xsize,
+        t_ysize,
+        bytes_per_pixel,
+        tile_memory,
+    )
+
+    # The tiles form a grid: index it by the offsets of its columns and rows.
+    tile_xoffs = sorted(set(tile[0] for tile in tiles))
+    tile_yoffs = sorted(set(tile[1] for tile in tiles))
+    tile_sources = {(tile[0], tile[1]): [] for tile in tiles}
+    file_windows = []
+    for fi in file_infos:
+        windows = fi.get_windows(t_fh)
+        file_windows.append(windows)
+        if windows is None:
+            continue
+        tw_xoff, tw_yoff, tw_xsize, tw_ysize = windows[4:8]
+        first_col = bisect.bisect_right(tile_xoffs, tw_xoff) - 1
+        last_col = bisect.bisect_left(tile_xoffs, tw_xoff + tw_xsize)
+        first_row = bisect.bisect_right(tile_yoffs, tw_yoff) - 1
+        last_row = bisect.bisect_left(tile_yoffs, tw_yoff + tw_ysize)
+        for yoff in tile_yoffs[first_row:last_row]:
+            for xoff in tile_xoffs[first_col:last_col]:
+                tile_sources[(xoff, yoff)].append(len(file_windows) - 1)
+
+    t_lock = threading.Lock()
+    thread_local = threading.local()
+    mem_driver = gdal.GetDriverByName("MEM")
+
+    def open_source(i):
+        # file index -> dataset, from least to most recently used
+        datasets = getattr(thread_local, "datasets", None)
+        if datasets is None:
+            datasets = thread_local.datasets = OrderedDict()
+        s_fh = datasets.get(i)
+        if s_fh is not None:
+            datasets.move_to_end(i)
+            return s_fh
+        if len(datasets) >= SOURCE_CACHE_SIZE:
+            datasets.popitem(last=False)
+        s_fh = datasets[i] = gdal.Open(file_infos[i].filename)
+        return s_fh
+
+    def clip_windows(i, x, y, xsize, ysize):
+        """Return the source and target windows of file i within a window,
+        or None if it does not overlap it."""
+        sw_xoff, sw_yoff, sw_xsize, sw_ysize = file_windows[i][0:4]
+        tw_xoff, tw_yoff, tw_xsize, tw_ysize = file_windows[i][4:8]
+        x_start = max(x, tw_xoff)
+        x_end = min(x + xsize, tw_xoff + tw_xsize)
+        y_start = max(y, tw_yoff)
+        y_end = min(y + ysize, tw_yoff + tw_ysize)
+        if x_start >= x_end or y_start >= y_end:
+            return None
+        t_window = (x_start, y_start, x_end - x_start, y_end - y_start)
+        s_window = source_window(
             sw_xoff,
             sw_yoff,
             sw_xsize,
             sw_ysize,
-            s_band,
-            t_fh,
             tw_xoff,
             tw_yoff,
             tw_xsize,
             tw_ysize,
-            t_band,
-            nodata_arg,
-            verbose,
+            t_window,
         )
+        return s_window, t_window
+
+    def copy_tile(x, y, xsize, ysize, sources):
+        with t_lock:
+            data = t_fh.ReadRaster(x, y, xsize, ysize, buf_type=t_band_type)
+        tile_fh = mem_driver.Create("", xsize, ysize, t_fh.RasterCount, t_band_type)
+        tile_fh.WriteRaster(0, 0, xsize, ysize, data)
+        data = None
+
+        for i in sources:
+            s_window, t_window = clip_windows(i, x, y, xsize, ysize)
+            s_fh = open_source(i)
+            for s_band, t_band in band_maps[i]:
+                raster_copy(
+                    s_fh,
+                    *s_window,
+                    s_band,
+                    tile_fh,
+                    t_window[0] - x,
+                    t_window[1] - y,
+                    t_window[2],
+                    t_window[3],
+                    t_band,
+                    nodata,
+                    verbose,
+                    max_memory / threads,
+                )
+
+        data = tile_fh.ReadRaster()
+        tile_fh = None
+        with t_lock:
+            t_fh.WriteRaster(x, y, xsize, ysize, data, buf_type=t_band_type)
+
+    def composite_tile(x, y, xsize, ysize, sources):
+        import numpy as np
+
+        for t_band_n in range(1, t_fh.RasterCount + 1):
+            t_band = t_fh.GetRasterBand(t_band_n)
+            candidates = []
+            for i in sources:
+                for s_band_n, b in band_maps[i]:
+                    if b == t_band_n:
+                        s_band = open_source(i).GetRasterBand(s_band_n)
+                        # As with raster_copy(), -n takes precedence over
+                        # the mask of the sources.
+                        m_band = get_mask_band(s_band) if nodata is None else None
+                        candidates.append((i, s_band, m_band))
+            if not candidates:
+                continue
+
+            # Stack and validity arrays of all layers, index array, and
+            # source, mask and result chunks.
+            stack_size = get_stack_dtype(t_band, [c[1] for c in candidates]).itemsize
+            bytes_per_pixel = (
+                (len(candidates) + 1) * (stack_size + 1)
+                + np.dtype(np.intp).itemsize
+                + max(gdal.GetDataTypeSize(c[1].DataType) // 8 for c in candidates)
+                + (1 if any(c[2] is not None for c in candidates) else 0)
+                + stack_size
+            )
+            for window in get_chunk_windows(
+                t_band,
+                x,
+                y,
+                xsize,
+                ysize,
+                bytes_per_pixel,
+                max_memory / threads,
+            ):
+                layers = []
+                for i, s_band, m_band in candidates:
+                    windows = clip_windows(i, *window)
+                    if windows is not None:
+                        layers.append((s_band, m_band) + windows)
+                if not layers:
+                    continue
+                if verbose != 0:
+                    print(
+                        "Composite %d source(s) into %d,%d,%d,%d."
+                        % ((len(layers),) + window)
+                    )
+                raster_composite_stack(layers, t_band, *window, nodata, t_lock)
+
+    @enable_gdal_exceptions
+    def fill_tile(tile):
+        x, y, xsize, ysize = tile
+        sources = tile_sources[(x, y)]
+        if not sources:
+            return
+        if single_pass:
+            composite_tile(x, y, xsize, ysize, sources)
+        else:
+            copy_tile(x, y, xsize, ysize, sources)
+
+    if threads == 1:
+        for i, tile in enumerate(tiles):
+            fill_tile(tile)
+            if progress_cb is not None:
+                progress_cb((i + 1) / len(tiles))
+        release_buffers()
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for i, _ in enumerate(executor.map(fill_tile, tiles)):
+                if progress_cb is not None:
+                    progress_cb((i + 1) / len(tiles))
+
+    return 1
 
 
 # =============================================================================
@@ -384,7 +967,11 @@ def Usage(isError):
         file=f,
     )
     print(
-        "                     [-ot <datatype>] [-createonly] <input_file> [<input_file>]...",
+        "                     [-ot <datatype>] [-createonly] [-max_memory <MB>] [-threads <N>]",
+        file=f,
+    )
+    print(
+        "                     [-single_pass] <input_file> [<input_file>]...",
         file=f,
     )
     print("                     [--help-general]", file=f)
@@ -415,6 +1002,9 @@ def _gdal_merge(argv=None):
     band_type = None
     createonly = 0
     bTargetAlignedPixels = False
+    max_memory = DEFAULT_MAX_MEMORY
+    threads = 1
+    single_pass = False
     start_time = time.time()
 
     if argv is None:
@@ -490,6 +1080,23 @@ def _gdal_merge(argv=None):
         elif arg == "-tap":
             bTargetAlignedPixels = True
 
+        elif arg == "-max_memory":
+            i = i + 1
+            max_memory = float(argv[i])
+            if max_memory <= 0:
+                print("-max_memory should be strictly positive.")
+                return 1
+
+        elif arg == "-threads":
+            i = i + 1
+            threads = int(argv[i])
+            if threads < 1:
+                print("-threads should be strictly positive.")
+                return 1
+
+        elif arg == "-single_pass":
+            single_pass = True
+
         elif arg == "-ul_lr":
             ulx = float(argv[i + 1])
             uly = float(argv[i + 2])
@@ -620,34 +1227,62 @@ def _gdal_merge(argv=None):
         progress(0.0)
     fi_processed = 0
 
-    for fi in file_infos:
-        if createonly != 0:
-            continue
+    if (threads > 1 or single_pass) and createonly == 0:
+        band_maps = []
+        for fi in file_infos:
+            if separate == 0:
+                band_maps.append([(band, band) for band in range(1, bands + 1)])
+            else:
+                band_maps.append(
+                    [(band, t_band + band - 1) for band in range(1, fi.bands + 1)]
+                )
+                t_band = t_band + fi.bands
+            if verbose != 0:
+                print("")
+                fi.report()
+
+        tiled_copy(
+            file_infos,
+            t_fh,
+            band_maps,
+            nodata,
+            verbose,
+            max_memory,
+            threads,
+            single_pass,
+            progress if quiet == 0 and verbose == 0 else None,
+        )
+    else:
+        for fi in file_infos:
+            if createonly != 0:
+                continue
 
-        if verbose != 0:
-            print("")
-            print(
-                "Processing file %5d of %5d, %6.3f%% completed in %d minutes."
-                % (
-                    fi_processed + 1,
-                    len(file_infos),
-                    fi_processed * 100.0 / len(file_infos),
-                    int(round((time.time() - start_time) / 60.0)),
+            if verbose != 0:
+                print("")
+                print(
+                    "Processing file %5d of %5d, %6.3f%% completed in %d minutes."
+                    % (
+                        fi_processed + 1,
+                        len(file_infos),
+                        fi_processed * 100.0 / len(file_infos),
+                        int(round((time.time() - start_time) / 60.0)),
+                    )
                 )
-            )
-            fi.report()
+                fi.report()
 
-        if separate == 0:
-            for band in range(1, bands + 1):
-                fi.copy_into(t_fh, band, band, nodata, verbose)
-        else:
-            for band in range(1, fi.bands + 1):
-                fi.copy_into(t_fh, band, t_band, nodata, verbose)
-                t_band = t_band + 1
+            if separate == 0:
+                for band in range(1, bands + 1):
+                    fi.copy_into(t_fh, band, band, nodata, verbose, max_memory)
+            else:
+                for band in range(1, fi.bands + 1):
+                    fi.copy_into(t_fh, band, t_band, nodata, verbose, max_memory)
+                    t_band = t_band + 1
+
+            fi_processed = fi_processed + 1
+            if quiet == 0 and verbose == 0:
+                progress(fi_processed / float(len(file_infos)))
 
-        fi_processed = fi_processed + 1
-        if quiet == 0 and verbose == 0:
-            progress(fi_processed / float(len(file_infos)))
+        release_buffers()
 
     # Force file to be closed.
     t_fh = None
@@ -30,8 +30,13 @@
 ###############################################################################
 from __future__ import print_function
 
+import multiprocessing
 import os
 import sys
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from osgeo import gdal, ogr, osr
 from osgeo_utils.auxiliary.util import enable_gdal_exceptions
@@ -71,33 +76,82 @@ class AffineTransformDecorator(object):
 
 
 class DataSetCache(object):
-    """A class for caching source tiles"""
+    """A least recently used cache of opened source tiles"""
 
-    def __init__(self):
-        self.cacheSize = 8
-        self.queue = []
-        self.dict = {}
+    def __init__(self, cacheSize=8, maxOpenFiles=None):
+        """
+        Initialize the cache
+
+        cacheSize -- maximum number of datasets kept open.
+        maxOpenFiles -- maximum number of files kept open by the cached
+        datasets, or None for no limit. The number of files of a dataset is
+        estimated from its file list.
+
+        GDAL datasets must not be shared between threads, so each thread
+        gets its own cache with these limits. Statistics are global.
+        """
+        self.cacheSize = cacheSize
+        self.maxOpenFiles = maxOpenFiles
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _getLocal(self):
+        local = self.local
+        if not hasattr(local, "dict"):
+            # name -> (dataset, number of files), from least to most
+            # recently used
+            local.dict = OrderedDict()
+            local.openFiles = 0
+        return local
+
+    @property
+    def dict(self):
+        return self._getLocal().dict
+
+    @property
+    def openFiles(self):
+        return self._getLocal().openFiles
 
     def get(self, name):
 
-        if name in self.dict:
-            return self.dict[name]
+        local = self._getLocal()
+        entry = local.dict.get(name)
+        if entry is not None:
+            local.dict.move_to_end(name)
+            with self.lock:
+                self.hits += 1
+            return entry[0]
+        with self.lock:
+            self.misses += 1
         result = gdal.Open(name)
         if result is None:
-            print("Error opening: %s" % NameError, file=sys.stderr)
+            print("Error opening: %s" % name, file=sys.stderr)
             return 1
-        if len(self.queue) == self.cacheSize:
-            toRemove = self.queue.pop(0)
-            del self.dict[toRemove]
-        self.queue.append(name)
-        self.dict[name] = result
+        fileCount = max(1, len(result.GetFileList() or []))
+        local.dict[name] = (result, fileCount)
+        local.openFiles += fileCount
+        # Evict least recently used datasets, but always keep the new one
+        while len(local.dict) > 1 and (
+            len(local.dict) > self.cacheSize
+            or (self.maxOpenFiles is not None and local.openFiles > self.maxOpenFiles)
+        ):
+            _, (_, evictedFileCount) = local.dict.popitem(last=False)
+            local.openFiles -= evictedFileCount
+            with self.lock:
+                self.evictions += 1
         return result
 
+    def report(self):
+        print(
+            "Dataset cache: %d hit(s), %d miss(es), %d eviction(s)"
+            % (self.hits, self.misses, self.evictions)
+        )
+
     def __del__(self):
-        for dataset in self.dict.values():
-            del dataset
-        del self.queue
-        del self.dict
+        self.dict.clear()
 
 
 class tile_info(object):
@@ -132,18 +186,24 @@ class tile_info(object):
 class mosaic_info(object):
     """A class holding information about a GDAL file or a GDAL fileset"""
 
-    def __init__(self, filename, inputDS):
+    def __init__(self, filename, inputDS, cache=None, useVRT=False):
         """
         Initialize mosaic_info from filename
 
         filename -- Name of file to read.
         inputDS -- OGR DataSet representing the tile index
+        cache -- DataSetCache to open the tiles with, shared with other
+        mosaic_info objects. A new one is created if None.
+        useVRT -- whether to read the tiles through a VRT of the whole tile
+        index instead of compositing them in memory for each request.
 
         """
         self.TempDriver = gdal.GetDriverByName("MEM")
         self.filename = filename
-        self.cache = DataSetCache()
+        self.cache = DataSetCache() if cache is None else cache
         self.ogrTileIndexDS = inputDS
+        # Serializes the queries of the tile index by concurrent tiles
+        self.lock = threading.Lock()
 
         self.ogrTileIndexDS.GetLayer().ResetReading()
         # grab the first feature of the temporary tile index created
@@ -182,26 +242,126 @@ class mosaic_info(object):
         self.xsize = int(round((self.lrx - self.ulx) / self.scaleX))
         self.ysize = abs(int(round((self.uly - self.lry) / self.scaleY)))
 
+        self.vrtName = None
+        if useVRT:
+            self.buildVRT()
+
     def __del__(self):
+        if self.vrtName is not None:
+            gdal.Unlink(self.vrtName)
         del self.cache
         del self.ogrTileIndexDS
 
+    def buildVRT(self):
+        """
+        Build a VRT over all the tiles of the index, on the grid of the
+        mosaic, and a grid index of the tile envelopes to tell which
+        requests overlap tiles without querying the OGR layer.
+        """
+        names = []
+        self.envelopes = []
+        layer = self.ogrTileIndexDS.GetLayer()
+        layer.ResetReading()
+        for feature in layer:
+            names.append(feature.GetField(0))
+            self.envelopes.append(feature.GetGeometryRef().GetEnvelope())
+
+        self.vrtName = "/vsimem/gdal_retile_%s.vrt" % uuid.uuid4().hex
+        vrtDS = gdal.BuildVRT(
+            self.vrtName,
+            names,
+            outputBounds=(self.ulx, self.lry, self.lrx, self.uly),
+            xRes=self.scaleX,
+            yRes=abs(self.scaleY),
+            # Later tiles overwrite earlier ones, as in getDataSet()
+            srcNodata="None",
+            VRTNodata=self.nodata,
+        )
+        vrtDS.FlushCache()
+        vrtDS = None
+
+        # Cells of the grid are about the average size of the tiles
+        self.cellX = max(
+            sum(env[1] - env[0] for env in self.envelopes) / len(self.envelopes),
+            abs(self.scaleX),
+        )
+        self.cellY = max(
+            sum(env[3] - env[2] for env in self.envelopes) / len(self.envelopes),
+            abs(self.scaleY),
+        )
+        self.envelopeGrid = {}
+        for i, env in enumerate(self.envelopes):
+            for cell in self._getCells(env[0], env[2], env[1], env[3]):
+                self.envelopeGrid.setdefault(cell, []).append(i)
+
+    def _getCells(self, minx, miny, maxx, maxy):
+        firstX = int((minx - self.ulx) // self.cellX)
+        lastX = int((maxx - self.ulx) // self.cellX)
+        firstY = int((miny - self.lry) // self.cellY)
+        lastY = int((maxy - self.lry) // self.cellY)
+        for cellY in range(firstY, lastY + 1):
+            for cellX in range(firstX, lastX + 1):
+                yield (cellX, cellY)
+
+    def getVRTDataSet(self, minx, miny, maxx, maxy):
+        """
+        Find a gdal dataset representing a subset of a mosaic, based on a
+        bounding box, as a window of the VRT of the whole mosaic.
+
+        returns GDALDataset or None
+        """
+        # Like the spatial filter of getDataSet(), touching tiles count
+        overlaps = False
+        for cell in self._getCells(minx, miny, maxx, maxy):
+            for i in self.envelopeGrid.get(cell, []):
+                env = self.envelopes[i]
+                if (
+                    env[0] <= maxx
+                    and env[1] >= minx
+                    and env[2] <= maxy
+                    and env[3] >= miny
+                ):
+                    overlaps = True
+                    break
+            if overlaps:
+                break
+        if not overlaps:
+            return None
+
+        xoff = int((minx - self.ulx) / self.scaleX + 0.5)
+        yoff = int((maxy - self.uly) / self.scaleY + 0.5)
+        xsize = int((maxx - minx) / self.scaleX + 0.5)
+        ysize = int((miny - maxy) / self.scaleY + 0.5)
+        return gdal.Translate(
+            "",
+            self.cache.get(self.vrtName),
+            format="VRT",
+            srcWin=[xoff, yoff, xsize, ysize],
+        )
+
     def getDataSet(self, minx, miny, maxx, maxy):
         """
         Find a gdal dataset representing a subset of a mosaic, based on a bounding box. Might overlap multiple tiles of the mosaic
 
         returns GDALDataset or None
         """
-        self.ogrTileIndexDS.GetLayer().ResetReading()
-        self.ogrTileIndexDS.GetLayer().SetSpatialFilterRect(minx, miny, maxx, maxy)
-        features = []
+        if self.vrtName is not None:
+            return self.getVRTDataSet(minx, miny, maxx, maxy)
+
+        with self.lock:
+            self.ogrTileIndexDS.GetLayer().ResetReading()
+            self.ogrTileIndexDS.GetLayer().SetSpatialFilterRect(minx, miny, maxx, maxy)
+            features = []
+            while True:
+                feature = self.ogrTileIndexDS.GetLayer().GetNextFeature()
+                if feature is None:
+                    break
+                features.append(feature)
+            self.ogrTileIndexDS.GetLayer().SetSpatialFilter(None)
+
         envelope = None
         # Find the envelope of all features in the dataset
-        while True:
-            feature = self.ogrTileIndexDS.GetLayer().GetNextFeature()
-            if feature is None:
-                break
-            features.append(feature)
+        for feature in features:
             # on first iteration get envelope of the first feature
             if envelope is None:
                 envelope = feature.GetGeometryRef().GetEnvelope()
@@ -226,8 +386,6 @@ class mosaic_info(object):
             max(maxy, envelope[3]),
         )
 
-        self.ogrTileIndexDS.GetLayer().SetSpatialFilter(None)
-
         # merge tiles
 
         resultSizeX = int((maxx - minx) / self.scaleX + 0.5)
@@ -384,11 +542,12 @@ def tileImage(g, minfo, ti):
     yRange = list(range(1, ti.countTilesY + 1))
     xRange = list(range(1, ti.countTilesX + 1))
 
+    processed = 0
+    total = len(xRange) * len(yRange)
     if not g.Quiet and not g.Verbose:
         progress(0.0)
-        processed = 0
-        total = len(xRange) * len(yRange)
 
+    tiles = []
     for yIndex in yRange:
         for xIndex in xRange:
             offsetY = (yIndex - 1) * (ti.tileHeight - ti.overlap)
@@ -406,13 +565,15 @@ def tileImage(g, minfo, ti):
                 height = ti.height - offsetY
 
             feature_only = g.Resume and os.path.exists(tilename)
-            createTile(
-                g, minfo, offsetX, offsetY, width, height, tilename, OGRDS, feature_only
-            )
+            tiles.append((offsetX, offsetY, width, height, tilename, feature_only))
+
+    def tileCreated():
+        nonlocal processed
+        if not g.Quiet and not g.Verbose:
+            processed += 1
+            progress(processed / float(total))
 
-            if not g.Quiet and not g.Verbose:
-                processed += 1
-                progress(processed / float(total))
+    createTiles(g, createTile, minfo, tiles, OGRDS, tileCreated)
 
     if g.TileIndexName is not None:
         if g.UseDirForEachRow and not g.PyramidOnly:
@@ -527,7 +688,7 @@ def createPyramidTile(
     # if -resume flag and the tile is present, add it to the index and exit function
     if feature_only:
         points = dec.pointsFor(width, height)
-        addFeature(g.TileIndexFieldName, OGRDS, tileName, points[0], points[1])
+        addTileFeature(g, OGRDS, tileName, points)
         return
 
     s_fh = levelMosaicInfo.getDataSet(
@@ -538,7 +699,7 @@ def createPyramidTile(
         return
     # add the new pyramid tile to the index
     points = dec.pointsFor(width, height)
-    addFeature(g.TileIndexFieldName, OGRDS, tileName, points[0], points[1])
+    addTileFeature(g, OGRDS, tileName, points)
 
     if g.BandType is None:
         bt = levelMosaicInfo.band_type
@@ -652,7 +813,7 @@ def createTile(
     if feature_only:
         dec2 = AffineTransformDecorator(geotransform)
         points = dec2.pointsFor(width, height)
-        addFeature(g.TileIndexFieldName, OGRDS, tilename, points[0], points[1])
+        addTileFeature(g, OGRDS, tilename, points)
         return
 
     s_fh = minfo.getDataSet(
@@ -668,7 +829,7 @@ def createTile(
     # add the tile to the tile index
     dec2 = AffineTransformDecorator(geotransform)
     points = dec2.pointsFor(width, height)
-    addFeature(g.TileIndexFieldName, OGRDS, tilename, points[0], points[1])
+    addTileFeature(g, OGRDS, tilename, points)
 
     bands = minfo.bands
 
@@ -726,6 +887,85 @@ def createTile(
         )
 
 
+# State of the worker processes of createTiles(), inherited when forking
+_processWorkerState = None
+
+
+def _createTileFeatures(g, createFunc, minfo, tile):
+    """Create a tile and return the features to add to the tile index"""
+    features = []
+    offsetX, offsetY, width, height, tilename, feature_only = tile
+    createFunc(
+        g, minfo, offsetX, offsetY, width, height, tilename, features, feature_only
+    )
+    return features
+
+
+def _initProcessWorker():
+    g, _, minfo = _processWorkerState
+    # Do not share the datasets opened by the parent process
+    minfo.cache = DataSetCache(g.MaxOpenDatasets, g.MaxOpenFiles)
+
+
+def _processWorker(tile):
+    g, createFunc, minfo = _processWorkerState
+    return enable_gdal_exceptions(_createTileFeatures)(g, createFunc, minfo, tile)
+
+
+def createTiles(g, createFunc, minfo, tiles, OGRDS, tileCreated=None):
+    """
+    Create tiles with createTile() or createPyramidTile(), and add them to
+    the tile index.
+
+    With -threads or -processes, tiles are created concurrently, and their
+    features are added to OGRDS from the calling thread only, in the order of
+    tiles, so that the tile index is the same as when created serially.
+
+    Args:
+        g (RetileGlobals): object with global script variables
+        createFunc (function): createTile or createPyramidTile
+        minfo (mosaic_info): mosaic_info object of the source
+        tiles (list): (offsetX, offsetY, width, height, tilename,
+                      feature_only) tuples
+        OGRDS (DataSource): The OGR DataSource object containing the tile index
+        tileCreated (function): optional function called after each tile
+    """
+    global _processWorkerState
+
+    if g.Processes > 1:
+        _processWorkerState = (g, createFunc, minfo)
+        chunksize = max(1, min(16, len(tiles) // (4 * g.Processes)))
+        with multiprocessing.get_context("fork").Pool(
+            g.Processes, initializer=_initProcessWorker
+        ) as pool:
+            results = pool.imap(_processWorker, tiles, chunksize)
+            for features in results:
+                for tilename, points in features:
+                    addTileFeature(g, OGRDS, tilename, points)
+                if tileCreated is not None:
+                    tileCreated()
+        _processWorkerState = None
+    elif g.Threads > 1:
+        if g.ThreadPool is None:
+            g.ThreadPool = ThreadPoolExecutor(max_workers=g.Threads)
+        worker = enable_gdal_exceptions(_createTileFeatures)
+        results = g.ThreadPool.map(
+            lambda tile: worker(g, createFunc, minfo, tile), tiles
+        )
+        for features in results:
+            for tilename, points in features:
+                addTileFeature(g, OGRDS, tilename, points)
+            if tileCreated is not None:
+                tileCreated()
+    else:
+        for offsetX, offsetY, width, height, tilename, feature_only in tiles:
+            createFunc(
+                g, minfo, offsetX, offsetY, width, height, tilename, OGRDS, feature_only
+            )
+            if tileCreated is not None:
+                tileCreated()
+
+
 def createTileIndex(Verbose, dsName, fieldName, srs, driverName):
     with gdal.ExceptionMgr(useExceptions=False):
         OGRDriver = ogr.GetDriverByName(driverName)
@@ -794,6 +1034,18 @@ def addFeature(TileIndexFieldName, OGRDataSource, location, xlist, ylist):
     OGRFeature.Destroy()
 
 
+def addTileFeature(g, OGRDS, tilename, points):
+    """
+    Add the feature of a created tile to the tile index OGRDS, or append
+    it to OGRDS when it is the list of features of a tile created by a
+    worker of createTiles().
+    """
+    if isinstance(OGRDS, list):
+        OGRDS.append((tilename, points))
+        return
+    addFeature(g.TileIndexFieldName, OGRDS, tilename, points[0], points[1])
+
+
 def closeTileIndex(OGRDataSource):
     OGRDataSource.Destroy()
 
@@ -802,7 +1054,7 @@ def buildPyramid(g, minfo, createdTileIndexDS, tileWidth, tileHeight, overlap):
     inputDS = createdTileIndexDS
     for level in range(1, g.Levels + 1):
         g.LastRowIndx = -1
-        levelMosaicInfo = mosaic_info(minfo.filename, inputDS)
+        levelMosaicInfo = mosaic_info(minfo.filename, inputDS, minfo.cache, g.UseVRT)
         levelOutputTileInfo = tile_info(
             int(levelMosaicInfo.xsize / 2),
             int(levelMosaicInfo.ysize / 2),
@@ -828,6 +1080,7 @@ def buildPyramidLevel(g, levelMosaicInfo, levelOutputTileInfo, level):
         g.TileIndexDriverTyp,
     )
 
+    tiles = []
     for yIndex in yRange:
         for xIndex in xRange:
             offsetY = (yIndex - 1) * (
@@ -849,17 +1102,9 @@ def buildPyramidLevel(g, levelMosaicInfo, levelOutputTileInfo, level):
             )
 
             feature_only = g.Resume and os.path.exists(tilename)
-            createPyramidTile(
-                g,
-                levelMosaicInfo,
-                offsetX,
-                offsetY,
-                width,
-                height,
-                tilename,
-                OGRDS,
-                feature_only,
-            )
+            tiles.append((offsetX, offsetY, width, height, tilename, feature_only))
+
+    createTiles(g, createPyramidTile, levelMosaicInfo, tiles, OGRDS)
 
     if g.TileIndexName is not None:
         shapeName = getTargetDir(g, level) + g.TileIndexName
@@ -938,6 +1183,8 @@ def Usage(isError):
     print("        [-s_srs <srs_def>]  [-pyramidOnly] -levels <numberoflevels>", file=f)
     print("        [-r {near|bilinear|cubic|cubicspline|lanczos}]", file=f)
     print("        [-useDirForEachRow] [-resume]", file=f)
+    print("        [-maxOpenDatasets <count>] [-maxOpenFiles <count>]", file=f)
+    print("        [-threads <count> | -processes <count>] [-useVRT]", file=f)
     print("        -targetDir <TileDirectory> <input_file> [<input_file>]...", file=f)
     return 2 if isError else 0
 
@@ -1053,6 +1300,41 @@ def main(args=None, g=None):
             g.UseDirForEachRow = True
         elif arg == "-resume":
             g.Resume = True
+        elif arg == "-maxOpenDatasets":
+            i += 1
+            g.MaxOpenDatasets = int(argv[i])
+            if g.MaxOpenDatasets < 1:
+                print("Invalid number of datasets : %d" % g.MaxOpenDatasets)
+                return 1
+        elif arg == "-maxOpenFiles":
+            i += 1
+            g.MaxOpenFiles = int(argv[i])
+            if g.MaxOpenFiles < 1:
+                print("Invalid number of files : %d" % g.MaxOpenFiles)
+                return 1
+        elif arg == "-useVRT":
+            g.UseVRT = True
+        elif arg == "-threads":
+            i += 1
+            g.Threads = int(argv[i])
+            if g.Threads < 1:
+                print("Invalid number of threads : %d" % g.Threads)
+                return 1
+        elif arg == "-processes":
+            i += 1
+            g.Processes = int(argv[i])
+            if g.Processes < 1:
+                print("Invalid number of processes : %d" % g.Processes)
+                return 1
+            if (
+                g.Processes > 1
+                and "fork" not in multiprocessing.get_all_start_methods()
+            ):
+                print(
+                    "-processes is not supported on this platform, use -threads",
+                    file=sys.stderr,
+                )
+                return 1
         elif arg[:1] == "-":
             print("Unrecognized command option: %s" % arg, file=sys.stderr)
             return Usage(isError=True)
@@ -1079,6 +1361,10 @@ def main(args=None, g=None):
         print("Missing Directory for Tiles -targetDir", file=sys.stderr)
         return Usage(isError=True)
 
+    if g.Threads > 1 and g.Processes > 1:
+        print("-threads and -processes are mutually exclusive", file=sys.stderr)
+        return 1
+
     # create level 0 directory if needed
     if g.UseDirForEachRow and not g.PyramidOnly:
         leveldir = g.TargetDir + str(0) + os.sep
@@ -1115,7 +1401,12 @@ def main(args=None, g=None):
     if tileIndexDS is None:
         print("Error building tile index", file=sys.stderr)
         return 1
-    minfo = mosaic_info(g.Names[0], tileIndexDS)
+    minfo = mosaic_info(
+        g.Names[0],
+        tileIndexDS,
+        DataSetCache(g.MaxOpenDatasets, g.MaxOpenFiles),
+        g.UseVRT,
+    )
     ti = tile_info(minfo.xsize, minfo.ysize, g.TileWidth, g.TileHeight, g.Overlap)
 
     if g.Source_SRS is None and minfo.projection:
@@ -1128,16 +1419,24 @@ def main(args=None, g=None):
         minfo.report()
         ti.report()
 
-    if not g.PyramidOnly:
-        dsCreatedTileIndex = tileImage(g, minfo, ti)
-        tileIndexDS.Destroy()
-    else:
-        dsCreatedTileIndex = tileIndexDS
+    try:
+        if not g.PyramidOnly:
+            dsCreatedTileIndex = tileImage(g, minfo, ti)
+            tileIndexDS.Destroy()
+        else:
+            dsCreatedTileIndex = tileIndexDS
 
-    if g.Levels > 0:
-        buildPyramid(g, minfo, dsCreatedTileIndex, g.TileWidth, g.TileHeight, g.Overlap)
+        if g.Levels > 0:
+            buildPyramid(
+                g, minfo, dsCreatedTileIndex, g.TileWidth, g.TileHeight, g.Overlap
+            )
+    finally:
+        if g.ThreadPool is not None:
+            g.ThreadPool.shutdown()
+            g.ThreadPool = None
 
     if g.Verbose:
+        minfo.cache.report()
         print("FINISHED")
     return 0
 
@@ -1169,6 +1468,12 @@ class RetileGlobals:
         "LastRowIndx",
         "UseDirForEachRow",
         "Resume",
+        "MaxOpenDatasets",
+        "MaxOpenFiles",
+        "Threads",
+        "Processes",
+        "ThreadPool",
+        "UseVRT",
     ]
 
     def __init__(self):
@@ -1199,6 +1504,12 @@ class RetileGlobals:
         self.LastRowIndx = -1
         self.UseDirForEachRow = False
         self.Resume = False
+        self.MaxOpenDatasets = 8
+        self.MaxOpenFiles = None
+        self.Threads = 1
+        self.Processes = 1
+        self.ThreadPool = None
+        self.UseVRT = False
 
 
 if __name__ == "__main__":
@@ -90,21 +90,138 @@ def compare_metadata(golden_md, new_md, md_id, options=None):
     return found_diff
 
 
+#######################################################
+# Number of pixels read from each band per block when comparing pixels.
+BLOCK_PIXELS = 1024 * 1024
+
+
+def get_block_windows(band, block_pixels=None):
+    """returns a list of (xoff, yoff, xsize, ysize) windows aligned on the band blocks,
+    each of about block_pixels pixels, covering the whole band"""
+    if block_pixels is None:
+        block_pixels = BLOCK_PIXELS
+    block_xsize, block_ysize = band.GetBlockSize()
+    xsize, ysize = band.XSize, band.YSize
+    if xsize * block_ysize <= block_pixels:
+        win_xsize = xsize
+        win_ysize = max(1, block_pixels // xsize // block_ysize) * block_ysize
+    else:
+        win_xsize = max(1, block_pixels // block_ysize // block_xsize) * block_xsize
+        win_ysize = block_ysize
+    return [
+        (x, y, min(win_xsize, xsize - x), min(win_ysize, ysize - y))
+        for y in range(0, ysize, win_ysize)
+        for x in range(0, xsize, win_xsize)
+    ]
+
+
+def format_diff_histogram(histogram):
+    """returns the lines reporting a histogram of absolute differences, as computed
+    by compare_image_pixels(), in which the key k counts the differences in [2^(k-1), 2^k),
+    the key math.inf the infinite differences and the key None the nan differences"""
+    lines = []
+    for key in sorted(histogram, key=lambda k: (k is None, k)):
+        if key is None:
+            lines.append("    nan: %d" % histogram[key])
+        elif key == math.inf:
+            lines.append("    inf: %d" % histogram[key])
+        else:
+            lines.append(
+                "    [%g, %g): %d"
+                % (math.ldexp(1, key - 1), math.ldexp(1, key), histogram[key])
+            )
+    return lines
+
+
 #######################################################
 # Review and report on the actual image pixels that differ.
 def compare_image_pixels(golden_band, new_band, id, options=None):
 
+    options = [] if options is None else options
+
+    try:
+        import numpy as np
+    except ImportError:
+        return compare_image_pixels_lines(golden_band, new_band, id, options)
+
     diff_count = 0
     max_diff = 0
+    histogram = {} if "DIFF_HISTOGRAM" in options else None
 
     out_db = None
     if "DUMP_DIFFS" in options:
-        prefix = ""
-        for opt in options:
-            if opt.startswith("DUMP_DIFFS_PREFIX="):
-                prefix = opt[len("DUMP_DIFFS_PREFIX=") :]
-                break
-        diff_fn = prefix + id.replace(" ", "_") + ".tif"
+        diff_fn = get_dump_diffs_filename(id, options)
+        out_db = gdal.GetDriverByName("GTiff").Create(
+            diff_fn, golden_band.XSize, golden_band.YSize, 1, gdal.GDT_Float32
+        )
+
+    for xoff, yoff, xsize, ysize in get_block_windows(golden_band):
+        golden_block = golden_band.ReadAsArray(
+            xoff, yoff, xsize, ysize, buf_type=gdal.GDT_Float64
+        )
+        new_block = new_band.ReadAsArray(
+            xoff, yoff, xsize, ysize, buf_type=gdal.GDT_Float64
+        )
+        diff_block = golden_block - new_block
+
+        # A nan pixel in both bands is not a difference, nan in a single one is.
+        nan_block = np.isnan(diff_block)
+        if nan_block.any():
+            diff_block[nan_block & np.isnan(golden_block) & np.isnan(new_block)] = 0
+            nan_block = np.isnan(diff_block)
+
+        differing = diff_block != 0
+        block_diff_count = int(np.count_nonzero(differing))
+        if block_diff_count:
+            diff_count += block_diff_count
+            abs_diff = np.abs(diff_block[differing & ~nan_block])
+            if abs_diff.size:
+                max_diff = max(max_diff, float(abs_diff.max()))
+            if histogram is not None:
+                inf_count = int(np.count_nonzero(np.isinf(abs_diff)))
+                if inf_count:
+                    histogram[math.inf] = histogram.get(math.inf, 0) + inf_count
+                    abs_diff = abs_diff[np.isfinite(abs_diff)]
+                _, exponents = np.frexp(abs_diff)
+                for key, count in zip(*np.unique(exponents, return_counts=True)):
+                    histogram[int(key)] = histogram.get(int(key), 0) + int(count)
+                nan_count = int(np.count_nonzero(nan_block))
+                if nan_count:
+                    histogram[None] = histogram.get(None, 0) + nan_count
+
+        if out_db is not None:
+            out_db.GetRasterBand(1).WriteArray(diff_block, xoff, yoff)
+
+    my_print("  Pixels Differing: " + str(diff_count))
+    my_print("  Maximum Pixel Difference: " + str(max_diff))
+    if histogram:
+        my_print("  Histogram of Absolute Pixel Differences:")
+        for line in format_diff_histogram(histogram):
+            my_print(line)
+    if out_db is not None:
+        my_print("  Wrote Diffs to: %s" % diff_fn)
+
+    return diff_count, max_diff, histogram
+
+
+def get_dump_diffs_filename(id, options):
+    prefix = ""
+    for opt in options:
+        if opt.startswith("DUMP_DIFFS_PREFIX="):
+            prefix = opt[len("DUMP_DIFFS_PREFIX=") :]
+            break
+    return prefix + id.replace(" ", "_") + ".tif"
+
+
+# Line by line comparison, used when numpy is not available.
+def compare_image_pixels_lines(golden_band, new_band, id, options):
+
+    diff_count = 0
+    max_diff = 0
+
+    out_db = None
+    if "DUMP_DIFFS" in options:
+        diff_fn = get_dump_diffs_filename(id, options)
         out_db = gdal.GetDriverByName("GTiff").Create(
             diff_fn, golden_band.XSize, golden_band.YSize, 1, gdal.GDT_Float32
         )
@@ -137,6 +254,8 @@ def compare_image_pixels(golden_band, new_band, id, options=None):
     if out_db is not None:
         my_print("  Wrote Diffs to: %s" % diff_fn)
 
+    return diff_count, max_diff, None
+
 
 #######################################################
 
@@ -490,7 +609,8 @@ def find_diff(
 def Usage(isError=True):
     f = sys.stderr if isError else sys.stdout
     print("Usage: gdalcompare.py [--help] [--help-general]", file=f)
-    print("                      [-dumpdiffs] [-skip_binary] [-skip_overviews]", file=f)
+    print("                      [-dumpdiffs] [-diffhistogram]", file=f)
+    print("                      [-skip_binary] [-skip_overviews]", file=f)
     print("                      [-skip_geolocation] [-skip_geotransform]", file=f)
     print("                      [-skip_metadata] [-skip_rpc] [-skip_srs]", file=f)
     print("                      [-sds] <golden_file> <new_file>", file=f)
@@ -529,6 +649,9 @@ def main(argv=sys.argv):
         elif argv[i] == "-dumpdiffs":
             options.append("DUMP_DIFFS")
 
+        elif argv[i] == "-diffhistogram":
+            options.append("DIFF_HISTOGRAM")
+
         elif argv[i] == "-skip_binary":
             options.append("SKIP_BINARY")
 
@@ -49,7 +49,8 @@ Usage: ogr_layer_algebra.py [--help] [--help-general]
                             [-opt <NAME>=<VALUE>]...
                             [-f <format_name>] [-dsco <NAME>=<VALUE>]... [-lco <NAME>=<VALUE>]...
                             [-input_fields {NONE|ALL|<fld1>,<fl2>,...<fldN>}] [-method_fields {NONE|ALL|<fld1>,<fl2>,...<fldN>}]
-                            [-nlt <geom_type>] [-a_srs <srs_def>]""",
+                            [-nlt <geom_type>] [-a_srs <srs_def>]
+                            [-j <num_threads>|ALL_CPUS]""",
         file=sys.stderr if isError else sys.stdout,
     )
     return 2 if isError else 0
@@ -193,6 +194,7 @@ def main(argv=sys.argv):
     geom_type = ogr.wkbUnknown
     srs_name = None
     srs = None
+    num_threads = None
 
     argv = ogr.GeneralCmdLineProcessor(argv)
     if argv is None:
@@ -310,6 +312,18 @@ def main(argv=sys.argv):
             i = i + 1
             srs_name = argv[i]
 
+        elif arg == "-j" and i + 1 < len(argv):
+            i = i + 1
+            num_threads = argv[i]
+            if not EQUAL(num_threads, "ALL_CPUS") and (
+                not num_threads.isdigit() or int(num_threads) < 1
+            ):
+                print(
+                    "-j %s: should be a positive number or ALL_CPUS" % num_threads,
+                    file=sys.stderr,
+                )
+                return 1
+
         elif EQUAL(arg, "Union"):
             op_str = "Union"
 
@@ -350,6 +364,14 @@ def main(argv=sys.argv):
     ):
         return Usage(isError=True)
 
+    if num_threads is not None:
+        if op_str in ("Union", "SymDifference", "Update"):
+            print(
+                "Warning: -j is ignored by the %s operation" % op_str,
+                file=sys.stderr,
+            )
+        opt.append("NUM_THREADS=%s" % num_threads)
+
     if method_fields is None:
         if op_str in ("Update", "Clip", "Erase"):
             method_fields = "NONE"
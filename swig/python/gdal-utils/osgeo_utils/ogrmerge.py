@@ -33,8 +33,11 @@
 import glob
 import os
 import os.path
+import queue
 import sys
-from typing import Optional, Sequence
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence, Union
 
 from osgeo import gdal, ogr, osr
 from osgeo_utils.auxiliary.base import PathLikeOrStr
@@ -51,6 +54,7 @@ def Usage(isError):
     print("            [-dsco <NAME>=<VALUE>]... [-lco <NAME>=<VALUE>]...", file=f)
     print("            [-s_srs <srs_def>] [-t_srs <srs_def>|-a_srs <srs_def>]", file=f)
     print("            [-progress] [-skipfailures] [--help-general]", file=f)
+    print("            [-j <num_threads>|ALL_CPUS]", file=f)
     print("", file=f)
     print("Options specific to -single:", file=f)
     print("            [-field_strategy {FirstLayer|Union|Intersection}]", file=f)
@@ -192,6 +196,7 @@ def process(argv, progress=None, progress_arg=None):
     t_srs = None
     dsco = []
     lco = []
+    num_threads = None
     # WARNING: if adding a new option, make sure to update _gpkg_ogrmerge()
     # optimized code path, or use the general case.
 
@@ -252,6 +257,21 @@ def process(argv, progress=None, progress_arg=None):
         elif arg == "-lco" and i + 1 < len(argv):
             i = i + 1
             lco.append(argv[i])
+        elif arg == "-j" and i + 1 < len(argv):
+            i = i + 1
+            if EQUAL(argv[i], "ALL_CPUS"):
+                num_threads = "ALL_CPUS"
+            else:
+                try:
+                    num_threads = int(argv[i])
+                except ValueError:
+                    num_threads = 0
+                if num_threads <= 0:
+                    print(
+                        "ERROR: Invalid value for -j: %s" % argv[i],
+                        file=sys.stderr,
+                    )
+                    return 1
         elif arg == "-src_geom_type" and i + 1 < len(argv):
             i = i + 1
             src_geom_type_names = argv[i].split(",")
@@ -300,6 +320,7 @@ def process(argv, progress=None, progress_arg=None):
         lco=lco,
         progress_callback=progress,
         progress_arg=progress_arg,
+        num_threads=num_threads,
     )
 
 
@@ -835,6 +856,560 @@ def _gpkg_ogrmerge(
     return 0
 
 
+#############################################################################
+# -j mode: the source datasets are opened and read by a pool of threads
+# through the Arrow stream API, and their record batches are written by the
+# calling thread in transactions of GROUP_TRANSACTIONS features.
+
+GROUP_TRANSACTIONS = 100 * 1000
+
+# Field types into which WriteArrowBatch() can write a field of another type,
+# besides String
+_FIELD_TYPE_FALLBACKS = {
+    ogr.OFTInteger: (ogr.OFTInteger64, ogr.OFTReal),
+    ogr.OFTInteger64: (ogr.OFTReal,),
+}
+
+
+def _get_src_layers(src_ds, src_geom_types):
+    for src_lyr_idx in range(src_ds.GetLayerCount()):
+        src_lyr = src_ds.GetLayer(src_lyr_idx)
+        if src_geom_types:
+            gt = ogr.GT_Flatten(src_lyr.GetGeomType())
+            if gt not in src_geom_types:
+                continue
+        yield src_lyr_idx, src_lyr
+
+
+def _get_arrow_geometry_column_name(src_lyr):
+    layer_defn = src_lyr.GetLayerDefn()
+    if layer_defn.GetGeomFieldCount() == 0:
+        return None
+    # Name used by GetArrowStream() for an unnamed geometry column
+    return layer_defn.GetGeomFieldDefn(0).GetName() or "wkb_geometry"
+
+
+def _get_fields(layer_defn):
+    """Returns the (name, type, subtype, width, precision) tuples of the
+    fields of layer_defn"""
+
+    fields = []
+    for i in range(layer_defn.GetFieldCount()):
+        fld_defn = layer_defn.GetFieldDefn(i)
+        fields.append(
+            (
+                fld_defn.GetName(),
+                fld_defn.GetType(),
+                fld_defn.GetSubType(),
+                fld_defn.GetWidth(),
+                fld_defn.GetPrecision(),
+            )
+        )
+    return fields
+
+
+def _get_src_layer_schemas(src_dsname, src_geom_types):
+    """Returns a (geom_type, srs, fields) tuple for each layer of src_dsname"""
+
+    with gdal.ExceptionMgr(useExceptions=True):
+        src_ds = ogr.Open(src_dsname)
+        schemas = []
+        for _, src_lyr in _get_src_layers(src_ds, src_geom_types):
+            srs = src_lyr.GetSpatialRef()
+            schemas.append(
+                (
+                    src_lyr.GetGeomType(),
+                    srs.Clone() if srs else None,
+                    _get_fields(src_lyr.GetLayerDefn()),
+                )
+            )
+        return schemas
+
+
+def _merge_field_types(type1, type2):
+    if type1 == type2:
+        return type1
+    if {type1, type2} == {ogr.OFTInteger, ogr.OFTInteger64}:
+        return ogr.OFTInteger64
+    if {type1, type2} <= {ogr.OFTInteger, ogr.OFTInteger64, ogr.OFTReal}:
+        return ogr.OFTReal
+    # WriteArrowBatch() can write any Arrow type into a String field
+    return ogr.OFTString
+
+
+def _merge_fields(layer_fields, field_strategy):
+    """Returns the fields of the output layer in -single mode"""
+
+    if not layer_fields:
+        return []
+    if field_strategy is not None and EQUAL(field_strategy, "FirstLayer"):
+        return layer_fields[0]
+
+    merged_fields = {}
+    for fields in layer_fields:
+        for fld in fields:
+            key = fld[0].lower()
+            if key not in merged_fields:
+                merged_fields[key] = fld
+            else:
+                merged_fld = merged_fields[key]
+                merged_type = _merge_field_types(merged_fld[1], fld[1])
+                if merged_type != merged_fld[1] or merged_fld[2] != fld[2]:
+                    merged_fields[key] = (
+                        merged_fld[0],
+                        merged_type,
+                        ogr.OFSTNone,
+                        0,
+                        0,
+                    )
+
+    if field_strategy is not None and EQUAL(field_strategy, "Intersection"):
+        for fields in layer_fields:
+            keys = set(fld[0].lower() for fld in fields)
+            merged_fields = {
+                key: fld for key, fld in merged_fields.items() if key in keys
+            }
+
+    return list(merged_fields.values())
+
+
+def _create_fields(dst_lyr, fields):
+    """Creates fields in dst_lyr, and returns a dictionary mapping the lower
+    case names of the fields renamed by the output driver to their new name"""
+
+    renamed_fields = {}
+    for name, fld_type, fld_subtype, width, precision in fields:
+        fld_defn = ogr.FieldDefn(name, fld_type)
+        fld_defn.SetSubType(fld_subtype)
+        fld_defn.SetWidth(width)
+        fld_defn.SetPrecision(precision)
+        dst_lyr.CreateField(fld_defn)
+        layer_defn = dst_lyr.GetLayerDefn()
+        dst_name = layer_defn.GetFieldDefn(layer_defn.GetFieldCount() - 1).GetName()
+        if dst_name != name:
+            renamed_fields[name.lower()] = dst_name
+    return renamed_fields
+
+
+def _get_field_mapping(dst_lyr, dst_renamed_fields, src_lyr_name, src_fields):
+    """Returns the (ignored_fields, renamed_fields) of a source layer written
+    into dst_lyr: the names of the source fields that dst_lyr lacks or cannot
+    receive, and a dictionary mapping the names of the source fields written
+    into a field with another name to that name."""
+
+    layer_defn = dst_lyr.GetLayerDefn()
+    ignored_fields = []
+    renamed_fields = {}
+    for name, fld_type, _, _, _ in src_fields:
+        dst_name = dst_renamed_fields.get(name.lower(), name)
+        idx = layer_defn.GetFieldIndex(dst_name)
+        if idx < 0:
+            ignored_fields.append(name)
+            continue
+        dst_type = layer_defn.GetFieldDefn(idx).GetType()
+        if dst_type not in (fld_type, ogr.OFTString) and (
+            dst_type not in _FIELD_TYPE_FALLBACKS.get(fld_type, ())
+        ):
+            print(
+                "Warning: field %s of layer %s cannot be written into a field "
+                "of type %s, and is ignored"
+                % (name, src_lyr_name, ogr.GetFieldTypeName(dst_type)),
+                file=sys.stderr,
+            )
+            ignored_fields.append(name)
+        elif dst_name != name:
+            renamed_fields[name] = dst_name
+    return ignored_fields, renamed_fields
+
+
+def _get_dst_layer(
+    dst_ds, layer_name, srs, geom_type, lco, append, overwrite_layer, created_layers
+):
+    """Returns a (layer, is_new) tuple, or (None, False) in case of error"""
+
+    dst_lyr = dst_ds.GetLayerByName(layer_name)
+    if dst_lyr is not None:
+        if append or layer_name in created_layers:
+            return dst_lyr, False
+        if not overwrite_layer:
+            print(
+                "ERROR: Layer %s already exists, but -append nor "
+                "-overwrite_layer are specified" % layer_name,
+                file=sys.stderr,
+            )
+            return None, False
+        for i in range(dst_ds.GetLayerCount()):
+            if dst_ds.GetLayer(i).GetName() == dst_lyr.GetName():
+                dst_ds.DeleteLayer(i)
+                break
+
+    dst_lyr = dst_ds.CreateLayer(layer_name, srs, geom_type, lco)
+    created_layers.add(layer_name)
+    return dst_lyr, True
+
+
+def _get_arrow_layer(
+    src_ds, src_lyr, fields, ignored_fields, ignored_geom_fields, renamed_fields
+):
+    """Returns the layer to read src_lyr from, without its ignored fields
+    and with its renamed fields. That is src_lyr itself, or an OGR SQL
+    result layer that must be released after use."""
+
+    if not renamed_fields:
+        src_lyr.SetIgnoredFields(ignored_fields + ignored_geom_fields)
+        return src_lyr, False
+
+    # WriteArrowBatch() matches Arrow columns and fields by name, so rename
+    # columns with OGR SQL
+    columns = []
+    for name, _, _, _, _ in fields:
+        if name in ignored_fields:
+            continue
+        column = '"%s"' % _quote_id(name)
+        if name in renamed_fields:
+            column += ' AS "%s"' % _quote_id(renamed_fields[name])
+        columns.append(column)
+    sql_lyr = src_ds.ExecuteSQL(
+        'SELECT %s FROM "%s"' % (", ".join(columns), _quote_id(src_lyr.GetName())),
+        dialect="OGRSQL",
+    )
+    sql_lyr.SetIgnoredFields(ignored_geom_fields)
+    return sql_lyr, True
+
+
+def _read_src_dataset(src_ds_idx, src_dsname, src_geom_types, msg_queue, stop_event):
+    """Puts the layers of src_dsname and their Arrow record batches in
+    msg_queue, followed by a "done" message.
+
+    For each layer, a "layer" message is sent, and the reader waits for the
+    (ignored_fields, renamed_fields, write_geometry) tuple, or None to skip
+    the layer, that the writer puts in the reply queue of the message.
+    """
+
+    error_msg = None
+    sql_layers = []
+    try:
+        with gdal.ExceptionMgr(useExceptions=True):
+            src_ds = ogr.Open(src_dsname)
+            for src_lyr_idx, src_lyr in _get_src_layers(src_ds, src_geom_types):
+                if stop_event.is_set():
+                    break
+
+                layer_defn = src_lyr.GetLayerDefn()
+                fields = _get_fields(layer_defn)
+                srs = src_lyr.GetSpatialRef()
+                reply = queue.Queue(maxsize=1)
+                msg_queue.put(
+                    (
+                        "layer",
+                        src_ds_idx,
+                        src_lyr_idx,
+                        (
+                            src_lyr.GetName(),
+                            src_lyr.GetGeomType(),
+                            srs.Clone() if srs else None,
+                            fields,
+                            reply,
+                        ),
+                    )
+                )
+                mapping = reply.get()
+                if mapping is None:
+                    continue
+                ignored_fields, renamed_fields, write_geometry = mapping
+
+                # Only the first geometry column is merged
+                ignored_geom_fields = [
+                    layer_defn.GetGeomFieldDefn(i).GetName() or "OGR_GEOMETRY"
+                    for i in range(
+                        1 if write_geometry else 0, layer_defn.GetGeomFieldCount()
+                    )
+                ]
+
+                lyr, is_sql_lyr = _get_arrow_layer(
+                    src_ds,
+                    src_lyr,
+                    fields,
+                    ignored_fields,
+                    ignored_geom_fields,
+                    renamed_fields,
+                )
+                if is_sql_lyr:
+                    sql_layers.append((src_ds, lyr))
+                geom_name = (
+                    _get_arrow_geometry_column_name(lyr) if write_geometry else None
+                )
+                stream = lyr.GetArrowStream(["INCLUDE_FID=NO", "GEOMETRY_ENCODING=WKB"])
+                schema = stream.GetSchema()
+
+                while not stop_event.is_set():
+                    array = stream.GetNextRecordBatch()
+                    if array is None:
+                        break
+                    # The array must not outlive its source dataset, layer
+                    # and stream, which are thus passed along with it.
+                    msg_queue.put(
+                        (
+                            "batch",
+                            src_ds_idx,
+                            src_lyr_idx,
+                            (src_ds, lyr, stream, geom_name, schema, array),
+                        )
+                    )
+    except Exception as e:
+        error_msg = "%s: %s" % (src_dsname, str(e))
+    finally:
+        # OGR SQL result layers are released by the writer, once it has
+        # written their batches
+        msg_queue.put(("done", src_ds_idx, None, (error_msg, sql_layers)))
+
+
+def _ogrmerge_multithreaded(
+    src_datasets,
+    dst_ds,
+    num_threads,
+    single_layer,
+    layer_name_template,
+    skip_failures,
+    src_geom_types,
+    field_strategy,
+    a_srs,
+    lco,
+    append,
+    overwrite_layer,
+    progress_callback,
+    progress_arg,
+):
+
+    with gdal.ExceptionMgr(useExceptions=True):
+
+        srs = None
+        if a_srs is not None:
+            srs = osr.SpatialReference()
+            srs.SetFromUserInput(a_srs)
+
+        src_ds_indices = list(range(len(src_datasets)))
+        created_layers = set()
+        # output layer name -> fields renamed by the output driver
+        dst_renamed_fields = {}
+        single_dst_lyr = None
+        if single_layer:
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                futures = [
+                    executor.submit(_get_src_layer_schemas, src_dsname, src_geom_types)
+                    for src_dsname in src_datasets
+                ]
+            schemas = []
+            src_ds_indices = []
+            for src_ds_idx, future in enumerate(futures):
+                try:
+                    schemas += future.result()
+                    src_ds_indices.append(src_ds_idx)
+                except RuntimeError:
+                    print(
+                        "ERROR: Cannot open %s" % src_datasets[src_ds_idx],
+                        file=sys.stderr,
+                    )
+                    if not skip_failures:
+                        return 1
+            if not schemas:
+                return 0
+
+            geom_types = set(schema[0] for schema in schemas)
+            single_dst_lyr, is_new = _get_dst_layer(
+                dst_ds,
+                layer_name_template,
+                srs if srs is not None else schemas[0][1],
+                geom_types.pop() if len(geom_types) == 1 else ogr.wkbUnknown,
+                lco,
+                append,
+                overwrite_layer,
+                created_layers,
+            )
+            if single_dst_lyr is None:
+                return 1
+            if is_new:
+                dst_renamed_fields[single_dst_lyr.GetName()] = _create_fields(
+                    single_dst_lyr,
+                    _merge_fields([schema[2] for schema in schemas], field_strategy),
+                )
+
+        def get_dst_layer_mapping(src_ds_idx, src_lyr_idx, layer_info):
+            """Returns the output layer of a source layer and the reply to its
+            reader, or None in case of error"""
+
+            src_lyr_name, geom_type, src_srs, fields, _ = layer_info
+            if single_layer:
+                dst_lyr = single_dst_lyr
+            else:
+                layer_name = _build_layer_name_non_single_mode(
+                    layer_name_template,
+                    src_ds_idx,
+                    src_datasets[src_ds_idx],
+                    src_lyr_idx,
+                    src_lyr_name,
+                    skip_failures,
+                )
+                if layer_name is None:
+                    return None
+                dst_lyr, is_new = _get_dst_layer(
+                    dst_ds,
+                    layer_name,
+                    srs if srs is not None else src_srs,
+                    geom_type,
+                    lco,
+                    append,
+                    overwrite_layer,
+                    created_layers,
+                )
+                if dst_lyr is None:
+                    return None
+                if is_new:
+                    dst_renamed_fields[dst_lyr.GetName()] = _create_fields(
+                        dst_lyr, fields
+                    )
+
+            ignored_fields, renamed_fields = _get_field_mapping(
+                dst_lyr,
+                dst_renamed_fields.get(dst_lyr.GetName(), {}),
+                src_lyr_name,
+                fields,
+            )
+            write_geometry = dst_lyr.GetLayerDefn().GetGeomFieldCount() > 0
+            return dst_lyr, (ignored_fields, renamed_fields, write_geometry)
+
+        def release_sql_layers(sql_layers):
+            for src_ds, sql_lyr in sql_layers:
+                src_ds.ReleaseResultSet(sql_lyr)
+
+        in_transaction = False
+        if dst_ds.TestCapability(ogr.ODsCTransactions):
+            dst_ds.StartTransaction()
+            in_transaction = True
+        features_in_transaction = 0
+
+        ret = 0
+        dst_layers = {}
+        msg_queue = queue.Queue(maxsize=4 * num_threads)
+        stop_event = threading.Event()
+        remaining = len(src_ds_indices)
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            for src_ds_idx in src_ds_indices:
+                executor.submit(
+                    _read_src_dataset,
+                    src_ds_idx,
+                    src_datasets[src_ds_idx],
+                    src_geom_types,
+                    msg_queue,
+                    stop_event,
+                )
+
+            # Keep on reading the queue after an error, until all readers have
+            # stopped
+            try:
+                while remaining:
+                    msg_type, src_ds_idx, src_lyr_idx, payload = msg_queue.get()
+
+                    if msg_type == "done":
+                        remaining -= 1
+                        error_msg, sql_layers = payload
+                        payload = None
+                        release_sql_layers(sql_layers)
+                        if error_msg is not None and not stop_event.is_set():
+                            print("ERROR: %s" % error_msg, file=sys.stderr)
+                            if not skip_failures:
+                                ret = 1
+                                stop_event.set()
+                        if (
+                            progress_callback
+                            and not stop_event.is_set()
+                            and not progress_callback(
+                                1.0 - remaining / len(src_ds_indices),
+                                "",
+                                progress_arg,
+                            )
+                        ):
+                            ret = 1
+                            stop_event.set()
+
+                    elif msg_type == "layer":
+                        dst_lyr_mapping = None
+                        try:
+                            if not stop_event.is_set():
+                                dst_lyr_mapping = get_dst_layer_mapping(
+                                    src_ds_idx, src_lyr_idx, payload
+                                )
+                                if dst_lyr_mapping is None:
+                                    ret = 1
+                                    stop_event.set()
+                        except RuntimeError as e:
+                            print("ERROR: %s" % str(e), file=sys.stderr)
+                            if not skip_failures:
+                                ret = 1
+                                stop_event.set()
+                        finally:
+                            # Always reply, so that the reader does not wait
+                            # forever
+                            reply = payload[-1]
+                            payload = None
+                            if dst_lyr_mapping is None:
+                                reply.put(None)
+                            else:
+                                dst_lyr, mapping = dst_lyr_mapping
+                                dst_layers[(src_ds_idx, src_lyr_idx)] = dst_lyr
+                                reply.put(mapping)
+
+                    elif (
+                        not stop_event.is_set()
+                        and (src_ds_idx, src_lyr_idx) in dst_layers
+                    ):
+                        dst_lyr = dst_layers[(src_ds_idx, src_lyr_idx)]
+                        geom_name, schema, array = payload[-3:]
+                        write_options = []
+                        if geom_name:
+                            write_options.append("GEOMETRY_NAME=" + geom_name)
+                        try:
+                            features_in_transaction += array.GetLength()
+                            dst_lyr.WriteArrowBatch(schema, array, write_options)
+                            if (
+                                in_transaction
+                                and features_in_transaction >= GROUP_TRANSACTIONS
+                            ):
+                                dst_ds.CommitTransaction()
+                                dst_ds.StartTransaction()
+                                features_in_transaction = 0
+                        except RuntimeError as e:
+                            print("ERROR: %s" % str(e), file=sys.stderr)
+                            if not skip_failures:
+                                ret = 1
+                                stop_event.set()
+
+                    # Release the array before its source dataset
+                    schema = array = payload = None
+
+            finally:
+                if remaining:
+                    # Unexpected exception: stop and unblock the readers, so
+                    # that leaving the executor does not wait for them forever
+                    stop_event.set()
+                    while remaining:
+                        msg_type, _, _, payload = msg_queue.get()
+                        if msg_type == "done":
+                            remaining -= 1
+                            release_sql_layers(payload[1])
+                        elif msg_type == "layer":
+                            payload[-1].put(None)
+                        payload = None
+
+        if in_transaction:
+            dst_ds.CommitTransaction()
+
+    return ret
+
+
+#############################################################################
+
+
 def ogrmerge(
     src_datasets: Optional[Sequence[str]] = None,
     dst_filename: Optional[PathLikeOrStr] = None,
@@ -857,6 +1432,7 @@ def ogrmerge(
     lco: Optional[Sequence[str]] = None,
     progress_callback: Optional = None,
     progress_arg: Optional = None,
+    num_threads: Optional[Union[int, str]] = None,
 ):
 
     src_datasets = src_datasets or []
@@ -902,6 +1478,30 @@ def ogrmerge(
         else:
             layer_name_template = "{AUTO_NAME}"
 
+    if num_threads is not None:
+        num_threads_arg = num_threads
+        if EQUAL(str(num_threads), "ALL_CPUS"):
+            num_threads = gdal.GetNumCPUs()
+        try:
+            num_threads = int(num_threads)
+        except (TypeError, ValueError):
+            num_threads = 0
+        if num_threads <= 0:
+            print(
+                "ERROR: Invalid value for -j: %s" % num_threads_arg,
+                file=sys.stderr,
+            )
+            return 1
+        if num_threads > 1 and (
+            s_srs or t_srs or src_layer_field_name or EQUAL(driver_name, "VRT")
+        ):
+            print(
+                "Warning: -j is ignored with -s_srs, -t_srs, "
+                "-src_layer_field_name and VRT output",
+                file=sys.stderr,
+            )
+            num_threads = None
+
     def get_vector_file_in_update_no_exception(filename):
         with gdal.ExceptionMgr(useExceptions=False), gdal.quiet_errors():
             return gdal.OpenEx(filename, gdal.OF_VECTOR | gdal.OF_UPDATE)
@@ -987,6 +1587,24 @@ def ogrmerge(
             if dst_ds is None:
                 return 1
 
+        if num_threads is not None and num_threads > 1:
+            return _ogrmerge_multithreaded(
+                src_datasets,
+                dst_ds,
+                num_threads,
+                single_layer,
+                layer_name_template,
+                skip_failures,
+                src_geom_types,
+                field_strategy,
+                a_srs,
+                lco,
+                append,
+                overwrite_layer,
+                progress_callback,
+                progress_arg,
+            )
+
         vrt_filename = "/vsimem/_ogrmerge_.vrt"
     else:
         if gdal.VSIStatL(dst_filename) and not overwrite_ds:
@@ -37,7 +37,7 @@ from typing import Optional, Sequence, Tuple, Union
 
 import numpy as np
 
-from osgeo import gdal, gdalconst, osr
+from osgeo import gdal, gdal_array, gdalconst, osr
 from osgeo.gdal_array import BandRasterIONumPy
 from osgeo_utils.auxiliary.array_util import ArrayLike, ArrayOrScalarLike
 from osgeo_utils.auxiliary.base import is_path_like
@@ -80,6 +80,186 @@ CoordinateTransformationOrSRS = Optional[
 ]
 
 
+# Interpolation kernels of the resampling algorithms handled by sample_points_by_block(),
+# as (number of taps, kernel function of the distance to the pixel center).
+def _bilinear_kernel(d: np.ndarray) -> np.ndarray:
+    return np.maximum(0, 1 - np.abs(d))
+
+
+def _cubic_kernel(d: np.ndarray) -> np.ndarray:
+    # Keys cubic convolution kernel, with a=-0.5
+    d = np.abs(d)
+    d2 = d * d
+    d3 = d2 * d
+    return np.where(
+        d <= 1,
+        1.5 * d3 - 2.5 * d2 + 1,
+        np.where(d < 2, -0.5 * d3 + 2.5 * d2 - 4 * d + 2, 0),
+    )
+
+
+RESAMPLING_ALGS = {
+    "nearest": gdalconst.GRIORA_NearestNeighbour,
+    "bilinear": gdalconst.GRIORA_Bilinear,
+    "cubic": gdalconst.GRIORA_Cubic,
+    "cubicspline": gdalconst.GRIORA_CubicSpline,
+    "lanczos": gdalconst.GRIORA_Lanczos,
+    "average": gdalconst.GRIORA_Average,
+    "mode": gdalconst.GRIORA_Mode,
+}
+
+BLOCK_SAMPLING_RESAMPLE_ALGS = {
+    gdalconst.GRIORA_NearestNeighbour: (1, None),
+    gdalconst.GRIORA_Bilinear: (2, _bilinear_kernel),
+    gdalconst.GRIORA_Cubic: (4, _cubic_kernel),
+}
+
+
+def sample_points(
+    bands: Sequence[gdal.Band],
+    pixels: np.ndarray,
+    lines: np.ndarray,
+    results: np.ndarray,
+    resample_alg=gdalconst.GRIORA_NearestNeighbour,
+):
+    """
+    samples the bands at the given (pixel, line) locations into results (dims: bands, points),
+    with a 1x1 RasterIO() request per point and per band.
+    Results of points outside the raster are left unchanged.
+    """
+    buf_xsize = buf_ysize = 1
+    buf_type = gdal_array.NumericTypeCodeToGDALTypeCode(results.dtype.type)
+    buf_obj = np.empty([buf_ysize, buf_xsize], dtype=results.dtype)
+
+    for idx, (pixel, line) in enumerate(zip(pixels, lines)):
+        for bnd_idx, band in enumerate(bands):
+            if (
+                BandRasterIONumPy(
+                    band,
+                    0,
+                    pixel - 0.5,
+                    line - 0.5,
+                    1,
+                    1,
+                    buf_obj,
+                    buf_type,
+                    resample_alg,
+                    None,
+                    None,
+                )
+                == 0
+            ):
+                results[bnd_idx][idx] = buf_obj[0][0]
+
+
+def _read_window(ds, bands, band_nums, xoff, yoff, xsize, ysize, dtype) -> np.ndarray:
+    buf = np.empty((len(bands), ysize, xsize), dtype=dtype)
+    if ds is not None and len(bands) > 1:
+        ds.ReadAsArray(xoff, yoff, xsize, ysize, buf_obj=buf, band_list=band_nums)
+    else:
+        for bnd_idx, band in enumerate(bands):
+            band.ReadAsArray(xoff, yoff, xsize, ysize, buf_obj=buf[bnd_idx])
+    return buf
+
+
+def _get_taps(pos: np.ndarray, tap_count: int, kernel, win_off: int, size: int):
+    """
+    returns the local indices, weights and validity of the taps of each position,
+    all with dims (points, tap_count)
+    """
+    center = pos - 0.5
+    first = np.floor(center).astype(np.int64) - (tap_count // 2 - 1)
+    taps = first[:, None] + np.arange(tap_count)
+    weights = kernel(center[:, None] - taps)
+    valid = (taps >= 0) & (taps < size)
+    local = np.clip(taps, 0, size - 1) - win_off
+    return local, weights, valid
+
+
+def sample_points_by_block(
+    bands: Sequence[gdal.Band],
+    pixels: np.ndarray,
+    lines: np.ndarray,
+    results: np.ndarray,
+    resample_alg=gdalconst.GRIORA_NearestNeighbour,
+    ds: Optional[gdal.Dataset] = None,
+    band_nums: Optional[Sequence[int]] = None,
+):
+    """
+    samples the bands at the given (pixel, line) locations into results (dims: bands, points).
+    The points are grouped by the block they fall in, each touched block is read once for all the bands
+    (with a single dataset RasterIO() request if ds and band_nums are given) and the values are gathered
+    with numpy indexing. Bilinear and cubic interpolation ignore taps outside the raster or equal to the
+    band nodata value, and re-normalize the weights of the other taps.
+    Results of points outside the raster are left unchanged.
+    """
+    tap_count, kernel = BLOCK_SAMPLING_RESAMPLE_ALGS[resample_alg]
+    margin = tap_count // 2
+    xsize, ysize = bands[0].XSize, bands[0].YSize
+    block_xsize, block_ysize = bands[0].GetBlockSize()
+
+    pixels = np.asarray(pixels, dtype=np.float64)
+    lines = np.asarray(lines, dtype=np.float64)
+    inside = (pixels >= 0) & (pixels < xsize) & (lines >= 0) & (lines < ysize)
+    point_idx = np.flatnonzero(inside)
+    if not len(point_idx):
+        return
+    pixels = pixels[point_idx]
+    lines = lines[point_idx]
+
+    block_x = np.floor(pixels).astype(np.int64) // block_xsize
+    block_y = np.floor(lines).astype(np.int64) // block_ysize
+    block_key = block_y * ((xsize + block_xsize - 1) // block_xsize) + block_x
+    order = np.argsort(block_key, kind="stable")
+    _, starts = np.unique(block_key[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+
+    is_integer = np.issubdtype(results.dtype, np.integer)
+    if kernel is not None:
+        nodata = np.array(
+            [
+                np.nan if band.GetNoDataValue() is None else band.GetNoDataValue()
+                for band in bands
+            ]
+        )
+        fill = np.where(np.isnan(nodata), 0, nodata)
+        if is_integer:
+            info = np.iinfo(results.dtype)
+
+    for start, end in zip(starts, ends):
+        idx = order[start:end]
+        bx, by = block_x[idx[0]], block_y[idx[0]]
+        x0 = max(0, bx * block_xsize - margin)
+        y0 = max(0, by * block_ysize - margin)
+        x1 = min(xsize, (bx + 1) * block_xsize + margin)
+        y1 = min(ysize, (by + 1) * block_ysize + margin)
+        buf = _read_window(
+            ds, bands, band_nums, x0, y0, x1 - x0, y1 - y0, results.dtype
+        )
+
+        if kernel is None:
+            px = np.floor(pixels[idx]).astype(np.int64) - x0
+            ln = np.floor(lines[idx]).astype(np.int64) - y0
+            results[:, point_idx[idx]] = buf[:, ln, px]
+            continue
+
+        px, wx, vx = _get_taps(pixels[idx], tap_count, kernel, x0, xsize)
+        ln, wy, vy = _get_taps(lines[idx], tap_count, kernel, y0, ysize)
+        # dims: (bands, points, y taps, x taps)
+        values = buf[:, ln[:, :, None], px[:, None, :]].astype(np.float64)
+        weights = (wy[:, :, None] * wx[:, None, :]) * (vy[:, :, None] & vx[:, None, :])
+        weights = np.where(values != nodata[:, None, None, None], weights, 0)
+        weight_sum = weights.sum(axis=(2, 3))
+        value_sum = (weights * values).sum(axis=(2, 3))
+        has_weight = np.abs(weight_sum) > 1e-10
+        sampled = np.where(
+            has_weight, value_sum / np.where(has_weight, weight_sum, 1), fill[:, None]
+        )
+        if is_integer:
+            sampled = np.clip(np.rint(sampled), info.min, info.max)
+        results[:, point_idx[idx]] = sampled
+
+
 def gdallocationinfo(
     filename_or_ds: PathOrDS,
     x: ArrayOrScalarLike,
@@ -192,29 +372,18 @@ def gdallocationinfo(
     else:
         lines_q = y * line_fact
 
-    buf_xsize = buf_ysize = 1
-    buf_type, typecode = GDALTypeCodeAndNumericTypeCodeFromDataSet(ds)
-    buf_obj = np.empty([buf_ysize, buf_xsize], dtype=typecode)
-
-    for idx, (pixel, line) in enumerate(zip(pixels_q, lines_q)):
-        for bnd_idx, band in enumerate(bands):
-            if (
-                BandRasterIONumPy(
-                    band,
-                    0,
-                    pixel - 0.5,
-                    line - 0.5,
-                    1,
-                    1,
-                    buf_obj,
-                    buf_type,
-                    resample_alg,
-                    None,
-                    None,
-                )
-                == 0
-            ):
-                results[bnd_idx][idx] = buf_obj[0][0]
+    if resample_alg in BLOCK_SAMPLING_RESAMPLE_ALGS:
+        sample_points_by_block(
+            bands,
+            pixels_q,
+            lines_q,
+            results,
+            resample_alg,
+            ds=None if ovr_idx else ds,
+            band_nums=get_band_nums(ds, band_nums),
+        )
+    else:
+        sample_points(bands, pixels_q, lines_q, results, resample_alg)
 
     is_scaled, scales, offsets = get_scales_and_offsets(bands)
     if is_scaled:
@@ -437,6 +606,14 @@ class GDALLocationInfo(GDALScript):
             help="If set, a Bilinear interpolation would be used, otherwise the NearestNeighbour sampling.",
         )
 
+        parser.add_argument(
+            "-r",
+            dest="resampling",
+            choices=list(RESAMPLING_ALGS),
+            help="Resampling (interpolation) method, overrides -interp. "
+            "nearest, bilinear and cubic sample all the points touching a block at once.",
+        )
+
         parser.add_argument(
             "-b",
             dest="band_nums",
@@ -535,11 +712,13 @@ class GDALLocationInfo(GDALScript):
         else:
             kwargs["output_mode"] = LocationInfoOutput.PixelLineValVerbose
 
-        kwargs["resample_alg"] = (
-            gdal.GRIORA_Bilinear
-            if kwargs["resample_alg"]
-            else gdal.GRIORA_NearestNeighbour
-        )
+        if kwargs["resampling"]:
+            kwargs["resample_alg"] = RESAMPLING_ALGS[kwargs["resampling"]]
+        elif kwargs["resample_alg"]:
+            kwargs["resample_alg"] = gdal.GRIORA_Bilinear
+        else:
+            kwargs["resample_alg"] = gdal.GRIORA_NearestNeighbour
+        del kwargs["resampling"]
 
         del kwargs["xy"]
 